@@ -0,0 +1,179 @@
+"""
+Cache odpovědí větve "info".
+
+Klíčem jsou normalizované otázky vyextrahované z dotazu uživatele a rozsah
+(scope): hash obsahu životopisu (změna životopisu cache automaticky zneplatní)
+spolu s otiskem shrnutí a předchozích zpráv konverzace, ze kterých odpověď
+vznikla. Doplňující otázka typu "a co dál?" tak nikdy nedostane odpověď z cizí
+konverzace. Kromě přesné shody umí volitelně (práh podobnosti > 0) najít
+i velmi podobný dotaz podle kosinové podobnosti znakových trigramů.
+"""
+import hashlib
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+
+from extractors import normalize
+
+ANSWER_CACHE_TTL = float(os.getenv("LAURA_ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("LAURA_ANSWER_CACHE_MAX_ENTRIES", "500"))
+# 0 = jen přesná shoda, hledání podobných dotazů je potřeba zapnout
+ANSWER_CACHE_SIMILARITY = float(os.getenv("LAURA_ANSWER_CACHE_SIMILARITY", "0"))
+
+NGRAM_SIZE = 3
+NON_WORD_RE = re.compile(r"[^a-z0-9 ]+")
+
+
+def normalize_questions(questions: List[str]) -> str:
+    """Malá písmena bez diakritiky a interpunkce, otázky seřazené - pořadí nehraje roli."""
+    cleaned = {" ".join(NON_WORD_RE.sub(" ", normalize(question)).split()) for question in questions}
+    return " | ".join(sorted(question for question in cleaned if question))
+
+
+def conversation_scope(resume_hash: str, summary: Optional[str], history: List[str]) -> str:
+    """Rozsah cache: životopis + shrnutí a předchozí zprávy, které dostal model spolu s otázkou."""
+    if not summary and not history:
+        return resume_hash
+    digest = hashlib.sha256()
+    for part in [summary or ""] + history:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return f"{resume_hash}:{digest.hexdigest()[:16]}"
+
+
+def _ngrams(text: str) -> Counter:
+    padded = f" {text} "
+    return Counter(padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1))
+
+
+def _cosine(a: Counter, b: Counter, norm_a: float, norm_b: float) -> float:
+    if not norm_a or not norm_b:
+        return 0.0
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(count * b.get(gram, 0) for gram, count in a.items()) / (norm_a * norm_b)
+
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    normalized: str
+    scope: str
+    ngrams: Counter
+    norm: float
+    expires_at: float
+
+
+class AnswerCache:
+    def __init__(
+        self,
+        ttl: float = 3600.0,
+        max_entries: int = 500,
+        similarity_threshold: float = 0.0,
+        clock=time.time
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, CachedAnswer] = OrderedDict()
+
+    @staticmethod
+    def make_key(normalized: str, scope: str) -> str:
+        return f"{scope}|{normalized}"
+
+    def get(self, questions: List[str], scope: str, record_miss: bool = True, exact_only: bool = False) -> Optional[str]:
+        normalized = normalize_questions(questions)
+        if not normalized:
+            return None
+        key = self.make_key(normalized, scope)
+        now = self._clock()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.answer
+
+            similar = None if exact_only else self._find_similar(normalized, scope, now)
+            if similar is not None:
+                self._entries.move_to_end(self.make_key(similar.normalized, scope))
+                self.hits += 1
+                self.similar_hits += 1
+                return similar.answer
+
+            if record_miss:
+                self.misses += 1
+            return None
+
+    def set(self, questions: List[str], scope: str, answer: str) -> None:
+        normalized = normalize_questions(questions)
+        if not normalized:
+            return
+        ngrams = _ngrams(normalized)
+        entry = CachedAnswer(
+            answer=answer,
+            normalized=normalized,
+            scope=scope,
+            ngrams=ngrams,
+            norm=math.sqrt(sum(count * count for count in ngrams.values())),
+            expires_at=self._clock() + self.ttl
+        )
+        key = self.make_key(normalized, scope)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "ttl": self.ttl,
+            "max_entries": self.max_entries,
+            "similarity_threshold": self.similarity_threshold,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions
+        }
+
+    def _find_similar(self, normalized: str, scope: str, now: float) -> Optional[CachedAnswer]:
+        if self.similarity_threshold <= 0:
+            return None
+        ngrams = _ngrams(normalized)
+        norm = math.sqrt(sum(count * count for count in ngrams.values()))
+
+        best, best_score = None, self.similarity_threshold
+        for key, entry in list(self._entries.items()):
+            if entry.expires_at <= now:
+                del self._entries[key]
+                continue
+            if entry.scope != scope:
+                continue
+            score = _cosine(ngrams, entry.ngrams, norm, entry.norm)
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+
+def create_answer_cache() -> AnswerCache:
+    return AnswerCache(ANSWER_CACHE_TTL, ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_SIMILARITY)
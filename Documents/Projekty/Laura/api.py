@@ -1,21 +1,50 @@
 import os
 import json
+import asyncio
 import sys
+import time
+from contextlib import asynccontextmanager
 from typing import Annotated, TypedDict, List, Literal, Optional
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, AIMessage
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, AIMessage, RemoveMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.graph import StateGraph, END
-from prompts import SYSTEM_PROMPT, PROMPT_TOPIC_TYPE, SCHEDULING_PROMPT, CLASSIFY_MEETING_PROMPT, CLASSIFY_DATE_PROMPT, CLASSIFY_TIME_PROMPT, CLASSIFY_DURATION_PROMPT, CLASSIFY_EMAIL_PROMPT, CLASSIFY_PHONE_PROMPT, EXTRACT_QUESTIONS_PROMPT
+from langgraph.graph.message import add_messages
+from context import build_prompt, count_message_tokens, count_tokens, format_transcript, messages_to_fold
+from extractors import fast_extract
+from resume import ResumeStore
+from answer_cache import conversation_scope, create_answer_cache
+from memo import MemoCache, create_memo_cache
+from sessions import create_session_store
+from llm_backends import create_chat_model
+from limiter import LLM_EXPECTED_COMPLETION_TOKENS, PRIORITY_ANSWER, PRIORITY_BACKGROUND, LLMOverloadedError, create_llm_scheduler
+from telemetry import instrument_node, metrics_payload, record_cache, record_llm_call, trace_turn
+from scheduling import create_availability_engine, earliest_start, parse_meeting_start, pick_offered_slots
+from prompts import SYSTEM_PROMPT, PROMPT_TOPIC_TYPE, SCHEDULING_PROMPT, EXTRACT_MEETING_PROMPT, EXTRACT_QUESTIONS_PROMPT, SUMMARIZE_CONVERSATION_PROMPT, RESUME_CONTEXT_PROMPT
 
 # Načtení environment variables
 load_dotenv()
 
-app = FastAPI()
+# Stav konverzací drží server (checkpointer), klient posílá jen novou zprávu
+session_store = create_session_store()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global graph
+    graph = workflow.compile(checkpointer=await session_store.open())
+    yield
+    await session_store.close()
+    if memo_cache is not None:
+        memo_cache.close()
+    availability.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # Povolení CORS pro frontend
 app.add_middleware(
@@ -30,7 +59,7 @@ from datetime import datetime
 
 # Definice stavu grafu
 class State(TypedDict):
-    messages: Annotated[List[BaseMessage], "The messages in the conversation"]
+    messages: Annotated[List[BaseMessage], add_messages]
     topic: Optional[Literal["info", "date"]] = None
     question: Optional[List[str]] = None
     meeting_type: Optional[Literal["initial", "business_consultation", "technical_consultation", "urgent", "other"]] = None
@@ -40,36 +69,179 @@ class State(TypedDict):
     meeting_email: Optional[str] = None
     meeting_phone: Optional[str] = None
     date_now: str = datetime.now().strftime("%Y-%m-%d")
+    summary: Optional[str] = None
+    prompt_tokens: Optional[int] = None
+    turn_questions: Optional[List[str]] = None
+    cached_answer: Optional[str] = None
+    cached: bool = False
+    booking_id: Optional[int] = None
+    booked_slot: Optional[str] = None
+
+MEETING_FIELDS = ["meeting_type", "meeting_date", "meeting_time", "meeting_duration", "meeting_email", "meeting_phone"]
+
+class MeetingFields(BaseModel):
+    """Údaje o schůzce vyčtené z jedné zprávy uživatele."""
+    meeting_type: Optional[Literal["initial", "business_consultation", "technical_consultation", "urgent", "other"]] = Field(None, description="Účel schůzky")
+    meeting_date: Optional[str] = Field(None, description="Datum schůzky ve formátu YYYY-MM-DD")
+    meeting_time: Optional[str] = Field(None, description="Čas zahájení ve formátu HH:MM")
+    meeting_duration: Optional[int] = Field(None, description="Délka schůzky v minutách")
+    meeting_email: Optional[str] = Field(None, description="E-mailová adresa uživatele")
+    meeting_phone: Optional[str] = Field(None, description="Telefonní číslo uživatele bez mezer")
+
+# Statický prefix promptu - stejný v každém tahu, aby ho mohl využít prompt caching poskytovatele
+SYSTEM_PROMPT_MSG = SystemMessage(content=SYSTEM_PROMPT)
+
+# Inicializace LLM - backend (OpenAI, falešný model, nahrávka) určuje LAURA_LLM_MODE
+llm = create_chat_model(os.getenv("LAURA_ANSWER_MODEL", "gpt-4o"), 0.7)
+# Router a extrakce potřebují deterministické odpovědi, proto samostatný model s teplotou 0
+classifier_llm = create_chat_model(os.getenv("LAURA_CLASSIFIER_MODEL", "gpt-4o"), 0)
+# Sdílená fronta volání LLM ve workeru: strop souběžnosti, limity RPM/TPM, priority, opakování po 429
+llm_scheduler = create_llm_scheduler()
+# Jedno volání se strukturovaným výstupem místo šesti samostatných klasifikací
+# include_raw: kromě naparsovaných polí i původní zpráva s usage pro metriky
+meeting_extractor = classifier_llm.with_structured_output(MeetingFields, include_raw=True)
+# Odpovědi klasifikačních volání sdílené mezi workery (SQLite)
+memo_cache = create_memo_cache()
+
+def response_usage(resp) -> Optional[dict]:
+    message = resp["raw"] if isinstance(resp, dict) else resp
+    return getattr(message, "usage_metadata", None)
+
+async def call_llm(runnable, messages, priority: int = PRIORITY_BACKGROUND):
+    """
+    Volání LLM přes plánovač (fronta podle priority, limity, opakování po 429)
+    s měřením doby a tokenů. Odpovědi uživateli volají s PRIORITY_ANSWER.
+    """
+    model = getattr(runnable, "model_name", None) or classifier_llm.model_name
+
+    async def invoke():
+        started = time.perf_counter()
+        try:
+            resp = await runnable.ainvoke(messages)
+        except Exception as e:
+            record_llm_call(model, time.perf_counter() - started, 0, 0, error=repr(e))
+            raise
+        elapsed = time.perf_counter() - started
+
+        message = resp["raw"] if isinstance(resp, dict) else resp
+        usage = response_usage(resp)
+        if usage:
+            record_llm_call(message.response_metadata.get("model_name") or model, elapsed, usage["input_tokens"], usage["output_tokens"])
+        else:
+            record_llm_call(model, elapsed, count_message_tokens(messages), count_tokens(str(message.content)), estimated=True)
+        return resp
+
+    def used_tokens(resp) -> Optional[int]:
+        usage = response_usage(resp)
+        return usage["total_tokens"] if usage else None
+
+    estimated = count_message_tokens(messages) + LLM_EXPECTED_COMPLETION_TOKENS
+    return await llm_scheduler.run(invoke, priority, estimated, used_tokens)
 
-# Inicializace LLM
-llm = ChatOpenAI(model="gpt-4o", temperature=0.7)
+async def classify(prompt: str, message: str) -> str:
+    """Klasifikační volání přes memo cache - stejný prompt a zpráva se modelu posílají jen jednou."""
+    key = MemoCache.make_key(prompt, message)
+    if memo_cache is not None:
+        cached = await memo_cache.get(key)
+        record_cache("memo", cached is not None)
+        if cached is not None:
+            return cached
 
-def get_simulated_slots(date: str):
-    """Simuluje volné termíny pro dané datum."""
-    return ["09:00", "11:00", "14:00", "16:00"]
+    resp = await call_llm(classifier_llm, [SystemMessage(content=prompt), HumanMessage(content=message)])
+    if memo_cache is not None:
+        await memo_cache.set(key, resp.content)
+    return resp.content
+
+# Rezervace schůzek (SQLite) s indexem volných termínů
+availability = create_availability_engine()
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-def get_resume():
-    """Načte obsah životopisu ze souboru JSON."""
-    try:
-        resume_path = os.path.join(BASE_DIR, "resume.json")
-        with open(resume_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            return json.dumps(data, indent=2, ensure_ascii=False)
-    except Exception:
+# Životopis se načte a zaindexuje jednou, znovu jen po změně souboru
+resume_store = ResumeStore(os.path.join(BASE_DIR, "resume.json"))
+
+def get_resume(questions: List[str]):
+    """Vrátí části životopisu relevantní k otázkám."""
+    resume = resume_store.get()
+    if resume is None:
         return "Informace nejsou momentálně k dispozici."
+    return resume.relevant_context(questions)
+
+# Odpovědi na opakované dotazy z větve "info"
+answer_cache = create_answer_cache()
+
+async def extract_meeting_fields(message: str, date_now: str, res: dict) -> dict:
+    """
+    Doplní do `res` chybějící údaje o schůzce. Nejdřív lokální extraktory
+    (regexy, české datumy), LLM jen pro pole, která zůstala prázdná.
+    """
+    found, needs_llm = fast_extract(message, date_now)
+    for key, value in found.items():
+        # Délka má výchozí hodnotu 60, uvedená délka ji ale přepíše; nově uvedené
+        # datum nebo čas znamená přesun schůzky
+        if key in ("meeting_duration", "meeting_date", "meeting_time") or not res.get(key) or res[key] == "none":
+            res[key] = value
 
-def function_topic_type(state: State):
+    missing = [key for key in MEETING_FIELDS if not res.get(key) or res[key] == "none"]
+    if not missing or not needs_llm:
+        return res
+
+    prompt = EXTRACT_MEETING_PROMPT.format(date_now=date_now)
+    key = MemoCache.make_key(prompt, message)
+    cached = await memo_cache.get(key) if memo_cache is not None else None
+    if memo_cache is not None:
+        record_cache("memo", cached is not None)
+    if cached is not None:
+        extracted = MeetingFields.model_validate_json(cached)
+    else:
+        extracted = (await call_llm(meeting_extractor, [SystemMessage(content=prompt), HumanMessage(content=message)]))["parsed"]
+        if memo_cache is not None:
+            await memo_cache.set(key, extracted.model_dump_json())
+
+    for key in missing:
+        value = getattr(extracted, key)
+        if value is not None and value != "none":
+            res[key] = value
+    if extracted.meeting_duration and "meeting_duration" not in found:
+        res["meeting_duration"] = extracted.meeting_duration
+    return res
+
+async def context_node(state: State):
+    """Starší výměny zabalí do průběžného shrnutí a z uloženého stavu je odstraní."""
+    old_messages = messages_to_fold(state["messages"])
+    if not old_messages:
+        return {}
+
+    summary_resp = await call_llm(llm, [
+        SystemMessage(content=SUMMARIZE_CONVERSATION_PROMPT),
+        HumanMessage(content=f"Dosavadní shrnutí:\n{state.get('summary') or '(zatím žádné)'}\n\nStarší zprávy:\n{format_transcript(old_messages)}")
+    ])
+    return {
+        "summary": summary_resp.content.strip(),
+        "messages": [RemoveMessage(id=message.id) for message in old_messages]
+    }
+
+def answer_scope(state: State, resume_hash: str) -> str:
+    """Rozsah cache odpovědí - odpověď závisí i na shrnutí a historii, kterou dostal model."""
+    return conversation_scope(resume_hash, state.get("summary"), [message.content for message in state["messages"][:-1]])
+
+async def function_topic_type(state: State):
     """Rozhodne, zda jde o info nebo o schůzku, a zkusí identifikovat všechny parametry."""
     last_message = state["messages"][-1].content
     date_now = state.get("date_now") or datetime.now().strftime("%Y-%m-%d")
     
-    router_resp = llm.invoke([
-        SystemMessage(content=PROMPT_TOPIC_TYPE),
-        HumanMessage(content=last_message)
-    ])
-    task = router_resp.content.strip().lower()
+    # Doslova zopakovaný dotaz (jen přesná shoda, ve stejném kontextu konverzace) zodpovíme
+    # z cache ještě před routerem a extrakcí otázek. Uprostřed domlouvání schůzky rozhoduje vždy router.
+    resume = resume_store.get()
+    cached_answer = None
+    if resume is not None and state.get("topic") != "date":
+        cached_answer = answer_cache.get([last_message], answer_scope(state, resume.content_hash), record_miss=False, exact_only=True)
+    if cached_answer is not None:
+        # Minutí se tady nepočítá - dotaz ještě projde vyhledáním podle otázek
+        record_cache("answer", True)
+        return {"topic": "info", "turn_questions": None, "cached_answer": cached_answer, "date_now": date_now}
+
+    task = (await classify(PROMPT_TOPIC_TYPE, last_message)).strip().lower()
     
     # Základní stav
     res = {
@@ -81,45 +253,27 @@ def function_topic_type(state: State):
         "meeting_duration": state.get("meeting_duration") or 60,
         "meeting_email": state.get("meeting_email"),
         "meeting_phone": state.get("meeting_phone"),
-        "date_now": date_now
+        "date_now": date_now,
+        # Otázky položené právě v tomto tahu (klíč cache odpovědí)
+        "turn_questions": None,
+        "cached_answer": None
     }
 
     if "date" in task:
         res["topic"] = "date"
         
-        # Zkusíme vytáhnout parametry hned
-        prompts = {
-            "meeting_type": CLASSIFY_MEETING_PROMPT,
-            "meeting_date": CLASSIFY_DATE_PROMPT.format(date_now=date_now),
-            "meeting_time": CLASSIFY_TIME_PROMPT,
-            "meeting_duration": CLASSIFY_DURATION_PROMPT,
-            "meeting_email": CLASSIFY_EMAIL_PROMPT,
-            "meeting_phone": CLASSIFY_PHONE_PROMPT
-        }
-        
-        for key, pr in prompts.items():
-            if not res[key] or res[key] == "none":
-                resp = llm.invoke([SystemMessage(content=pr), HumanMessage(content=last_message)])
-                val = resp.content.strip()
-                if val.lower() != "none":
-                    if key == "meeting_duration":
-                        try: res[key] = int(val)
-                        except: pass
-                    else:
-                        res[key] = val
+        # Všechny parametry schůzky vytáhneme jedním voláním
+        await extract_meeting_fields(last_message, date_now, res)
     else:
         # Pokud je topic == "info", zkusíme extrahovat otázky
-        questions_resp = llm.invoke([
-            SystemMessage(content=EXTRACT_QUESTIONS_PROMPT),
-            HumanMessage(content=last_message)
-        ])
-        questions_text = questions_resp.content.strip()
+        questions_text = (await classify(EXTRACT_QUESTIONS_PROMPT, last_message)).strip()
         
         if questions_text.lower() != "none" and questions_text:
             # Rozdělíme na jednotlivé otázky (každá na novém řádku)
             questions = [q.strip() for q in questions_text.split("\n") if q.strip()]
             if questions:
                 res["question"] = questions
+                res["turn_questions"] = questions
         else:
             # Pokud nebyly extrahovány otázky, ponecháme stávající nebo None
             if not res["question"]:
@@ -127,29 +281,68 @@ def function_topic_type(state: State):
         
     return res
 
-def function_give_info(state: State):
+async def function_give_info(state: State):
     """Uzel pro poskytování informací o Davidovi."""
-    resume_content = get_resume()
-    
-    # Sestavení systémové zprávy s životopisem
-    system_msg = SystemMessage(content=SYSTEM_PROMPT.format(resume_content=resume_content))
-    
-    # Příprava zpráv pro LLM (systémová zpráva + historie konverzace)
-    # state["messages"] již obsahuje poslední zprávu uživatele
-    response = llm.invoke([system_msg] + state["messages"])
-    
+    turn_questions = state.get("turn_questions")
+    resume = resume_store.get()
+    scope = answer_scope(state, resume.content_hash if resume else "")
+
+    # Stejné otázky nad stejným životopisem a ve stejném kontextu konverzace zodpovíme z cache bez volání LLM
+    cached_answer = state.get("cached_answer")
+    if cached_answer is None and turn_questions:
+        cached_answer = answer_cache.get(turn_questions, scope)
+        record_cache("answer", cached_answer is not None)
+    if cached_answer is not None:
+        return {
+            "messages": [AIMessage(content=cached_answer)],
+            "question": state.get("question"),
+            "prompt_tokens": 0,
+            "cached": True
+        }
+
+    # Hledáme podle extrahovaných otázek i celé poslední zprávy
+    questions = (state.get("question") or []) + [state["messages"][-1].content]
+    resume_msg = SystemMessage(content=RESUME_CONTEXT_PROMPT.format(resume_content=get_resume(questions)))
+
+    # Příprava zpráv pro LLM: statický systémový prompt + shrnutí + nedávná historie v rámci rozpočtu tokenů,
+    # relevantní části životopisu až před poslední zprávou uživatele
+    prompt, prompt_tokens = build_prompt(SYSTEM_PROMPT_MSG, state["messages"], state.get("summary"), context=resume_msg)
+    response = await call_llm(llm, prompt, PRIORITY_ANSWER)
+
+    if turn_questions and resume is not None:
+        answer_cache.set(turn_questions, scope, response.content)
+        answer_cache.set([state["messages"][-1].content], scope, response.content)
+
     # Vrátíme nový stav s přidanou odpovědí a vymazanými otázkami (protože byly zodpovězeny)
     return {
         "messages": [response],
-        "question": state.get("question")
+        "question": state.get("question"),
+        "prompt_tokens": prompt_tokens,
+        "cached": False
     }
 
-def scheduling_node(state: State):
-    """Uzel pro domlouvání schůzky s kalendářem."""
-    last_message = state["messages"][-1].content
+async def book_meeting(state: State, res: dict, start: tuple, session_id: Optional[str], not_before: tuple) -> dict:
+    """
+    Zapíše potvrzenou schůzku. Už zarezervovaný termín se nezapisuje znovu,
+    při změně data nebo času se nový termín zarezervuje a starý uvolní v jedné transakci.
+    """
+    slot = f"{start[0]} {res['meeting_time']}"
+    if state.get("booking_id") and state.get("booked_slot") == slot:
+        return {"booking_id": state["booking_id"], "booked_slot": slot, "status": "potvrzená"}
+    booking = await asyncio.to_thread(
+        availability.book, start[0], start[1], res["meeting_duration"],
+        res["meeting_type"], res["meeting_email"], res["meeting_phone"], session_id,
+        not_before, state.get("booking_id")
+    )
+    if booking is None:
+        return {"booking_id": state.get("booking_id"), "booked_slot": state.get("booked_slot"), "status": None}
+    return {"booking_id": booking.id, "booked_slot": slot, "status": "potvrzená"}
+
+async def scheduling_node(state: State, config: RunnableConfig):
+    """Uzel pro domlouvání schůzky s kalendářem. Parametry už vytáhl router."""
     date_now = state.get("date_now") or datetime.now().strftime("%Y-%m-%d")
     
-    # Aktuální hodnoty
+    # Aktuální hodnoty (extrahované v node_topic_type)
     res = {
         "meeting_type": state.get("meeting_type"),
         "meeting_date": state.get("meeting_date"),
@@ -159,27 +352,37 @@ def scheduling_node(state: State):
         "meeting_phone": state.get("meeting_phone")
     }
 
-    # Pokus o extrakci chybějících
-    prompts = {
-        "meeting_type": CLASSIFY_MEETING_PROMPT,
-        "meeting_date": CLASSIFY_DATE_PROMPT.format(date_now=date_now),
-        "meeting_time": CLASSIFY_TIME_PROMPT,
-        "meeting_duration": CLASSIFY_DURATION_PROMPT,
-        "meeting_email": CLASSIFY_EMAIL_PROMPT,
-        "meeting_phone": CLASSIFY_PHONE_PROMPT
-    }
+    booking = {"booking_id": state.get("booking_id"), "booked_slot": state.get("booked_slot"), "status": "zatím nerezervováno"}
+    # Dotazy na kalendář běží ve vlákně: čtou SQLite a sdílí zámek s rezervací
+    not_before = earliest_start(date_now)
+    own_booking = state.get("booking_id")
+    start = parse_meeting_start(res["meeting_date"], res["meeting_time"])
+    if start is not None and state.get("booked_slot") != f"{start[0]} {res['meeting_time']}" and not await asyncio.to_thread(
+        availability.is_free, start[0], start[1], res["meeting_duration"], not_before, own_booking
+    ):
+        # Obsazený, v minulosti nebo mimo pracovní dobu - čas zahodíme a nabídneme jiné termíny
+        booking["status"] = f"termín {res['meeting_time']} není volný, nabídni jiný"
+        res["meeting_time"] = None
+    elif start is not None and all(res[field] for field in ("meeting_type", "meeting_email", "meeting_phone")):
+        session_id = config.get("configurable", {}).get("thread_id")
+        booking = await book_meeting(state, res, start, session_id, not_before)
+        if booking["status"] is None:
+            # Mezitím ho obsadil jiný chat
+            booking["status"] = f"termín {res['meeting_time']} právě obsadil někdo jiný, nabídni jiný"
+            res["meeting_time"] = None
 
-    for key, pr in prompts.items():
-        if not res[key] or res[key] == "none":
-            resp = llm.invoke([SystemMessage(content=pr), HumanMessage(content=last_message)])
-            val = resp.content.strip()
-            if val.lower() != "none":
-                if key == "meeting_duration":
-                    try: res[key] = int(val)
-                    except: pass
-                else: res[key] = val
-
-    slots = get_simulated_slots(res["meeting_date"]) if res["meeting_date"] and res["meeting_date"] != "none" else []
+    slots = []
+    if parse_meeting_start(res["meeting_date"], "00:00") is not None:
+        slots = pick_offered_slots(await asyncio.to_thread(
+            availability.free_slots, res["meeting_date"], res["meeting_duration"],
+            not_before=not_before, ignore_booking=own_booking
+        ))
+        if not slots:
+            nearest = await asyncio.to_thread(
+                availability.next_free_slot, res["meeting_date"], res["meeting_duration"],
+                not_before=not_before, ignore_booking=own_booking
+            )
+            slots = [f"v tento den nic volného, nejbližší volný termín je {nearest[0]} v {nearest[1]}"] if nearest else []
     
     system_msg = SystemMessage(content=SCHEDULING_PROMPT.format(
         meeting_type=res["meeting_type"] or "zatím neznámý",
@@ -189,10 +392,12 @@ def scheduling_node(state: State):
         meeting_email=res["meeting_email"] or "zatím neznámý",
         meeting_phone=res["meeting_phone"] or "zatím neznámý",
         available_slots=", ".join(slots) if slots else "budou k dispozici po výběru data",
+        booking_status=booking["status"],
         date_now=date_now
     ))
     
-    response = llm.invoke([system_msg] + state["messages"])
+    prompt, prompt_tokens = build_prompt(system_msg, state["messages"], state.get("summary"))
+    response = await call_llm(llm, prompt, PRIORITY_ANSWER)
     
     return {
         "messages": [response], 
@@ -201,7 +406,11 @@ def scheduling_node(state: State):
         "meeting_time": res["meeting_time"],
         "meeting_duration": res["meeting_duration"],
         "meeting_email": res["meeting_email"],
-        "meeting_phone": res["meeting_phone"]
+        "meeting_phone": res["meeting_phone"],
+        "booking_id": booking["booking_id"],
+        "booked_slot": booking["booked_slot"],
+        "prompt_tokens": prompt_tokens,
+        "cached": False
     }
 
 def route_selection(state: State):
@@ -211,11 +420,14 @@ def route_selection(state: State):
 # Sestavení grafu
 workflow = StateGraph(State)
 
-workflow.add_node("node_topic_type", function_topic_type)
-workflow.add_node("node_give_info", function_give_info)
-workflow.add_node("scheduling", scheduling_node)
+# Každý uzel měří dobu běhu a chyby (metriky + trace log tahu)
+workflow.add_node("node_context", instrument_node("node_context")(context_node))
+workflow.add_node("node_topic_type", instrument_node("node_topic_type")(function_topic_type))
+workflow.add_node("node_give_info", instrument_node("node_give_info")(function_give_info))
+workflow.add_node("scheduling", instrument_node("scheduling")(scheduling_node))
 
-workflow.set_entry_point("node_topic_type")
+workflow.set_entry_point("node_context")
+workflow.add_edge("node_context", "node_topic_type")
 
 workflow.add_conditional_edges(
     "node_topic_type",
@@ -229,70 +441,106 @@ workflow.add_conditional_edges(
 workflow.add_edge("node_give_info", END)
 workflow.add_edge("scheduling", END)
 
-graph = workflow.compile()
+# Do startu aplikace (a pro benchmarky) stačí paměťový checkpointer, lifespan ho nahradí nakonfigurovaným
+graph = workflow.compile(checkpointer=InMemorySaver())
 
 # API Modely
 class ChatRequest(BaseModel):
     message: str
-    history: List[dict] = []
-    topic: Optional[str] = None
-    question: Optional[List[str]] = None
-    meeting_type: Optional[str] = None
-    meeting_date: Optional[str] = None
-    meeting_time: Optional[str] = None
-    meeting_duration: int = 60
-    meeting_email: Optional[str] = None
-    meeting_phone: Optional[str] = None
+    session_id: Optional[str] = None
     date_now: Optional[str] = None
 
+# Uzly, jejichž výstup LLM je odpovědí pro uživatele (ostatní volání jsou interní)
+ANSWER_NODES = {"node_give_info", "scheduling"}
+STATE_FIELDS = ["topic", "question", "meeting_type", "meeting_date", "meeting_time", "meeting_duration", "meeting_email", "meeting_phone", "date_now", "booking_id", "prompt_tokens", "cached"]
+
+def build_turn_input(request: ChatRequest) -> dict:
+    # Historie a údaje o schůzce jsou v checkpointu, přidáváme jen novou zprávu
+    return {
+        "messages": [HumanMessage(content=request.message)],
+        "date_now": request.date_now or datetime.now().strftime("%Y-%m-%d")
+    }
+
+async def open_session(request: ChatRequest) -> str:
+    session_id = request.session_id or session_store.new_session_id()
+    await session_store.touch(session_id)
+    return session_id
+
+def build_response(result: dict, session_id: str, turn_id: str) -> dict:
+    # Zaručíme, že všechny klíče jsou v odpovědi, i ty s hodnotou None
+    response = {"response": result.get("messages")[-1].content, "session_id": session_id, "turn_id": turn_id}
+    response.update({key: result.get(key) for key in STATE_FIELDS})
+    return response
+
 @app.post("/chat")
 async def chat(request: ChatRequest):
     try:
-        # Převod historie na objekty zpráv
-        messages = []
-        for msg in request.history:
-            if msg["role"] == "user":
-                messages.append(HumanMessage(content=msg["content"]))
-            else:
-                messages.append(AIMessage(content=msg["content"]))
-        
-        messages.append(HumanMessage(content=request.message))
-        
-        # Spuštění grafu s aktuálním stavem
-        now = request.date_now or datetime.now().strftime("%Y-%m-%d")
-        initial_state = {
-            "messages": messages,
-            "topic": request.topic,
-            "question": request.question,
-            "meeting_type": request.meeting_type,
-            "meeting_date": request.meeting_date,
-            "meeting_time": request.meeting_time,
-            "meeting_duration": request.meeting_duration,
-            "meeting_email": request.meeting_email,
-            "meeting_phone": request.meeting_phone,
-            "date_now": now
-        }
-        
-        result = graph.invoke(initial_state)
-        ai_message = result.get("messages")[-1]
-        
-        # Zaručíme, že všechny klíče jsou v odpovědi, i ty s hodnotou None
-        return {
-            "response": ai_message.content,
-            "topic": result.get("topic"),
-            "question": result.get("question"),
-            "meeting_type": result.get("meeting_type"),
-            "meeting_date": result.get("meeting_date"),
-            "meeting_time": result.get("meeting_time"),
-            "meeting_duration": result.get("meeting_duration"),
-            "meeting_email": result.get("meeting_email"),
-            "meeting_phone": result.get("meeting_phone"),
-            "date_now": result.get("date_now")
-        }
+        session_id = await open_session(request)
+        with trace_turn(session_id, "chat") as trace:
+            result = await graph.ainvoke(build_turn_input(request), session_store.config(session_id))
+        return build_response(result, session_id, trace.turn_id)
+    except LLMOverloadedError as e:
+        # Shazování zátěže - srozumitelná zpráva místo dlouhého čekání
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(e.retry_after))})
     except Exception as e:
         print(f"Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def encode_event(event: dict) -> bytes:
+    return (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+
+async def stream_chat_events(turn_input: dict, session_id: str):
+    """
+    NDJSON proud: {"event": "token", "content": ...} pro každý token odpovědi
+    a na konci {"event": "state", ...} s odpovědí a aktualizovaným stavem.
+    """
+    result = None
+    try:
+        with trace_turn(session_id, "chat_stream") as trace:
+            async for event in graph.astream_events(turn_input, session_store.config(session_id), version="v2"):
+                kind = event["event"]
+                if kind == "on_chat_model_stream" and event["metadata"].get("langgraph_node") in ANSWER_NODES:
+                    content = event["data"]["chunk"].content
+                    if content:
+                        yield encode_event({"event": "token", "content": content})
+                elif kind == "on_chain_end" and not event["parent_ids"]:
+                    result = event["data"]["output"]
+        yield encode_event({"event": "state", **build_response(result, session_id, trace.turn_id)})
+    except LLMOverloadedError as e:
+        yield encode_event({"event": "error", "detail": str(e), "overloaded": True})
+    except Exception as e:
+        print(f"Error: {e}")
+        yield encode_event({"event": "error", "detail": str(e)})
+
+@app.get("/chat/stats")
+async def chat_stats():
+    return {
+        "answer_cache": answer_cache.stats(),
+        "classifier_memo": await memo_cache.stats() if memo_cache is not None else None,
+        "llm_scheduler": llm_scheduler.stats()
+    }
+
+@app.get("/metrics")
+async def metrics():
+    payload = metrics_payload()
+    if payload is None:
+        raise HTTPException(status_code=503, detail="Metriky vyžadují balíček prometheus_client")
+    body, content_type = payload
+    return Response(content=body, media_type=content_type)
+
+@app.delete("/chat/{session_id}")
+async def delete_session(session_id: str):
+    await session_store.delete(session_id)
+    return {"deleted": session_id}
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    return StreamingResponse(
+        stream_chat_events(build_turn_input(request), await open_session(request)),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Statické soubory pro frontend
 static_dir = os.path.join(BASE_DIR, "static")
 if os.path.exists(static_dir):
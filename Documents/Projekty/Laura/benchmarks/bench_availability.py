@@ -0,0 +1,99 @@
+"""
+Dotazy na volné termíny nad desítkami tisíc rezervací: index (bisect) proti
+naivnímu průchodu všemi rezervacemi.
+
+Spuštění (ze složky Laura):
+    python benchmarks/bench_availability.py --bookings 50000 --queries 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduling import AvailabilityEngine, parse_minutes
+
+
+def seed_bookings(engine: AvailabilityEngine, count: int, rng: random.Random) -> list:
+    """Hromadné vložení přímo do SQLite (book() po jedné by trvalo zbytečně dlouho)."""
+    rows, day, start = [], date(2026, 1, 5), engine.work_start
+    while len(rows) < count:
+        if day.weekday() in engine.work_days:
+            duration = rng.choice((30, 45, 60, 90))
+            if start + duration > engine.work_end:
+                day, start = day + timedelta(days=1), engine.work_start
+                continue
+            rows.append((day.isoformat(), start, start + duration, 0.0))
+            start += duration + engine.buffer + rng.choice((0, 15, 30, 60))
+        else:
+            day, start = day + timedelta(days=1), engine.work_start
+    with engine._lock:
+        engine._connection().executemany("INSERT INTO bookings (day, start_min, end_min, created_at) VALUES (?, ?, ?, ?)", rows)
+    return rows
+
+
+def naive_free_slots(rows: list, engine: AvailabilityEngine, day: str, duration: int) -> list:
+    busy = [(start, end) for booked_day, start, end, _ in rows if booked_day == day]
+    slots = []
+    for start in range(engine.work_start, engine.work_end - duration + 1, engine.step):
+        if all(start + duration + engine.buffer <= s or start >= e + engine.buffer for s, e in busy):
+            slots.append(start)
+    return slots
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = AvailabilityEngine(os.path.join(tmp, "bookings.sqlite3"))
+        rows = seed_bookings(engine, args.bookings, rng)
+        days = sorted({row[0] for row in rows})
+        queries = [(rng.choice(days), rng.choice((30, 60, 90))) for _ in range(args.queries)]
+
+        # Vlastní zápisy nemění data_version, index načteme ručně
+        started = time.perf_counter()
+        with engine._lock:
+            engine._reload()
+        load_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        for day, duration in queries:
+            engine.free_slots(day, duration)
+        indexed_us = (time.perf_counter() - started) / len(queries) * 1e6
+
+        started = time.perf_counter()
+        for day, duration in queries[:200]:
+            naive_free_slots(rows, engine, day, duration)
+        naive_us = (time.perf_counter() - started) / min(200, len(queries)) * 1e6
+
+        started = time.perf_counter()
+        for day, _ in queries[:200]:
+            engine.next_free_slot(day, 90, until_day=(date.fromisoformat(day) + timedelta(days=6)).isoformat())
+        next_free_us = (time.perf_counter() - started) / min(200, len(queries)) * 1e6
+
+        started = time.perf_counter()
+        booked = 0
+        for day, _ in queries[:200]:
+            free = engine.free_slots(day, 30, limit=1)
+            booked += bool(free) and engine.book(day, parse_minutes(free[0]), 30) is not None
+        book_us = (time.perf_counter() - started) / min(200, len(queries)) * 1e6
+        engine.close()
+
+    print(f"rezervací: {len(rows)} ve {len(days)} dnech, načtení indexu {load_ms:.1f} ms")
+    print(f"free_slots s indexem:      {indexed_us:10.1f} µs/dotaz")
+    print(f"free_slots naivně:         {naive_us:10.1f} µs/dotaz")
+    print(f"next_free_slot (týden):    {next_free_us:10.1f} µs/dotaz")
+    print(f"book (transakce, {booked} OK): {book_us:10.1f} µs/rezervace")
+
+
+if __name__ == "__main__":
+    main()
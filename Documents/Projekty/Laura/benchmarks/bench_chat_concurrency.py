@@ -0,0 +1,117 @@
+"""
+Zátěžový test /chat proti lokálnímu falešnému OpenAI-kompatibilnímu serveru.
+
+Porovná graph.ainvoke se stropem 1 souběžného volání LLM (odpovídá původnímu
+blokujícímu graph.invoke, kdy worker zpracoval vždy jen jedno volání) se stropem
+LAURA_LLM_MAX_CONCURRENCY při rostoucím počtu souběžných konverzací v jednom workeru.
+
+Spuštění (ze složky Laura):
+    python benchmarks/bench_chat_concurrency.py --latency 0.2 --levels 1 10 50
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from limiter import LLMScheduler
+from llm_backends import Distribution, FakeOpenAI
+
+
+async def stream_content(lines: list, per_token: float):
+    for line in lines:
+        yield line
+        await asyncio.sleep(per_token)
+
+
+def build_fake_openai(latency: float) -> FastAPI:
+    """HTTP server se stejnými odpověďmi jako LAURA_LLM_MODE=fake (llm_backends.FakeOpenAI)."""
+    fake = FastAPI()
+    responder = FakeOpenAI(Distribution("const", latency), Distribution("const", 100.0))
+
+    @fake.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        _, content, usage = responder.respond(body)
+        first_token, per_token = responder.sample_delays()
+        await asyncio.sleep(first_token)
+
+        if body.get("stream"):
+            return StreamingResponse(stream_content(responder.stream_chunks(body, content, usage), per_token), media_type="text/event-stream")
+        return responder.completion(body, content, usage)
+
+    return fake
+
+
+def start_fake_server(latency: float) -> tuple[uvicorn.Server, str]:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(build_fake_openai(latency), port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}/v1"
+
+
+def make_turn(api, i: int) -> dict:
+    message = f"Chci schůzku číslo {i}" if i % 2 else f"Kde David pracoval? ({i})"
+    return {"messages": [api.HumanMessage(content=message)], "date_now": "2026-10-18"}
+
+
+async def run_level(api, conversations: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        api.graph.ainvoke(make_turn(api, i), api.session_store.config(f"bench-{conversations}-{i}"))
+        for i in range(conversations)
+    ))
+    return time.perf_counter() - start
+
+
+async def run(api, levels: list[int], include_serial: bool) -> None:
+    configured = api.llm_scheduler
+    print(f"{'konverzací':>10} | {'strop LLM':>9} | {'čas [s]':>8} | {'konverzací/s':>12}")
+    for level in levels:
+        caps = [1, configured.max_concurrency] if include_serial else [configured.max_concurrency]
+        for cap in caps:
+            api.llm_scheduler = LLMScheduler(max_concurrency=1) if cap == 1 else configured
+            elapsed = await run_level(api, level)
+            print(f"{level:>10} | {cap:>9} | {elapsed:8.2f} | {level / elapsed:12.1f}")
+    api.llm_scheduler = configured
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulovaná latence jednoho volání LLM v sekundách")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--max-concurrency", type=int, default=None, help="Přepíše LAURA_LLM_MAX_CONCURRENCY")
+    parser.add_argument("--skip-serial", action="store_true", help="Neměřit sériové zpracování (strop 1)")
+    args = parser.parse_args()
+
+    server, base_url = start_fake_server(args.latency)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    if args.max_concurrency:
+        os.environ["LAURA_LLM_MAX_CONCURRENCY"] = str(args.max_concurrency)
+
+    import api
+
+    try:
+        print(f"Latence LLM: {args.latency * 1000:.0f} ms, strop souběžných volání: {api.llm_scheduler.max_concurrency}")
+        asyncio.run(run(api, args.levels, not args.skip_serial))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Ověření stropu kontextu: dlouhá konverzace proti falešnému OpenAI serveru
+a počet tokenů promptu finální odpovědi v každém tahu.
+
+Spuštění (ze složky Laura):
+    python benchmarks/bench_context_window.py --turns 30
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_chat_concurrency import start_fake_server
+
+
+async def run(api, turns: int) -> None:
+    config = api.session_store.config("bench-context")
+    print(f"{'tah':>4} | {'zpráv ve stavu':>14} | {'tokenů promptu':>14} | shrnutí")
+    for turn in range(1, turns + 1):
+        message = f"Kde David pracoval v roce {2000 + turn} a co tam dělal? " + "Doplňující kontext. " * 10
+        result = await api.graph.ainvoke({"messages": [api.HumanMessage(content=message)], "date_now": "2026-10-18"}, config)
+        print(f"{turn:>4} | {len(result['messages']):>14} | {result['prompt_tokens']:>14} | {'ano' if result.get('summary') else 'ne'}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=30)
+    args = parser.parse_args()
+
+    server, base_url = start_fake_server(0.0)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+    import api
+
+    try:
+        asyncio.run(run(api, args.turns))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Správa kontextového okna: počítání tokenů, ořez historie na rozpočet a výběr
+starých zpráv k zabalení do průběžného shrnutí.
+"""
+import math
+import os
+from functools import lru_cache
+from typing import List, Optional
+
+from langchain_core.messages import BaseMessage, SystemMessage
+
+# Kolik posledních výměn (zpráva uživatele + odpověď) posíláme modelu doslova
+CONTEXT_KEEP_TURNS = int(os.getenv("LAURA_CONTEXT_KEEP_TURNS", "4"))
+# Shrnutí se obnovuje po dávkách, aby se LLM nevolalo při každém tahu
+CONTEXT_SUMMARY_BATCH_TURNS = int(os.getenv("LAURA_CONTEXT_SUMMARY_BATCH_TURNS", "2"))
+# Strop tokenů promptu finální odpovědi (systémová zpráva + shrnutí + historie)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("LAURA_CONTEXT_TOKEN_BUDGET", "6000"))
+
+# Režie formátu chatu na jednu zprávu (role, oddělovače)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # tiktoken chybí nebo nemá stažený slovník (offline) - použijeme odhad
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text))
+
+
+def count_message_tokens(messages: List[BaseMessage]) -> int:
+    return sum(count_tokens(str(message.content)) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def messages_to_fold(messages: List[BaseMessage], keep_turns: int = CONTEXT_KEEP_TURNS, batch_turns: int = CONTEXT_SUMMARY_BATCH_TURNS) -> List[BaseMessage]:
+    """Zprávy, které už mají jít do shrnutí (prázdný seznam, dokud okno nepřeteče o celou dávku)."""
+    # Ponecháme posledních `keep_turns` výměn a k tomu novou otázku uživatele, na kterou se teprve odpovídá
+    keep = keep_turns * 2 + (1 if messages and messages[-1].type == "human" else 0)
+    if len(messages) <= keep + batch_turns * 2:
+        return []
+    cut = len(messages) - keep
+    # Řez vždy na hranici výměny - okno nesmí začínat odpovědí, jejíž otázka skončila ve shrnutí
+    while cut > 0 and messages[cut].type != "human":
+        cut -= 1
+    return messages[:cut]
+
+
+def format_transcript(messages: List[BaseMessage]) -> str:
+    lines = []
+    for message in messages:
+        role = "Uživatel" if message.type == "human" else "Laura"
+        lines.append(f"{role}: {message.content}")
+    return "\n".join(lines)
+
+
+def build_prompt(
+    system_msg: SystemMessage,
+    messages: List[BaseMessage],
+    summary: Optional[str] = None,
+    budget: int = CONTEXT_TOKEN_BUDGET,
+    context: Optional[SystemMessage] = None
+) -> tuple[List[BaseMessage], int]:
+    """
+    Složí prompt pro finální odpověď a vrátí ho spolu s počtem tokenů.
+
+    Statická systémová zpráva je vždy první (prefix pro prompt caching na straně
+    poskytovatele), proměnlivý `context` jde až těsně před poslední zprávu.
+    Pokud se prompt nevejde do rozpočtu, vynechávají se nejstarší výměny historie.
+    """
+    prefix = [system_msg]
+    if summary:
+        prefix.append(SystemMessage(content=f"Shrnutí dosavadní konverzace:\n{summary}"))
+
+    history = list(messages[:-1])
+    tail = ([context] if context else []) + list(messages[-1:])
+    tokens = count_message_tokens(prefix) + count_message_tokens(history) + count_message_tokens(tail)
+    while history and tokens > budget:
+        # Vynechávají se celé výměny - s otázkou odejde i odpověď, okno nezačne odpovědí Laury
+        drop = 1
+        while drop < len(history) and history[drop].type != "human":
+            drop += 1
+        tokens -= count_message_tokens(history[:drop])
+        del history[:drop]
+    return prefix + history + tail, tokens
@@ -0,0 +1,261 @@
+"""
+Rychlá lokální extrakce údajů o schůzce (bez volání LLM).
+
+Každý extraktor vrací hodnotu s mírou jistoty. Hodnoty s jistotou pod prahem
+FAST_PATH_CONFIDENCE se ignorují a jejich doplnění se nechá na LLM.
+"""
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+FAST_PATH_CONFIDENCE = float(os.getenv("LAURA_FAST_PATH_CONFIDENCE", "0.8"))
+
+
+@dataclass
+class Extraction:
+    value: object
+    confidence: float
+    span: tuple[int, int]
+
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)*\.[a-z]{2,}", re.IGNORECASE)
+PHONE_RE = re.compile(r"(?<![\w.:])(\+?\d{3}[ ]?)?(\d{3})[ -]?(\d{3})[ -]?(\d{3})(?![\w.:])")
+ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+NUMERIC_DATE_RE = re.compile(r"\b(\d{1,2})\.\s?(\d{1,2})\.(?:\s?(\d{4}))?")
+CLOCK_TIME_RE = re.compile(r"\b([01]?\d|2[0-3]):([0-5]\d)\b")
+DOT_TIME_RE = re.compile(r"\b(?:v|ve|od|na|kolem)\s+([01]?\d|2[0-3])\.([0-5]\d)\b(?!\.)", re.IGNORECASE)
+HOUR_TIME_RE = re.compile(r"\b(?:v|ve|od|na|kolem)\s+([01]?\d|2[0-3])\s*(?:hodin|hod\.?|h)\b", re.IGNORECASE)
+BARE_HOUR_RE = re.compile(r"\b(?:v|ve|od)\s+([01]?\d|2[0-3])\b(?![.:\d])", re.IGNORECASE)
+CLOCK_PREFIX_RE = re.compile(r"\b(?:v|ve|od|kolem)\s*$")
+# "za hodinu", "za 20 minut" - kdy, ne jak dlouho
+IN_TIME_PREFIX_RE = re.compile(r"\bza\s*$")
+
+# Vstup se před hledáním výrazů níže převádí na malá písmena bez diakritiky
+UNIT_WORDS = {
+    "jeden": 1, "jednu": 1, "jedna": 1, "dva": 2, "dve": 2, "tri": 3, "ctyri": 4, "pet": 5,
+    "sest": 6, "sedm": 7, "osm": 8, "devet": 9
+}
+TEEN_WORDS = {
+    "deset": 10, "jedenact": 11, "dvanact": 12, "trinact": 13, "ctrnact": 14, "patnact": 15,
+    "sestnact": 16, "sedmnact": 17, "osmnact": 18, "devatenact": 19
+}
+TENS_WORDS = {
+    "dvacet": 20, "tricet": 30, "ctyricet": 40, "padesat": 50, "sedesat": 60, "sedmdesat": 70,
+    "osmdesat": 80, "devadesat": 90
+}
+NUMBER_WORDS = {**UNIT_WORDS, **TEEN_WORDS, **TENS_WORDS}
+_TENS = "|".join(TENS_WORDS)
+_UNITS = "|".join(UNIT_WORDS)
+# Desítky s volitelnými jednotkami: "dvacet pět", "dvacet a pět", "dvacetpět"
+TENS_UNITS_RE = re.compile(rf"({_TENS})(?:\s*(?:a\s+)?({_UNITS}))?")
+# \b na začátku, aby se z "dvacet pět" nevzalo jen "pět"
+_NUMBER = rf"\b(\d+|(?:{_TENS})(?:\s*(?:a\s+)?(?:{_UNITS}))?|{'|'.join(TEEN_WORDS)}|{_UNITS})"
+
+DURATION_PATTERNS = [
+    (re.compile(r"\b(?:hodinu|hodina) a pul\b"), lambda m: 90),
+    (re.compile(r"\bpul hodiny\b|\bpulhodin\w*"), lambda m: 30),
+    (re.compile(r"\b(?:na|zhruba|asi|cca)?\s*hodinu\b"), lambda m: 60),
+    (re.compile(r"\bctvrt hodiny\b|\bctvrthodin\w*"), lambda m: 15),
+    (re.compile(_NUMBER + r"\s*(?:minut\w*|min\b)"), lambda m: _to_number(m.group(1))),
+    (re.compile(_NUMBER + r"\s*(?:hodin\w*|hod\b)"), lambda m: _to_number(m.group(1)) * 60),
+]
+
+WEEKDAYS = {
+    "pondeli": 0, "utery": 1, "streda": 2, "stredu": 2, "ctvrtek": 3,
+    "patek": 4, "sobota": 5, "sobotu": 5, "nedele": 6, "nedeli": 6
+}
+WEEKDAY_RE = re.compile(r"\b(?:(pristi|tento|tuto|tenhle|tuhle)\s+|v[e]?\s+)?(" + "|".join(WEEKDAYS) + r")\b")
+
+MONTHS = {
+    "ledna": 1, "unora": 2, "brezna": 3, "dubna": 4, "kvetna": 5, "cervna": 6,
+    "cervence": 7, "srpna": 8, "zari": 9, "rijna": 10, "listopadu": 11, "prosince": 12
+}
+MONTH_DATE_RE = re.compile(r"\b(\d{1,2})\.\s*(" + "|".join(MONTHS) + r")(?:\s+(\d{4}))?\b")
+
+RELATIVE_DAYS = [
+    (re.compile(r"\bpozitri\b"), 2),
+    (re.compile(r"\bzitra\b"), 1),
+    (re.compile(r"\bdnes\b"), 0),
+]
+IN_DAYS_RE = re.compile(r"\bza\s+" + _NUMBER + r"\s+(den|dny|dni|tyden|tydny|tydnu)\b")
+IN_WEEK_RE = re.compile(r"\bza\s+tyden\b")
+NEXT_WEEK_RE = re.compile(r"\bpristi\s+tyden\b")
+
+MEETING_TYPE_KEYWORDS = [
+    ("urgent", re.compile(r"\b(?:urgent\w*|nalehav\w*|spech\w*|co nejdriv\w*|akutn\w*)")),
+    ("technical_consultation", re.compile(r"\b(?:technick\w*|architektur\w*|kod\w*|implementac\w*)")),
+    ("business_consultation", re.compile(r"\b(?:obchodn\w*|business\w*|spolupra\w*|nabid\w*|zakazk\w*)")),
+    ("initial", re.compile(r"\b(?:uvodn\w*|prvn\w* schuz\w*|seznamen\w*|poznat\w*)")),
+]
+
+# Slova, která samy o sobě nenesou žádný údaj o schůzce
+FILLER_WORDS = {
+    "a", "i", "v", "ve", "na", "do", "od", "se", "si", "mi", "me", "to", "ten", "ta", "je", "jsem", "by",
+    "bych", "byl", "bylo", "bude", "mam", "muj", "moje", "moji", "email", "mail", "e", "telefon", "tel",
+    "cislo", "kontakt", "schuzka", "schuzku", "schuzky", "termin", "cas", "chci", "chtel", "chtela",
+    "rad", "rada", "domluvit", "sejit", "setkat", "prosim", "diky", "dekuji", "ok", "dobre", "hodi",
+    "slo", "jde", "muze", "mohla", "mohl", "byt", "tedy", "tak", "ano", "jo", "pak", "kdyz", "jestli",
+    "treba", "idealne", "nejlepe", "zhruba", "asi", "cca", "kolem", "hodin", "hodiny", "minut", "s",
+    "davidem", "davida", "david", "pro", "mne", "nas", "jsou", "dne", "dnu", "dni", "muzeme", "muzete",
+    "mohli", "sejdeme", "potkat", "potkame", "vyhovuje", "vyhovovalo", "hodilo", "navrhuji", "co", "treba"
+}
+WORD_RE = re.compile(r"[a-z]+")
+
+
+def _to_number(token: str) -> int:
+    if token.isdigit():
+        return int(token)
+    if match := TENS_UNITS_RE.fullmatch(token):
+        return TENS_WORDS[match.group(1)] + (UNIT_WORDS[match.group(2)] if match.group(2) else 0)
+    return NUMBER_WORDS[token]
+
+
+def normalize(text: str) -> str:
+    """Malá písmena bez diakritiky. Délka řetězce zůstává stejná, takže pozice shod sedí i na originál."""
+    decomposed = unicodedata.normalize("NFD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _parse_today(date_now: str) -> date:
+    try:
+        return datetime.strptime(date_now, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return date.today()
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _upcoming(today: date, month: int, day: int) -> Optional[date]:
+    """Datum bez roku: letos, případně příští rok, pokud už letos proběhlo."""
+    candidate = _safe_date(today.year, month, day)
+    if candidate and candidate < today:
+        candidate = _safe_date(today.year + 1, month, day)
+    return candidate
+
+
+def extract_email(text: str) -> Optional[Extraction]:
+    match = EMAIL_RE.search(text)
+    if not match:
+        return None
+    return Extraction(match.group(0).lower(), 0.99, match.span())
+
+
+def extract_phone(text: str) -> Optional[Extraction]:
+    match = PHONE_RE.search(text)
+    if not match:
+        return None
+    digits = re.sub(r"\D", "", match.group(0))
+    return Extraction(digits, 0.95 if len(digits) in (9, 12) else 0.6, match.span())
+
+
+def extract_time(text: str) -> Optional[Extraction]:
+    if match := CLOCK_TIME_RE.search(text):
+        return Extraction(f"{int(match.group(1)):02d}:{match.group(2)}", 0.95, match.span())
+    if match := DOT_TIME_RE.search(text):
+        return Extraction(f"{int(match.group(1)):02d}:{match.group(2)}", 0.9, match.span())
+    if match := HOUR_TIME_RE.search(text):
+        return Extraction(f"{int(match.group(1)):02d}:00", 0.9, match.span())
+    if match := re.search(r"\bv(?:e)?\s+poledne\b", text):
+        return Extraction("12:00", 0.9, match.span())
+    if match := BARE_HOUR_RE.search(text):
+        # "ve 2" může být odpoledne i ráno - necháme rozhodnout LLM
+        hour = int(match.group(1))
+        return Extraction(f"{hour:02d}:00", 0.85 if hour >= 8 else 0.5, match.span())
+    return None
+
+
+def extract_duration(text: str) -> Optional[Extraction]:
+    for pattern, to_minutes in DURATION_PATTERNS:
+        for match in pattern.finditer(text):
+            # "ve 14 hodin" je čas, ne délka, stejně jako "za hodinu"
+            if CLOCK_PREFIX_RE.search(text, 0, match.start()) or IN_TIME_PREFIX_RE.search(text, 0, match.start()):
+                continue
+            minutes = to_minutes(match)
+            if 0 < minutes <= 8 * 60:
+                return Extraction(minutes, 0.9, match.span())
+    return None
+
+
+def extract_date(text: str, today: date) -> Optional[Extraction]:
+    if match := ISO_DATE_RE.search(text):
+        parsed = _safe_date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        if parsed:
+            return Extraction(parsed.isoformat(), 0.99, match.span())
+    if match := MONTH_DATE_RE.search(text):
+        day, month = int(match.group(1)), MONTHS[match.group(2)]
+        parsed = _safe_date(int(match.group(3)), month, day) if match.group(3) else _upcoming(today, month, day)
+        if parsed:
+            return Extraction(parsed.isoformat(), 0.95, match.span())
+    if match := NUMERIC_DATE_RE.search(text):
+        day, month = int(match.group(1)), int(match.group(2))
+        parsed = _safe_date(int(match.group(3)), month, day) if match.group(3) else _upcoming(today, month, day)
+        if parsed:
+            return Extraction(parsed.isoformat(), 0.9, match.span())
+    for pattern, offset in RELATIVE_DAYS:
+        if match := pattern.search(text):
+            return Extraction((today + timedelta(days=offset)).isoformat(), 0.95, match.span())
+    if match := IN_DAYS_RE.search(text):
+        amount = _to_number(match.group(1))
+        days = amount * 7 if match.group(2).startswith("tyd") else amount
+        return Extraction((today + timedelta(days=days)).isoformat(), 0.9, match.span())
+    if match := IN_WEEK_RE.search(text):
+        return Extraction((today + timedelta(days=7)).isoformat(), 0.9, match.span())
+    if match := WEEKDAY_RE.search(text):
+        weekday = WEEKDAYS[match.group(2)]
+        days_ahead = (weekday - today.weekday()) % 7 or 7
+        # "příští pátek" vyslovené v pondělí může být i pátek za týden - necháme rozhodnout LLM
+        confidence = 0.6 if match.group(1) == "pristi" and weekday > today.weekday() else 0.9
+        return Extraction((today + timedelta(days=days_ahead)).isoformat(), confidence, match.span())
+    if match := NEXT_WEEK_RE.search(text):
+        # Bez konkrétního dne jen odhad (pondělí příštího týdne)
+        return Extraction((today + timedelta(days=7 - today.weekday())).isoformat(), 0.5, match.span())
+    return None
+
+
+def extract_meeting_type(text: str) -> Optional[Extraction]:
+    for meeting_type, pattern in MEETING_TYPE_KEYWORDS:
+        if match := pattern.search(text):
+            return Extraction(meeting_type, 0.8, match.span())
+    return None
+
+
+def extract_all(message: str, date_now: str) -> dict[str, Extraction]:
+    """Spustí všechny extraktory a vrátí nalezené hodnoty (včetně nejistých)."""
+    text = normalize(message)
+    found = {
+        # E-mail a telefon hledáme v původním textu, ostatní v normalizovaném
+        "meeting_email": extract_email(message),
+        "meeting_phone": extract_phone(message),
+        "meeting_date": extract_date(text, _parse_today(date_now)),
+        "meeting_time": extract_time(text),
+        "meeting_duration": extract_duration(text),
+        "meeting_type": extract_meeting_type(text),
+    }
+    return {key: value for key, value in found.items() if value is not None}
+
+
+def fast_extract(message: str, date_now: str, threshold: float = FAST_PATH_CONFIDENCE) -> tuple[dict, bool]:
+    """
+    Vrátí (hodnoty nad prahem jistoty, needs_llm). needs_llm je False, pokud
+    po odečtení rozpoznaných částí ve zprávě nezůstalo nic, co by mohlo nést
+    další údaj - volání LLM by pak nic nepřidalo.
+    """
+    extractions = extract_all(message, date_now)
+    confident = {key: e.value for key, e in extractions.items() if e.confidence >= threshold}
+    if len(confident) < len(extractions):
+        return confident, True
+
+    residual = list(normalize(message))
+    for extraction in extractions.values():
+        start, end = extraction.span
+        residual[start:end] = " " * (end - start)
+    leftover = [word for word in WORD_RE.findall("".join(residual)) if word not in FILLER_WORDS]
+    return confident, bool(leftover)
@@ -0,0 +1,280 @@
+"""
+Plánovač volání LLM sdílený všemi konverzacemi ve workeru.
+
+- strop souběžných volání (LAURA_LLM_MAX_CONCURRENCY)
+- token bucket na požadavky a tokeny za minutu (limity poskytovatele)
+- prioritní fronta: odpovědi uživateli mají přednost před interními klasifikacemi
+- opakování s náhodným (jitter) exponenciálním čekáním po chybě 429, po timeoutu,
+  výpadku spojení a chybě 5xx (klient OpenAI má vlastní opakování vypnuté)
+- shazování zátěže: kdo čeká ve frontě déle než LAURA_LLM_QUEUE_DEADLINE, dostane LLMOverloadedError
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+import httpx
+import openai
+
+from telemetry import record_llm_queue
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LAURA_LLM_MAX_CONCURRENCY", "20"))
+# Limity poskytovatele na jeden worker, 0 = bez limitu
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LAURA_LLM_RPM", "0"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LAURA_LLM_TPM", "0"))
+# Odhad délky odpovědi pro rezervaci tokenů předem (po volání se srovná se skutečností)
+LLM_EXPECTED_COMPLETION_TOKENS = int(os.getenv("LAURA_LLM_EXPECTED_COMPLETION_TOKENS", "300"))
+LLM_QUEUE_DEADLINE = float(os.getenv("LAURA_LLM_QUEUE_DEADLINE", "20"))
+LLM_MAX_RETRIES = int(os.getenv("LAURA_LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LAURA_LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LAURA_LLM_BACKOFF_MAX", "20"))
+
+PRIORITY_ANSWER = 0
+PRIORITY_BACKGROUND = 1
+PRIORITY_NAMES = {PRIORITY_ANSWER: "answer", PRIORITY_BACKGROUND: "background"}
+
+OVERLOADED_MESSAGE = "Laura má teď hodně rozhovorů najednou. Zkuste to prosím za chvíli znovu."
+
+
+class LLMOverloadedError(Exception):
+    def __init__(self, message: str = OVERLOADED_MESSAGE, retry_after: float = 5.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Kapacita `rate_per_minute`, plynule doplňovaná. Dluh (záporný stav) vzniká, když skutečnost přesáhne odhad."""
+
+    def __init__(self, rate_per_minute: float, clock=time.monotonic):
+        self.capacity = rate_per_minute
+        self.rate = rate_per_minute / 60.0
+        self._clock = clock
+        self.tokens = rate_per_minute
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        # Větší požadavek než kapacita projde s plným kbelíkem, jinak by nikdy neprošel
+        amount = min(amount, self.capacity)
+        self._refill()
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    tokens: float = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    return getattr(error, "status_code", None) == 429
+
+
+def is_transient(error: BaseException) -> bool:
+    """Timeout, výpadek spojení nebo chyba serveru (5xx, 408, 409) - stejné případy, které by opakoval klient OpenAI."""
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status >= 500 or status in (408, 409)
+    return isinstance(error, (openai.APIConnectionError, httpx.TransportError, asyncio.TimeoutError))
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        max_concurrency: int = 20,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        queue_deadline: float = 20.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+        clock=time.monotonic,
+        rng: Optional[random.Random] = None
+    ):
+        self.max_concurrency = max_concurrency
+        self.queue_deadline = queue_deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._requests = TokenBucket(requests_per_minute, clock) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute, clock) if tokens_per_minute > 0 else None
+        self._queue: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Po 429 se na chvíli zastaví všechna volání, ne jen to jedno
+        self._paused_until = 0.0
+        self.in_flight = 0
+        self.shed = 0
+        self.rate_limited = 0
+        self.transient_errors = 0
+        self.retries = 0
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable],
+        priority: int = PRIORITY_BACKGROUND,
+        estimated_tokens: float = 0,
+        used_tokens: Callable[[object], Optional[float]] = lambda result: None
+    ):
+        """
+        Provede `call` ve frontě podle priority; 429 a přechodné chyby opakuje s jitterem,
+        při přetížení nebo 429 i po posledním pokusu vyhodí LLMOverloadedError.
+        """
+        attempt = 0
+        backoff = 0.0
+        while True:
+            if backoff:
+                # Přechodná chyba se týká jen tohoto volání - čeká se mimo slot a ostatní nebrzdí
+                await asyncio.sleep(backoff)
+                backoff = 0.0
+            await self.acquire(priority, estimated_tokens)
+            actual = estimated_tokens
+            try:
+                result = await call()
+                actual = used_tokens(result) or estimated_tokens
+                return result
+            except Exception as e:
+                rate_limited = is_rate_limited(e)
+                if rate_limited and attempt >= self.max_retries:
+                    # Ani po všech pokusech nic - místo textu poskytovatele srozumitelné "zkuste později"
+                    raise LLMOverloadedError(retry_after=max(retry_after_seconds(e) or 5.0, 1.0)) from e
+                if not (rate_limited or is_transient(e)) or attempt >= self.max_retries:
+                    raise
+                self.retries += 1
+                # Plný jitter: náhodně mezi 0 a exponenciálně rostoucím stropem, nejméně retry-after
+                delay = self._rng.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                if rate_limited:
+                    self.rate_limited += 1
+                    delay = max(delay, retry_after_seconds(e) or 0.0)
+                    self._paused_until = max(self._paused_until, self._clock() + delay)
+                else:
+                    self.transient_errors += 1
+                    backoff = delay
+                attempt += 1
+            finally:
+                self.release(estimated_tokens, actual)
+
+    async def acquire(self, priority: int, tokens: float = 0) -> None:
+        loop = asyncio.get_running_loop()
+        started = self._clock()
+        waiter = _Waiter(priority, next(self._seq), tokens, loop.create_future())
+        heapq.heappush(self._queue, waiter)
+        self._dispatch()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.queue_deadline)
+        except asyncio.TimeoutError:
+            # Slot přidělený těsně před vypršením ještě použijeme
+            if not waiter.future.done():
+                waiter.future.cancel()
+                self.shed += 1
+                record_llm_queue(PRIORITY_NAMES.get(priority, str(priority)), self._clock() - started, shed=True)
+                self._dispatch()
+                raise LLMOverloadedError()
+        except asyncio.CancelledError:
+            # Klient odešel - přidělený slot vrátíme
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(tokens, 0)
+            waiter.future.cancel()
+            raise
+        record_llm_queue(PRIORITY_NAMES.get(priority, str(priority)), self._clock() - started)
+
+    def release(self, estimated_tokens: float, used_tokens: float) -> None:
+        self.in_flight -= 1
+        if self._tokens is not None and used_tokens != estimated_tokens:
+            self._tokens.adjust(used_tokens - estimated_tokens)
+        self._dispatch()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": sum(not waiter.future.done() for waiter in self._queue),
+            "requests_available": round(self._requests.tokens, 1) if self._requests else None,
+            "tokens_available": round(self._tokens.tokens, 1) if self._tokens else None,
+            "shed": self.shed,
+            "rate_limited": self.rate_limited,
+            "transient_errors": self.transient_errors,
+            "retries": self.retries
+        }
+
+    def _dispatch(self) -> None:
+        # Přísná priorita: čekající hlava fronty blokuje i méně náročné požadavky za sebou
+        while self._queue:
+            head = self._queue[0]
+            if head.future.done():
+                heapq.heappop(self._queue)
+                continue
+            if self.in_flight >= self.max_concurrency:
+                return
+            wait = max(
+                self._paused_until - self._clock(),
+                self._requests.wait_time(1) if self._requests else 0.0,
+                self._tokens.wait_time(head.tokens) if self._tokens else 0.0
+            )
+            if wait > 0:
+                self._schedule(wait)
+                return
+            if self._requests:
+                self._requests.take(1)
+            if self._tokens:
+                self._tokens.take(head.tokens)
+            heapq.heappop(self._queue)
+            self.in_flight += 1
+            head.future.set_result(None)
+
+    def _schedule(self, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        if self._timer is not None and self._timer_loop is loop:
+            if self._timer.when() <= loop.time() + delay:
+                return
+            self._timer.cancel()
+        self._timer = loop.call_later(delay, self._on_timer)
+        self._timer_loop = loop
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+
+def create_llm_scheduler() -> LLMScheduler:
+    return LLMScheduler(
+        LLM_MAX_CONCURRENCY,
+        LLM_REQUESTS_PER_MINUTE,
+        LLM_TOKENS_PER_MINUTE,
+        LLM_QUEUE_DEADLINE,
+        LLM_MAX_RETRIES,
+        LLM_BACKOFF_BASE,
+        LLM_BACKOFF_MAX
+    )
@@ -0,0 +1,344 @@
+"""
+Výběr backendu LLM (LAURA_LLM_MODE) a offline náhrady OpenAI pro testy a benchmarky.
+
+- openai: skutečné API
+- fake: deterministický lokální model s nastavitelnou latencí a rychlostí tokenů
+- record: skutečné API, každá výměna se zapíše do nahrávky (LAURA_LLM_CASSETTE)
+- replay: odpovědi z nahrávky, bez sítě
+
+Náhrady jsou na úrovni HTTP transportu ChatOpenAI, takže strukturovaný výstup,
+streamování i usage jdou stejnou cestou jako proti skutečnému API.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Dict, Optional, Tuple
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+from context import MESSAGE_OVERHEAD_TOKENS, count_tokens
+from extractors import normalize
+from prompts import EXTRACT_QUESTIONS_PROMPT, PROMPT_TOPIC_TYPE, SUMMARIZE_CONVERSATION_PROMPT
+
+LLM_MODE = os.getenv("LAURA_LLM_MODE", "openai").strip().lower()
+LLM_CASSETTE = os.getenv("LAURA_LLM_CASSETTE", "laura_cassette.jsonl")
+# Latence do prvního tokenu a rychlost generování falešného modelu, např. "0.2", "uniform:0.1:0.3", "lognormal:0.3:0.5"
+FAKE_LATENCY = os.getenv("LAURA_FAKE_LATENCY", "0")
+FAKE_TOKENS_PER_SECOND = os.getenv("LAURA_FAKE_TOKENS_PER_SECOND", "0")
+FAKE_ANSWER_TOKENS = int(os.getenv("LAURA_FAKE_ANSWER_TOKENS", "30"))
+FAKE_SEED = int(os.getenv("LAURA_FAKE_SEED", "42"))
+# Podíl volání, na která falešný model odpoví 429 (test opakování a limitů)
+FAKE_RATE_LIMIT_RATE = float(os.getenv("LAURA_FAKE_RATE_LIMIT_RATE", "0"))
+
+# Adresa, kterou falešný a přehrávací transport obslouží (nikam se nepřipojuje)
+OFFLINE_BASE_URL = "http://laura-offline-llm/v1"
+MEETING_WORDS = ("schuz", "termin", "sejit", "setkani")
+
+
+@dataclass
+class Distribution:
+    """Rozdělení náhodné veličiny zadané řetězcem: "0.2", "const:0.2", "uniform:a:b", "normal:mean:std", "lognormal:median:sigma"."""
+    kind: str
+    a: float
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "Distribution":
+        parts = spec.strip().split(":")
+        if len(parts) == 1:
+            return cls("const", float(parts[0]))
+        kind, *values = parts
+        if kind == "const" and len(values) == 1:
+            return cls(kind, float(values[0]))
+        if kind in ("uniform", "normal", "lognormal") and len(values) == 2:
+            return cls(kind, float(values[0]), float(values[1]))
+        raise ValueError(f"Neplatné rozdělení: {spec!r}")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "const":
+            value = self.a
+        elif self.kind == "uniform":
+            value = rng.uniform(self.a, self.b)
+        elif self.kind == "normal":
+            value = rng.gauss(self.a, self.b)
+        else:
+            # Medián a sigma logaritmu - typický tvar latence API
+            value = rng.lognormvariate(0.0, self.b) * self.a
+        return max(0.0, value)
+
+
+def _content_text(content) -> str:
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+class FakeOpenAI:
+    """Deterministické odpovědi ve formátu OpenAI Chat Completions podle toho, který prompt Laura posílá."""
+
+    def __init__(
+        self,
+        latency: Distribution = Distribution("const", 0.0),
+        tokens_per_second: Distribution = Distribution("const", 0.0),
+        answer_tokens: int = 30,
+        seed: int = 42,
+        rate_limit_rate: float = 0.0
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.answer_tokens = answer_tokens
+        self.rate_limit_rate = rate_limit_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def respond(self, body: dict) -> Tuple[str, str, dict]:
+        """(druh volání, obsah odpovědi, usage)."""
+        messages = body.get("messages", [])
+        system = _content_text(messages[0]["content"]) if messages and messages[0]["role"] == "system" else ""
+        last = _content_text(messages[-1]["content"]) if messages else ""
+
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            # Strukturovaná extrakce: nic navíc nad lokální extraktory
+            properties = response_format["json_schema"]["schema"].get("properties", {})
+            kind, content = "extract", json.dumps({key: None for key in properties})
+        elif system == PROMPT_TOPIC_TYPE:
+            kind, content = "router", "date" if any(word in normalize(last) for word in MEETING_WORDS) else "info"
+        elif system == EXTRACT_QUESTIONS_PROMPT:
+            kind, content = "questions", " ".join(last.split()) or "none"
+        elif system == SUMMARIZE_CONVERSATION_PROMPT:
+            kind, content = "summary", "Uživatel se ptal na Davidovy zkušenosti a domlouval schůzku."
+        else:
+            words = ["Falešná", "odpověď", "asistentky."] + ["slovo"] * max(0, self.answer_tokens - 3)
+            kind, content = "answer", " ".join(words)
+
+        prompt_tokens = sum(count_tokens(_content_text(message.get("content"))) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+        completion_tokens = count_tokens(content)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+        return kind, content, usage
+
+    def sample_delays(self) -> Tuple[float, float]:
+        """(latence do prvního tokenu, prodleva mezi tokeny)."""
+        with self._lock:
+            first_token = self.latency.sample(self._rng)
+            rate = self.tokens_per_second.sample(self._rng)
+        return first_token, (1.0 / rate if rate > 0 else 0.0)
+
+    def rate_limited(self) -> bool:
+        if self.rate_limit_rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < self.rate_limit_rate
+
+    @staticmethod
+    def completion(body: dict, content: str, usage: dict) -> dict:
+        return {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage
+        }
+
+    @staticmethod
+    def stream_chunks(body: dict, content: str, usage: dict) -> list:
+        """SSE řádky streamované odpovědi, po jednom slově."""
+        def chunk(delta: dict, finish_reason=None, **extra) -> str:
+            payload = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if delta is not None else [],
+                **extra
+            }
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        words = content.split(" ")
+        lines = [chunk({"role": "assistant", "content": word + (" " if i < len(words) - 1 else "")}) for i, word in enumerate(words)]
+        lines.append(chunk({}, "stop"))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            lines.append(chunk(None, usage=usage))
+        lines.append("data: [DONE]\n\n")
+        return lines
+
+
+class FakeOpenAITransport(httpx.AsyncBaseTransport):
+    """Transport ChatOpenAI, který místo sítě odpovídá přes FakeOpenAI a počítá volání."""
+
+    def __init__(self, fake: FakeOpenAI):
+        self.fake = fake
+        self.calls = 0
+        self.rate_limited = 0
+        self.calls_by_kind: Counter = Counter()
+
+    def reset(self) -> None:
+        self.calls = 0
+        self.rate_limited = 0
+        self.calls_by_kind.clear()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(await request.aread())
+        if self.fake.rate_limited():
+            self.rate_limited += 1
+            return httpx.Response(429, headers={"retry-after": "0"}, json={"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}})
+        kind, content, usage = self.fake.respond(body)
+        self.calls += 1
+        self.calls_by_kind[kind] += 1
+        first_token, per_token = self.fake.sample_delays()
+
+        if body.get("stream"):
+            return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=self._stream(body, content, usage, first_token, per_token))
+
+        await asyncio.sleep(first_token + per_token * len(content.split(" ")))
+        return httpx.Response(200, json=self.fake.completion(body, content, usage))
+
+    async def _stream(self, body: dict, content: str, usage: dict, first_token: float, per_token: float) -> AsyncIterator[bytes]:
+        await asyncio.sleep(first_token)
+        for line in self.fake.stream_chunks(body, content, usage):
+            yield line.encode("utf-8")
+            if per_token:
+                await asyncio.sleep(per_token)
+
+
+def request_key(body: dict) -> str:
+    """Klíč výměny v nahrávce: celé tělo požadavku kromě voleb streamu."""
+    relevant = {key: value for key, value in body.items() if key != "stream_options"}
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """
+    Předává požadavky dál a každou výměnu (požadavek + odpověď) připíše do JSONL
+    nahrávky. Odpověď jde volajícímu průběžně po částech (stream tokenů funguje
+    i při nahrávání), záznam se zapíše, až se přečte celá.
+    """
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, path: str):
+        self.inner = inner
+        self.path = path
+        self._lock = threading.Lock()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(await request.aread())
+        response = await self.inner.handle_async_request(request)
+        record = {
+            "key": request_key(body),
+            "request": body,
+            "status": response.status_code,
+            "content_type": response.headers.get("content-type", "application/json")
+        }
+        return httpx.Response(
+            response.status_code,
+            headers={"content-type": record["content_type"]},
+            stream=_RecordingStream(response, record, self._write)
+        )
+
+    def _write(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    """Tělo odpovědi, které posílá části hned dál a po přečtení celé odpovědi zapíše záznam."""
+
+    def __init__(self, response: httpx.Response, record: dict, write: Callable[[dict], None]):
+        self._response = response
+        self._record = record
+        self._write = write
+        self._chunks: list = []
+        self._upstream = response.aiter_bytes()
+        self._written = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._upstream:
+            self._chunks.append(chunk)
+            yield chunk
+        self._finish()
+
+    async def aclose(self) -> None:
+        try:
+            # Klient OpenAI přestane číst po "data: [DONE]" - zbytek dočteme, aby byl záznam úplný
+            async for chunk in self._upstream:
+                self._chunks.append(chunk)
+            self._finish()
+        finally:
+            await self._response.aclose()
+
+    def _finish(self) -> None:
+        if not self._written:
+            self._written = True
+            self._write({**self._record, "body": b"".join(self._chunks).decode("utf-8")})
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    Odpovídá z nahrávky. Stejný požadavek nahraný víckrát se přehraje v pořadí
+    nahrávání, poslední odpověď se pak opakuje. Chybějící požadavek vrátí 404.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.misses = 0
+        self._records: Dict[str, deque] = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._records.setdefault(record["key"], deque()).append(record)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(await request.aread())
+        records = self._records.get(request_key(body))
+        if not records:
+            self.misses += 1
+            return httpx.Response(404, json={"error": {"message": f"Požadavek není v nahrávce {self.path}", "type": "replay_miss"}})
+        record = records.popleft() if len(records) > 1 else records[0]
+        return httpx.Response(record["status"], headers={"content-type": record["content_type"]}, content=record["body"].encode("utf-8"))
+
+
+def create_fake_openai() -> FakeOpenAI:
+    return FakeOpenAI(Distribution.parse(FAKE_LATENCY), Distribution.parse(FAKE_TOKENS_PER_SECOND), FAKE_ANSWER_TOKENS, FAKE_SEED, FAKE_RATE_LIMIT_RATE)
+
+
+@lru_cache(maxsize=1)
+def llm_transport() -> Optional[httpx.AsyncBaseTransport]:
+    """Sdílený transport pro zvolený režim (None = běžné spojení s OpenAI)."""
+    if LLM_MODE == "openai":
+        return None
+    if LLM_MODE == "fake":
+        return FakeOpenAITransport(create_fake_openai())
+    if LLM_MODE == "record":
+        return RecordingTransport(httpx.AsyncHTTPTransport(), LLM_CASSETTE)
+    if LLM_MODE == "replay":
+        return ReplayTransport(LLM_CASSETTE)
+    raise ValueError(f"Neznámý LAURA_LLM_MODE: {LLM_MODE!r} (openai, fake, record, replay)")
+
+
+def create_chat_model(model: str, temperature: float) -> ChatOpenAI:
+    # stream_usage: počty tokenů i u streamovaných odpovědí (pro metriky)
+    # max_retries=0: opakování po 429, timeoutech, výpadcích spojení a 5xx řídí plánovač (limiter.py), ne klient
+    transport = llm_transport()
+    if transport is None:
+        return ChatOpenAI(model=model, temperature=temperature, stream_usage=True, max_retries=0)
+    offline = LLM_MODE in ("fake", "replay")
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        stream_usage=True,
+        max_retries=0,
+        api_key=os.getenv("OPENAI_API_KEY") or "offline",
+        base_url=OFFLINE_BASE_URL if offline else None,
+        http_async_client=httpx.AsyncClient(transport=transport, timeout=60)
+    )
@@ -4,7 +4,8 @@ from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from langgraph.graph import StateGraph, END
-from prompts import SYSTEM_PROMPT
+from prompts import SYSTEM_PROMPT, RESUME_CONTEXT_PROMPT
+from resume import ResumeStore
 
 # Načtení environment variables
 load_dotenv()
@@ -16,28 +17,25 @@ class State(TypedDict):
 # Inicializace LLM
 llm = ChatOpenAI(model="gpt-4o", temperature=0.7)
 
-import json
+resume_store = ResumeStore(os.path.join(os.path.dirname(os.path.abspath(__file__)), "resume.json"))
 
-def get_resume():
-    """Načte obsah životopisu ze souboru JSON."""
-    try:
-        with open("resume.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-            return json.dumps(data, indent=2, ensure_ascii=False)
-    except FileNotFoundError:
+def get_resume(questions: list[str]):
+    """Vrátí části životopisu relevantní k otázkám (životopis se načítá jen při změně souboru)."""
+    resume = resume_store.get()
+    if resume is None:
         return "Životopis nebyl nalezen."
-    except json.JSONDecodeError:
-        return "Chyba při čtení JSON životopisu."
+    return resume.relevant_context(questions)
 
 def laura_node(state: State):
     """Uzel asistentky Laury."""
-    resume_content = get_resume()
+    resume_content = get_resume([state["messages"][-1].content])
     
-    # Sestavení zpráv
-    system_message = SystemMessage(content=SYSTEM_PROMPT.format(resume_content=resume_content))
+    # Sestavení zpráv: statický systémový prompt, historie, relevantní životopis před poslední zprávou
+    system_message = SystemMessage(content=SYSTEM_PROMPT)
+    resume_message = SystemMessage(content=RESUME_CONTEXT_PROMPT.format(resume_content=resume_content))
     
     # Spuštění LLM
-    response = llm.invoke([system_message] + state["messages"])
+    response = llm.invoke([system_message] + state["messages"][:-1] + [resume_message, state["messages"][-1]])
     
     return {"messages": [response]}
 
@@ -0,0 +1,122 @@
+"""
+Perzistentní memo cache pro klasifikační volání LLM (router, extrakce otázek
+a údajů o schůzce).
+
+Klíčem je hash systémového promptu a normalizovaný text zprávy, hodnotou
+odpověď modelu. Data i počítadla jsou v SQLite, takže cache i statistiky
+sdílí všechny uvicorn workery na jednom stroji.
+"""
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from paths import data_path
+
+MEMO_ENABLED = os.getenv("LAURA_MEMO_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+MEMO_DB_PATH = os.getenv("LAURA_MEMO_DB", "laura_memo.sqlite3")
+MEMO_MAX_ENTRIES = int(os.getenv("LAURA_MEMO_MAX_ENTRIES", "10000"))
+
+
+class MemoCache:
+    """Databáze se otevře až při prvním použití, ne při importu modulu."""
+
+    def __init__(self, path: str, max_entries: int = 10000, clock=time.time):
+        self.path = path
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @staticmethod
+    def make_key(prompt: str, message: str) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+        normalized_message = " ".join(message.lower().split())
+        return f"{prompt_hash}|{normalized_message}"
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self._set, key, value)
+
+    async def stats(self) -> dict:
+        return await asyncio.to_thread(self._stats)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Volá se pod self._lock
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_memo ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_memo_lru ON llm_memo (last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS llm_memo_stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute(
+                "INSERT OR IGNORE INTO llm_memo_stats (name, value) VALUES ('hits', 0), ('misses', 0), ('evictions', 0)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT value FROM llm_memo WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                conn.execute("UPDATE llm_memo_stats SET value = value + 1 WHERE name = 'misses'")
+                return None
+            conn.execute("UPDATE llm_memo SET last_access = ? WHERE key = ?", (self._clock(), key))
+            conn.execute("UPDATE llm_memo_stats SET value = value + 1 WHERE name = 'hits'")
+            return row[0]
+
+    def _set(self, key: str, value: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_memo (key, value, last_access) VALUES (?, ?, ?)",
+                (key, value, self._clock())
+            )
+            overflow = conn.execute("SELECT COUNT(*) FROM llm_memo").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM llm_memo WHERE key IN (SELECT key FROM llm_memo ORDER BY last_access LIMIT ?)",
+                    (overflow,)
+                )
+                conn.execute("UPDATE llm_memo_stats SET value = value + ? WHERE name = 'evictions'", (overflow,))
+
+    def _stats(self) -> dict:
+        with self._lock:
+            conn = self._connection()
+            counters = dict(conn.execute("SELECT name, value FROM llm_memo_stats").fetchall())
+            size = conn.execute("SELECT COUNT(*) FROM llm_memo").fetchone()[0]
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "size": size,
+            "max_entries": self.max_entries,
+            "hits": counters["hits"],
+            "misses": counters["misses"],
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+            "evictions": counters["evictions"],
+            # Každý zásah = jedno ušetřené volání klasifikačního modelu
+            "llm_calls_avoided": counters["hits"]
+        }
+
+
+def create_memo_cache() -> Optional[MemoCache]:
+    if not MEMO_ENABLED:
+        return None
+    return MemoCache(data_path(MEMO_DB_PATH), MEMO_MAX_ENTRIES)
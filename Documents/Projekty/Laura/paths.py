@@ -0,0 +1,15 @@
+"""
+Umístění datových souborů Laury (SQLite databáze, trace log).
+
+Relativní cesty z proměnných prostředí se berou vůči LAURA_DATA_DIR, ne vůči
+pracovnímu adresáři, ze kterého se spustil uvicorn.
+"""
+import os
+
+# Složka pro datové soubory; výchozí je složka Laury
+DATA_DIR = os.getenv("LAURA_DATA_DIR") or os.path.dirname(os.path.abspath(__file__))
+
+
+def data_path(path: str) -> str:
+    """Relativní cestu vztáhne k DATA_DIR, absolutní nechá beze změny."""
+    return os.path.join(DATA_DIR, path)
@@ -0,0 +1,175 @@
+"""
+Životopis jako cache + lokální BM25 index.
+
+Soubor se načte jednou a znovu jen při změně mtime. Je rozdělený na sekce
+(kontakt, profil, jednotlivé pozice, dovednosti, jazyky, certifikace) a do
+promptu jdou jen sekce relevantní k otázkám uživatele.
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from extractors import normalize
+
+# Kolik sekcí nejvýš jde do promptu na jednu otázku a jak blízko nejlepší shodě musí být
+RESUME_MAX_SECTIONS = int(os.getenv("LAURA_RESUME_MAX_SECTIONS", "6"))
+RESUME_MIN_RELATIVE_SCORE = float(os.getenv("LAURA_RESUME_MIN_RELATIVE_SCORE", "0.5"))
+
+# Obecná slova, podle kterých uživatel na sekci typicky míří
+SECTION_KEYWORDS = {
+    "contact": "kontakt kontaktni telefon cislo email mail linkedin spojit ozvat jmeno",
+    "profile": "profil kdo je david o sobe hodnoty silne stranky shrnuti predstaveni motivace",
+    "experience": "zkusenosti prace pracoval pracuje zamestnani pozice firma kariera role napln odpovednost",
+    "skills": "dovednosti umi schopnosti kompetence znalosti vedeni tymu scrum agilni",
+    "languages": "jazyky jazyk mluvi anglicky spanelsky anglictina spanelstina uroven",
+    "certifications": "certifikace certifikat kurz osvedceni vzdelani skoleni",
+}
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Hrubý stemming pro češtinu - stejný základ pro "zkušenosti", "zkušeností", "zkušenostech"
+STEM_LENGTH = 6
+STOP_WORDS = {"a", "i", "v", "ve", "na", "do", "se", "si", "je", "jak", "jake", "jaky", "jaka", "co", "kde", "kdy", "ma", "mel", "david", "davida", "davidovi", "jeho", "s", "z", "o", "k", "to"}
+
+
+def tokenize(text: str) -> List[str]:
+    return [token[:STEM_LENGTH] for token in TOKEN_RE.findall(normalize(text)) if token not in STOP_WORDS]
+
+
+@dataclass
+class ResumeSection:
+    id: str
+    kind: str
+    title: str
+    content: str
+    tokens: List[str] = field(default_factory=list, repr=False)
+
+
+def split_sections(data: dict) -> List[ResumeSection]:
+    def compact(value) -> str:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+    sections = []
+    person = data.get("person", {})
+    if person:
+        sections.append(ResumeSection("contact", "contact", "Kontakt", compact(person)))
+    if "profile_summary" in data:
+        sections.append(ResumeSection("profile", "profile", "Profil", compact(data["profile_summary"])))
+    for i, job in enumerate(data.get("experience", [])):
+        period = job.get("period", {})
+        title = f"Zkušenost: {job.get('position', '')} ({job.get('company', '')})"
+        # Roky, které pozice pokrývá, aby šlo hledat i "kde pracoval v roce 2018"
+        years = _years_between(period.get("from"), period.get("to"))
+        sections.append(ResumeSection(f"experience:{i}", "experience", title, compact(job) + " " + " ".join(years)))
+    for key, kind, title in (("skills", "skills", "Dovednosti"), ("languages", "languages", "Jazyky"), ("certifications", "certifications", "Certifikace")):
+        if key in data:
+            sections.append(ResumeSection(key, kind, title, compact(data[key])))
+
+    for section in sections:
+        section.tokens = tokenize(f"{section.title} {section.content} {SECTION_KEYWORDS[section.kind]}")
+    return sections
+
+
+def _years_between(start: Optional[str], end: Optional[str]) -> List[str]:
+    try:
+        first, last = int(str(start)[:4]), int(str(end)[:4])
+    except (TypeError, ValueError):
+        return []
+    return [str(year) for year in range(first, last + 1)]
+
+
+class BM25Index:
+    def __init__(self, documents: List[List[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(doc) for doc in documents]
+        self.lengths = [len(doc) for doc in documents]
+        self.avg_length = sum(self.lengths) / len(documents) if documents else 0.0
+        doc_freq = Counter(term for doc in documents for term in set(doc))
+        total = len(documents)
+        self.idf = {term: math.log(1 + (total - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    def scores(self, query: List[str]) -> List[float]:
+        result = []
+        for freqs, length in zip(self.term_freqs, self.lengths):
+            score = 0.0
+            for term in query:
+                tf = freqs.get(term)
+                if tf:
+                    norm = tf + self.k1 * (1 - self.b + self.b * length / self.avg_length)
+                    score += self.idf[term] * tf * (self.k1 + 1) / norm
+            result.append(score)
+        return result
+
+
+class Resume:
+    def __init__(self, data: dict, content_hash: str = ""):
+        # Hash obsahu souboru - součást klíčů cache odpovědí
+        self.content_hash = content_hash
+        self.sections = split_sections(data)
+        self.index = BM25Index([section.tokens for section in self.sections])
+
+    def search(
+        self,
+        questions: List[str],
+        max_sections: int = RESUME_MAX_SECTIONS,
+        min_relative_score: float = RESUME_MIN_RELATIVE_SCORE
+    ) -> List[ResumeSection]:
+        """
+        Relevantní sekce pro všechny otázky dohromady. Z každé otázky se berou
+        sekce se skóre aspoň `min_relative_score` nejlepší shody, nejvýš `max_sections`.
+        """
+        selected = set()
+        for question in questions:
+            scores = self.index.scores(tokenize(question))
+            best = max(scores, default=0.0)
+            if best <= 0:
+                continue
+            ranked = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+            selected.update(self.sections[i].id for i in ranked[:max_sections] if scores[i] >= best * min_relative_score)
+        # Pořadí jako v životopise, aby byl kontext čitelný
+        return [section for section in self.sections if section.id in selected]
+
+    def render(self, sections: Optional[List[ResumeSection]] = None) -> str:
+        sections = self.sections if not sections else sections
+        return "\n".join(f"## {section.title}\n{section.content}" for section in sections)
+
+    def relevant_context(self, questions: List[str]) -> str:
+        """Text relevantních sekcí; bez shody celý životopis, aby model neodpovídal naslepo."""
+        return self.render(self.search(questions))
+
+
+class ResumeStore:
+    """Načte a zaindexuje životopis jednou, znovu jen při změně mtime souboru."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.loads = 0
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._resume: Optional[Resume] = None
+
+    def get(self) -> Optional[Resume]:
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+        if self._resume is not None and mtime == self._mtime:
+            return self._resume
+
+        with self._lock:
+            if self._resume is None or mtime != self._mtime:
+                try:
+                    with open(self.path, "rb") as f:
+                        raw = f.read()
+                    self._resume = Resume(json.loads(raw.decode("utf-8")), hashlib.sha256(raw).hexdigest()[:16])
+                except (OSError, UnicodeDecodeError, json.JSONDecodeError):
+                    return None
+                self._mtime = mtime
+                self.loads += 1
+            return self._resume
@@ -0,0 +1,301 @@
+"""
+Dostupnost Davidova kalendáře a rezervace schůzek.
+
+Rezervace jsou v SQLite (zdroj pravdy, sdílený mezi workery). Pro rychlé
+dotazy se drží index: pro každý den seřazený seznam obsazených intervalů
+v minutách od půlnoci, ve kterém se hledá půlením (bisect). Když jiný worker
+databázi změní (PRAGMA data_version), index se znovu načte.
+"""
+import bisect
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from paths import data_path
+
+BOOKINGS_DB_PATH = os.getenv("LAURA_BOOKINGS_DB", "laura_bookings.sqlite3")
+WORK_START = os.getenv("LAURA_WORK_START", "09:00")
+WORK_END = os.getenv("LAURA_WORK_END", "17:00")
+# Pracovní dny jako čísla dne v týdnu (0 = pondělí)
+WORK_DAYS = os.getenv("LAURA_WORK_DAYS", "0,1,2,3,4")
+# Volný čas mezi schůzkami v minutách
+BOOKING_BUFFER = int(os.getenv("LAURA_BOOKING_BUFFER", "15"))
+# Krok, po kterém se nabízí začátky schůzek
+SLOT_STEP = int(os.getenv("LAURA_SLOT_STEP", "15"))
+# Kolik termínů Laura nabídne v jedné odpovědi
+SLOTS_OFFERED = int(os.getenv("LAURA_SLOTS_OFFERED", "4"))
+
+
+def parse_minutes(value: str) -> int:
+    hours, minutes = value.strip().split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def format_minutes(value: int) -> str:
+    return f"{value // 60:02d}:{value % 60:02d}"
+
+
+@dataclass
+class Booking:
+    id: int
+    day: str
+    start: int
+    end: int
+
+    @property
+    def start_time(self) -> str:
+        return format_minutes(self.start)
+
+
+class AvailabilityEngine:
+    def __init__(
+        self,
+        path: str,
+        work_start: str = "09:00",
+        work_end: str = "17:00",
+        work_days: Tuple[int, ...] = (0, 1, 2, 3, 4),
+        buffer: int = 15,
+        step: int = 15
+    ):
+        self.path = path
+        self.work_start = parse_minutes(work_start)
+        self.work_end = parse_minutes(work_end)
+        self.work_days = set(work_days)
+        self.buffer = buffer
+        self.step = step
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # Den -> seřazené (začátek, konec) obsazených intervalů
+        self._index: Dict[str, List[Tuple[int, int]]] = {}
+        self._data_version: Optional[int] = None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # --- dotazy ---
+
+    # `not_before` je (den, minuty) nejdřívějšího možného začátku - termíny v minulosti
+    # se nenabízí ani nerezervují. `ignore_booking` je vlastní rezervace relace,
+    # kterou nová nahradí, takže jí nesmí překážet ani její buffer.
+
+    def is_free(self, day: str, start: int, duration: int, not_before: Optional[Tuple[str, int]] = None, ignore_booking: Optional[int] = None) -> bool:
+        if self._is_past(day, start, not_before) or not self._in_working_hours(day, start, duration):
+            return False
+        with self._lock:
+            self._refresh()
+            return self._fits(self._intervals(day, ignore_booking), start, start + duration)
+
+    def free_slots(self, day: str, duration: int, after: Optional[int] = None, limit: Optional[int] = None, not_before: Optional[Tuple[str, int]] = None, ignore_booking: Optional[int] = None) -> List[str]:
+        """Začátky (HH:MM), kdy lze v daný den začít schůzku dané délky."""
+        if not_before is not None and day < not_before[0]:
+            return []
+        if not_before is not None and day == not_before[0]:
+            after = max(after or 0, not_before[1])
+        with self._lock:
+            self._refresh()
+            intervals = self._intervals(day, ignore_booking)
+            return [format_minutes(start) for start in self._iter_free_starts(day, intervals, duration, after, limit)]
+
+    def next_free_slot(self, from_day: str, duration: int, until_day: Optional[str] = None, after: Optional[int] = None, max_days: int = 60, not_before: Optional[Tuple[str, int]] = None, ignore_booking: Optional[int] = None) -> Optional[Tuple[str, str]]:
+        """První volný termín od `from_day` (včetně) do `until_day` - např. "nejbližší 90minutový slot tento týden"."""
+        if not_before is not None and from_day <= not_before[0]:
+            after = max(after or 0, not_before[1]) if from_day == not_before[0] else not_before[1]
+            from_day = not_before[0]
+        first = date.fromisoformat(from_day)
+        last = date.fromisoformat(until_day) if until_day else first + timedelta(days=max_days)
+        with self._lock:
+            self._refresh()
+            current = first
+            while current <= last:
+                day = current.isoformat()
+                intervals = self._intervals(day, ignore_booking)
+                for start in self._iter_free_starts(day, intervals, duration, after if current == first else None, 1):
+                    return day, format_minutes(start)
+                current += timedelta(days=1)
+        return None
+
+    # --- rezervace ---
+
+    def book(self, day: str, start: int, duration: int, meeting_type: Optional[str] = None, email: Optional[str] = None, phone: Optional[str] = None, session_id: Optional[str] = None, not_before: Optional[Tuple[str, int]] = None, replace_booking: Optional[int] = None) -> Optional[Booking]:
+        """
+        Atomicky zarezervuje termín. Kontrola kolize i zápis proběhnou v jedné
+        transakci BEGIN IMMEDIATE, takže dva souběžné chaty (ani dva workery)
+        nemohou stejný termín obsadit dvakrát. Při kolizi nebo termínu
+        v minulosti vrací None. Přesun vlastní schůzky (`replace_booking`)
+        zruší původní rezervaci ve stejné transakci a s ní nekoliduje.
+        """
+        end = start + duration
+        if self._is_past(day, start, not_before) or not self._in_working_hours(day, start, duration):
+            return None
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conflict = conn.execute(
+                    "SELECT 1 FROM bookings WHERE day = ? AND start_min < ? AND end_min > ? AND id IS NOT ? LIMIT 1",
+                    (day, end + self.buffer, start - self.buffer, replace_booking)
+                ).fetchone()
+                if conflict:
+                    conn.execute("ROLLBACK")
+                    return None
+                if replace_booking is not None:
+                    conn.execute("DELETE FROM bookings WHERE id = ?", (replace_booking,))
+                cursor = conn.execute(
+                    "INSERT INTO bookings (day, start_min, end_min, meeting_type, email, phone, session_id, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (day, start, end, meeting_type, email, phone, session_id, time.time())
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            if replace_booking is not None:
+                self._reload()
+            else:
+                bisect.insort(self._index.setdefault(day, []), (start, end))
+            self._data_version = self._current_data_version()
+            return Booking(cursor.lastrowid, day, start, end)
+
+    def cancel(self, booking_id: int) -> bool:
+        with self._lock:
+            cursor = self._connection().execute("DELETE FROM bookings WHERE id = ?", (booking_id,))
+            # Vlastní zápisy data_version nemění - index přestavíme ručně
+            self._reload()
+            return cursor.rowcount > 0
+
+    # --- interní ---
+
+    def _connection(self) -> sqlite3.Connection:
+        # Volá se pod self._lock; databáze se otevře až při prvním dotazu, ne při importu
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bookings ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " day TEXT NOT NULL,"
+                " start_min INTEGER NOT NULL,"
+                " end_min INTEGER NOT NULL,"
+                " meeting_type TEXT,"
+                " email TEXT,"
+                " phone TEXT,"
+                " session_id TEXT,"
+                " created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_bookings_day ON bookings (day, start_min)")
+            self._conn = conn
+            # data_version je vázaná na spojení - index po otevření vždy načteme znovu
+            self._data_version = None
+        return self._conn
+
+    def _is_past(self, day: str, start: int, not_before: Optional[Tuple[str, int]]) -> bool:
+        return not_before is not None and (day, start) < not_before
+
+    def _intervals(self, day: str, ignore_booking: Optional[int]) -> List[Tuple[int, int]]:
+        intervals = self._index.get(day, [])
+        if ignore_booking is None:
+            return intervals
+        row = self._connection().execute("SELECT day, start_min, end_min FROM bookings WHERE id = ?", (ignore_booking,)).fetchone()
+        if row is None or row[0] != day:
+            return intervals
+        return [interval for interval in intervals if interval != (row[1], row[2])]
+
+    def _in_working_hours(self, day: str, start: int, duration: int) -> bool:
+        return date.fromisoformat(day).weekday() in self.work_days and self.work_start <= start and start + duration <= self.work_end
+
+    def _fits(self, intervals: List[Tuple[int, int]], start: int, end: int) -> bool:
+        # Stačí zkontrolovat souseda vlevo a vpravo od místa vložení (intervaly se nepřekrývají)
+        position = bisect.bisect_left(intervals, (start, end))
+        if position > 0 and intervals[position - 1][1] + self.buffer > start:
+            return False
+        if position < len(intervals) and intervals[position][0] < end + self.buffer:
+            return False
+        return True
+
+    def _iter_free_starts(self, day: str, intervals: List[Tuple[int, int]], duration: int, after: Optional[int], limit: Optional[int]) -> Iterator[int]:
+        if date.fromisoformat(day).weekday() not in self.work_days:
+            return
+        earliest = max(self.work_start, after if after is not None else self.work_start)
+        # Zarovnání na krok od začátku pracovní doby
+        earliest = self.work_start + -(-(earliest - self.work_start) // self.step) * self.step
+
+        position = bisect.bisect_left(intervals, (earliest, earliest))
+        if position > 0:
+            position -= 1
+        found = 0
+        cursor = earliest
+        # Za posledním intervalem je zarážka na konci pracovní doby
+        sentinel = self.work_end + self.buffer
+        for i in range(position, len(intervals) + 1):
+            busy_start, busy_end = intervals[i] if i < len(intervals) else (sentinel, sentinel)
+            gap_end = min(busy_start - self.buffer, self.work_end)
+            while cursor + duration <= gap_end:
+                yield cursor
+                found += 1
+                if limit is not None and found >= limit:
+                    return
+                cursor += self.step
+            if busy_end + self.buffer > cursor:
+                cursor = self.work_start + -(-(busy_end + self.buffer - self.work_start) // self.step) * self.step
+            if cursor + duration > self.work_end:
+                return
+
+    def _current_data_version(self) -> int:
+        return self._connection().execute("PRAGMA data_version").fetchone()[0]
+
+    def _refresh(self) -> None:
+        version = self._current_data_version()
+        if version != self._data_version:
+            self._reload()
+            self._data_version = version
+
+    def _reload(self) -> None:
+        index: Dict[str, List[Tuple[int, int]]] = {}
+        for day, start, end in self._connection().execute("SELECT day, start_min, end_min FROM bookings ORDER BY day, start_min"):
+            index.setdefault(day, []).append((start, end))
+        self._index = index
+
+
+def create_availability_engine() -> AvailabilityEngine:
+    work_days = tuple(int(day) for day in WORK_DAYS.split(",") if day.strip())
+    return AvailabilityEngine(data_path(BOOKINGS_DB_PATH), WORK_START, WORK_END, work_days, BOOKING_BUFFER, SLOT_STEP)
+
+
+def parse_meeting_start(meeting_date: Optional[str], meeting_time: Optional[str]) -> Optional[Tuple[str, int]]:
+    """Převede datum a čas ze stavu konverzace na (YYYY-MM-DD, minuty), nebo None."""
+    try:
+        day = datetime.strptime(meeting_date or "", "%Y-%m-%d").date().isoformat()
+        return day, parse_minutes(meeting_time or "")
+    except ValueError:
+        return None
+
+
+def earliest_start(date_now: Optional[str], now: Optional[datetime] = None) -> Tuple[str, int]:
+    """
+    Nejdřívější možný začátek schůzky (den, minuty). Datum `date_now` posílá
+    klient, proto ho bereme jen jako dolní mez - nikdy dřív než aktuální čas serveru.
+    """
+    now = now or datetime.now()
+    server = (now.date().isoformat(), now.hour * 60 + now.minute)
+    try:
+        client = (datetime.strptime(date_now or "", "%Y-%m-%d").date().isoformat(), 0)
+    except ValueError:
+        return server
+    return max(server, client)
+
+
+def pick_offered_slots(slots: List[str], count: int = SLOTS_OFFERED) -> List[str]:
+    """Z volných začátků vybere `count` rovnoměrně rozložených přes den (ne čtyři po sobě jdoucí čtvrthodiny)."""
+    if len(slots) <= count:
+        return slots
+    if count <= 1:
+        return slots[:count]
+    return [slots[round(i * (len(slots) - 1) / (count - 1))] for i in range(count)]
@@ -0,0 +1,145 @@
+"""
+Serverové relace konverzací.
+
+Stav konverzace (zprávy i údaje o schůzce) ukládá LangGraph checkpointer pod
+thread_id = session_id. Tady se navíc hlídá poslední aktivita relací a relace
+neaktivní déle než TTL se mažou.
+"""
+import os
+import time
+import uuid
+from typing import Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+
+from paths import data_path
+
+SESSION_BACKEND = os.getenv("LAURA_SESSION_BACKEND", "memory").strip().lower()
+SESSION_DB_PATH = os.getenv("LAURA_SESSION_DB", "laura_sessions.sqlite3")
+SESSION_TTL = float(os.getenv("LAURA_SESSION_TTL", "3600"))
+SESSION_SWEEP_INTERVAL = float(os.getenv("LAURA_SESSION_SWEEP_INTERVAL", "60"))
+
+
+class SessionStore:
+    def __init__(
+        self,
+        backend: str = "memory",
+        path: str = "laura_sessions.sqlite3",
+        ttl: float = 3600.0,
+        sweep_interval: float = 60.0,
+        clock=time.time
+    ):
+        if backend not in ("memory", "sqlite"):
+            raise ValueError(f"Neznámý backend relací: {backend}")
+        self.backend = backend
+        self.path = path
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.evictions = 0
+        self.checkpointer: Optional[BaseCheckpointSaver] = None
+        self._clock = clock
+        self._conn = None
+        self._last_seen: dict[str, float] = {}
+        self._last_sweep = clock()
+
+    async def open(self) -> BaseCheckpointSaver:
+        if self.checkpointer is not None:
+            return self.checkpointer
+        if self.backend == "memory":
+            self.checkpointer = InMemorySaver()
+            return self.checkpointer
+
+        try:
+            import aiosqlite
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+        except ImportError as e:
+            raise RuntimeError("Pro SQLite relace je potřeba nainstalovat balíček 'langgraph-checkpoint-sqlite'.") from e
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = await aiosqlite.connect(self.path)
+        await self._conn.execute("PRAGMA journal_mode=WAL")
+        await self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS laura_sessions (session_id TEXT PRIMARY KEY, last_seen REAL NOT NULL)"
+        )
+        await self._conn.commit()
+        self.checkpointer = AsyncSqliteSaver(self._conn)
+        await self.checkpointer.setup()
+        return self.checkpointer
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+        self.checkpointer = None
+
+    @staticmethod
+    def new_session_id() -> str:
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def config(session_id: str) -> dict:
+        return {"configurable": {"thread_id": session_id}}
+
+    async def touch(self, session_id: str) -> None:
+        """Zaznamená aktivitu relace. Prošlou relaci nejdřív smaže, aby se začalo od nuly."""
+        now = self._clock()
+        last_seen = await self._get_last_seen(session_id)
+        if last_seen is not None and last_seen < now - self.ttl:
+            await self.delete(session_id)
+        await self._set_last_seen(session_id, now)
+
+        if now - self._last_sweep >= self.sweep_interval:
+            self._last_sweep = now
+            await self.evict_expired()
+
+    async def delete(self, session_id: str) -> None:
+        await self.checkpointer.adelete_thread(session_id)
+        if self._conn is not None:
+            await self._conn.execute("DELETE FROM laura_sessions WHERE session_id = ?", (session_id,))
+            await self._conn.commit()
+        else:
+            self._last_seen.pop(session_id, None)
+
+    async def evict_expired(self) -> int:
+        expired_before = self._clock() - self.ttl
+        if self._conn is not None:
+            async with self._conn.execute(
+                "SELECT session_id FROM laura_sessions WHERE last_seen < ?", (expired_before,)
+            ) as cursor:
+                expired = [row[0] for row in await cursor.fetchall()]
+        else:
+            expired = [session_id for session_id, seen in self._last_seen.items() if seen < expired_before]
+
+        for session_id in expired:
+            await self.delete(session_id)
+        self.evictions += len(expired)
+        return len(expired)
+
+    async def size(self) -> int:
+        if self._conn is not None:
+            async with self._conn.execute("SELECT COUNT(*) FROM laura_sessions") as cursor:
+                return (await cursor.fetchone())[0]
+        return len(self._last_seen)
+
+    async def _get_last_seen(self, session_id: str) -> Optional[float]:
+        if self._conn is not None:
+            async with self._conn.execute(
+                "SELECT last_seen FROM laura_sessions WHERE session_id = ?", (session_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+            return row[0] if row else None
+        return self._last_seen.get(session_id)
+
+    async def _set_last_seen(self, session_id: str, now: float) -> None:
+        if self._conn is not None:
+            await self._conn.execute(
+                "INSERT OR REPLACE INTO laura_sessions (session_id, last_seen) VALUES (?, ?)", (session_id, now)
+            )
+            await self._conn.commit()
+        else:
+            self._last_seen[session_id] = now
+
+
+def create_session_store() -> SessionStore:
+    return SessionStore(SESSION_BACKEND, data_path(SESSION_DB_PATH), SESSION_TTL, SESSION_SWEEP_INTERVAL)
@@ -0,0 +1,242 @@
+"""
+Instrumentace tahu konverzace: doba běhu uzlů grafu a volání LLM, tokeny,
+odhad ceny, zásahy cache a chyby.
+
+Data jdou dvěma cestami: Prometheus metriky (endpoint /metrics, pokud je
+nainstalovaný prometheus_client) a strukturovaný trace log - jeden JSON řádek
+na tah s `turn_id`, ze kterého `trace_report.py` spočítá p50/p95 po uzlech.
+"""
+import contextvars
+import functools
+import json
+import logging
+import math
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from paths import data_path
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+except ImportError:
+    # Bez prometheus_client zůstane jen trace log
+    CONTENT_TYPE_LATEST = None
+    Counter = Histogram = generate_latest = None
+
+TRACE_ENABLED = os.getenv("LAURA_TRACE_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+# Prázdná hodnota = trace jen do loggeru "laura.trace", bez souboru
+TRACE_LOG_PATH = os.getenv("LAURA_TRACE_LOG", "laura_traces.log")
+
+# Ceny v USD za milion tokenů (vstup, výstup); přepsatelné JSONem v LAURA_LLM_PRICES
+LLM_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+}
+LLM_PRICES.update({model: tuple(prices) for model, prices in json.loads(os.getenv("LAURA_LLM_PRICES", "{}")).items()})
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+if Histogram is not None:
+    TURN_SECONDS = Histogram("laura_turn_duration_seconds", "Doba celého tahu konverzace", ["endpoint"], buckets=LATENCY_BUCKETS)
+    NODE_SECONDS = Histogram("laura_node_duration_seconds", "Doba běhu uzlu grafu", ["node"], buckets=LATENCY_BUCKETS)
+    NODE_ERRORS = Counter("laura_node_errors_total", "Výjimky v uzlech grafu", ["node"])
+    LLM_SECONDS = Histogram("laura_llm_duration_seconds", "Doba volání LLM", ["node", "model"], buckets=LATENCY_BUCKETS)
+    LLM_TOKENS = Counter("laura_llm_tokens_total", "Tokeny volání LLM", ["node", "model", "kind"])
+    LLM_COST = Counter("laura_llm_cost_usd_total", "Odhad ceny volání LLM v USD", ["node", "model"])
+    LLM_ERRORS = Counter("laura_llm_errors_total", "Chyby volání LLM", ["node", "model"])
+    CACHE_EVENTS = Counter("laura_cache_events_total", "Zásahy a minutí cache", ["cache", "result"])
+    LLM_QUEUE_SECONDS = Histogram("laura_llm_queue_wait_seconds", "Čekání volání LLM ve frontě plánovače", ["priority"], buckets=LATENCY_BUCKETS)
+    LLM_SHED = Counter("laura_llm_shed_total", "Volání LLM odmítnutá kvůli přetížení", ["priority"])
+
+trace_logger = logging.getLogger("laura.trace")
+if TRACE_ENABLED and TRACE_LOG_PATH:
+    _trace_file = data_path(TRACE_LOG_PATH)
+    os.makedirs(os.path.dirname(_trace_file), exist_ok=True)
+    _handler = logging.FileHandler(_trace_file, encoding="utf-8", delay=True)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    trace_logger.addHandler(_handler)
+    trace_logger.setLevel(logging.INFO)
+    trace_logger.propagate = False
+
+
+@dataclass
+class TurnTrace:
+    turn_id: str
+    session_id: Optional[str]
+    endpoint: str
+    started_at: float = field(default_factory=time.time)
+    duration_ms: float = 0.0
+    nodes: List[dict] = field(default_factory=list)
+    llm_calls: List[dict] = field(default_factory=list)
+    cache: List[dict] = field(default_factory=list)
+    # Čekání ve frontě plánovače LLM (jen nenulová)
+    queue: List[dict] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def cost_usd(self) -> float:
+        return round(sum(call["cost_usd"] for call in self.llm_calls), 6)
+
+
+_current_turn: contextvars.ContextVar[Optional[TurnTrace]] = contextvars.ContextVar("laura_turn", default=None)
+_current_node: contextvars.ContextVar[str] = contextvars.ContextVar("laura_node", default="-")
+
+
+def llm_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    # Model z odpovědi může mít suffix s datem verze (gpt-4o-2024-08-06)
+    prices = LLM_PRICES.get(model) or next((LLM_PRICES[name] for name in sorted(LLM_PRICES, key=len, reverse=True) if model.startswith(name)), None)
+    if prices is None:
+        return 0.0
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+@contextmanager
+def trace_turn(session_id: Optional[str], endpoint: str = "chat"):
+    """Obalí jeden tah konverzace; po skončení zapíše trace a metriku celého tahu."""
+    trace = TurnTrace(turn_id=uuid.uuid4().hex, session_id=session_id, endpoint=endpoint)
+    token = _current_turn.set(trace)
+    started = time.perf_counter()
+    try:
+        yield trace
+    except BaseException as e:
+        trace.error = repr(e)
+        raise
+    finally:
+        _current_turn.reset(token)
+        elapsed = time.perf_counter() - started
+        trace.duration_ms = round(elapsed * 1000, 2)
+        if Histogram is not None:
+            TURN_SECONDS.labels(endpoint).observe(elapsed)
+        if TRACE_ENABLED:
+            trace_logger.info(json.dumps({**asdict(trace), "cost_usd": trace.cost_usd}, ensure_ascii=False))
+
+
+def instrument_node(name: str):
+    """Dekorátor uzlu grafu: měří dobu běhu a počítá výjimky. Volání LLM uvnitř dostanou label uzlu."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            token = _current_node.set(name)
+            started = time.perf_counter()
+            error = None
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                error = repr(e)
+                if Counter is not None:
+                    NODE_ERRORS.labels(name).inc()
+                raise
+            finally:
+                _current_node.reset(token)
+                elapsed = time.perf_counter() - started
+                if Histogram is not None:
+                    NODE_SECONDS.labels(name).observe(elapsed)
+                trace = _current_turn.get()
+                if trace is not None:
+                    trace.nodes.append({"node": name, "ms": round(elapsed * 1000, 2), "error": error})
+        return wrapper
+    return decorator
+
+
+def record_llm_call(model: str, seconds: float, prompt_tokens: int, completion_tokens: int, estimated: bool = False, error: Optional[str] = None) -> None:
+    node = _current_node.get()
+    cost = llm_cost(model, prompt_tokens, completion_tokens)
+    if Histogram is not None:
+        LLM_SECONDS.labels(node, model).observe(seconds)
+        LLM_TOKENS.labels(node, model, "prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(node, model, "completion").inc(completion_tokens)
+        LLM_COST.labels(node, model).inc(cost)
+        if error:
+            LLM_ERRORS.labels(node, model).inc()
+    trace = _current_turn.get()
+    if trace is not None:
+        trace.llm_calls.append({
+            "node": node,
+            "model": model,
+            "ms": round(seconds * 1000, 2),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            # Poskytovatel nevrátil usage (např. falešný server) - tokeny jsou odhad
+            "estimated": estimated,
+            "cost_usd": round(cost, 6),
+            "error": error
+        })
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    result = "hit" if hit else "miss"
+    if Counter is not None:
+        CACHE_EVENTS.labels(cache, result).inc()
+    trace = _current_turn.get()
+    if trace is not None:
+        trace.cache.append({"cache": cache, "node": _current_node.get(), "result": result})
+
+
+def record_llm_queue(priority: str, seconds: float, shed: bool = False) -> None:
+    if Histogram is not None:
+        LLM_QUEUE_SECONDS.labels(priority).observe(seconds)
+        if shed:
+            LLM_SHED.labels(priority).inc()
+    trace = _current_turn.get()
+    if trace is not None and (shed or seconds >= 0.001):
+        trace.queue.append({"node": _current_node.get(), "priority": priority, "ms": round(seconds * 1000, 2), "shed": shed})
+
+
+def metrics_payload() -> Optional[tuple]:
+    """(tělo, content type) pro /metrics, nebo None bez prometheus_client."""
+    if generate_latest is None:
+        return None
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentil metodou nejbližšího pořadí."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def summarize_traces(traces: List[dict]) -> Dict[str, List[dict]]:
+    """Agregace trace logu pro report: latence tahů, uzlů a volání LLM (p50/p95), tokeny a cena."""
+    def latency_row(name: str, durations: List[float], **extra) -> dict:
+        return {
+            "name": name,
+            "count": len(durations),
+            "p50_ms": round(percentile(durations, 50), 2),
+            "p95_ms": round(percentile(durations, 95), 2),
+            "max_ms": round(max(durations), 2),
+            **extra
+        }
+
+    nodes: Dict[str, List[float]] = {}
+    node_errors: Dict[str, int] = {}
+    llm: Dict[str, dict] = {}
+    caches: Dict[str, Dict[str, int]] = {}
+    for trace in traces:
+        for node in trace.get("nodes", []):
+            nodes.setdefault(node["node"], []).append(node["ms"])
+            node_errors[node["node"]] = node_errors.get(node["node"], 0) + bool(node.get("error"))
+        for call in trace.get("llm_calls", []):
+            entry = llm.setdefault(f"{call['node']} / {call['model']}", {"ms": [], "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0})
+            entry["ms"].append(call["ms"])
+            entry["prompt_tokens"] += call["prompt_tokens"]
+            entry["completion_tokens"] += call["completion_tokens"]
+            entry["cost_usd"] += call["cost_usd"]
+        for event in trace.get("cache", []):
+            counts = caches.setdefault(event["cache"], {"hit": 0, "miss": 0})
+            counts[event["result"]] += 1
+
+    turns = [trace["duration_ms"] for trace in traces]
+    return {
+        "turns": [latency_row("turn", turns, errors=sum(bool(trace.get("error")) for trace in traces), cost_usd=round(sum(trace.get("cost_usd", 0.0) for trace in traces), 6))] if turns else [],
+        "nodes": sorted((latency_row(name, durations, errors=node_errors[name]) for name, durations in nodes.items()), key=lambda row: row["p95_ms"], reverse=True),
+        "llm": sorted((latency_row(name, entry["ms"], prompt_tokens=entry["prompt_tokens"], completion_tokens=entry["completion_tokens"], cost_usd=round(entry["cost_usd"], 6)) for name, entry in llm.items()), key=lambda row: row["p95_ms"], reverse=True),
+        "cache": [{"name": name, **counts} for name, counts in sorted(caches.items())]
+    }
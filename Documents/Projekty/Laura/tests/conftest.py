@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+# Laura není balíček - moduly importujeme přímo z její složky
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Testy běží bez sítě a bez souborů v pracovním adresáři: falešný model, dočasné databáze, trace jen do loggeru
+_tmp = tempfile.mkdtemp(prefix="laura-tests-")
+os.environ.setdefault("LAURA_LLM_MODE", "fake")
+os.environ.setdefault("LAURA_MEMO_DB", os.path.join(_tmp, "memo.sqlite3"))
+os.environ.setdefault("LAURA_BOOKINGS_DB", os.path.join(_tmp, "bookings.sqlite3"))
+os.environ.setdefault("LAURA_TRACE_LOG", "")
@@ -0,0 +1,92 @@
+"""
+Unit testy pro cache odpovědí větve "info".
+"""
+
+from answer_cache import AnswerCache, conversation_scope, normalize_questions
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_normalization_ignores_case_diacritics_and_order():
+    """
+    Test, že klíč nezávisí na velikosti písmen, diakritice, interpunkci ani pořadí otázek.
+    """
+    assert normalize_questions(["Jaké má David zkušenosti?", "Kde pracoval"]) == \
+        normalize_questions(["kde  pracoval", "jake ma david zkusenosti"])
+
+
+def test_exact_hit_and_resume_change():
+    """
+    Test přesné shody a zneplatnění po změně životopisu.
+    """
+    cache = AnswerCache(similarity_threshold=0)
+    cache.set(["Jaké má David zkušenosti?"], "hash1", "Odpověď")
+
+    assert cache.get(["jaké má david zkušenosti"], "hash1") == "Odpověď"
+    assert cache.get(["Jaké má David zkušenosti?"], "hash2") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_similar_question_hits_above_threshold():
+    """
+    Test, že téměř stejná otázka se najde přes podobnost trigramů a jiná otázka ne.
+    """
+    cache = AnswerCache(similarity_threshold=0.9)
+    cache.set(["Jaké má David zkušenosti s vedením týmu?"], "h", "Vedl týmy.")
+
+    assert cache.get(["Jaké zkušenosti má David s vedením týmu?"], "h") == "Vedl týmy."
+    assert cache.get(["Jaký je Davidův telefon?"], "h") is None
+    assert cache.stats()["similar_hits"] == 1
+
+
+def test_ttl_and_size_bounds():
+    """
+    Test vypršení TTL a vytlačení nejstarší položky při překročení velikosti.
+    """
+    clock = FakeClock()
+    cache = AnswerCache(ttl=60, max_entries=2, similarity_threshold=0, clock=clock)
+    cache.set(["a"], "h", "A")
+    cache.set(["b"], "h", "B")
+    cache.set(["c"], "h", "C")
+
+    assert cache.get(["a"], "h") is None
+    assert cache.stats()["evictions"] == 1
+
+    clock.now += 61
+    assert cache.get(["b"], "h") is None
+
+
+def test_similarity_is_opt_in_and_exact_only_lookup():
+    """
+    Test, že podobné dotazy se ve výchozím stavu nehledají a `exact_only` je vynechá i při zapnutém prahu.
+    """
+    cache = AnswerCache()
+    cache.set(["Jaké má David zkušenosti s vedením týmu?"], "h", "Vedl týmy.")
+    assert cache.get(["Jaké zkušenosti má David s vedením týmu?"], "h") is None
+
+    cache = AnswerCache(similarity_threshold=0.9)
+    cache.set(["Jaké má David zkušenosti s vedením týmu?"], "h", "Vedl týmy.")
+    assert cache.get(["Jaké zkušenosti má David s vedením týmu?"], "h", exact_only=True) is None
+    assert cache.get(["Jaké má David zkušenosti s vedením týmu"], "h", exact_only=True) == "Vedl týmy."
+
+
+def test_conversation_scope_separates_follow_ups():
+    """
+    Test, že stejná doplňující otázka v jiné konverzaci nenajde cizí odpověď.
+    """
+    cache = AnswerCache()
+    first = conversation_scope("h", None, ["Kde David pracoval?", "V bance."])
+    other = conversation_scope("h", None, ["Jaké jazyky umí?", "Python a Go."])
+    cache.set(["a co dál?"], first, "Pak ve startupu.")
+
+    assert conversation_scope("h", None, []) == "h"
+    assert conversation_scope("h", "shrnutí", []) != "h"
+    assert cache.get(["A co dál?"], first) == "Pak ve startupu."
+    assert cache.get(["a co dál?"], other) is None
@@ -0,0 +1,82 @@
+"""
+Benchmarky /chat proti falešnému modelu (pytest-benchmark, bez sítě).
+
+Počet volání LLM na tah a cache hlídá tests/test_llm_calls.py, který běží
+i bez pytest-benchmark. Spuštění jen benchmarků:
+    python -m pytest tests/test_bench_chat.py --benchmark-only
+"""
+
+import asyncio
+import uuid
+
+import httpx
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import api
+from llm_backends import Distribution, llm_transport
+
+
+@pytest.fixture(scope="module")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    """Falešný model bez latence, bez memo cache a s prázdnou cache odpovědí."""
+    transport = llm_transport()
+    if transport is None or not hasattr(transport, "calls_by_kind"):
+        pytest.skip("Benchmarky vyžadují LAURA_LLM_MODE=fake")
+    monkeypatch.setattr(api, "memo_cache", None)
+    monkeypatch.setattr(transport.fake, "latency", Distribution("const", 0.0))
+    monkeypatch.setattr(transport.fake, "tokens_per_second", Distribution("const", 0.0))
+    api.answer_cache.clear()
+    transport.reset()
+    return transport
+
+
+async def post_chat(message: str, session_id: str) -> dict:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://laura") as client:
+        response = await client.post("/chat", json={"message": message, "session_id": session_id, "date_now": "2026-10-18"})
+        response.raise_for_status()
+        return response.json()
+
+
+@pytest.mark.parametrize("message", [
+    "Jaké má David zkušenosti s vedením týmu?",
+    "Chci schůzku 20. 10. ve 14:00, e-mail jan@firma.cz, telefon 777 123 456, technická konzultace",
+])
+def test_chat_turn_latency(loop, fake, benchmark, message):
+    """
+    Latence celého tahu; dotaz na informace se při opakování už zodpoví z cache odpovědí.
+    """
+    benchmark(lambda: loop.run_until_complete(post_chat(message, uuid.uuid4().hex)))
+    benchmark.extra_info["llm_calls"] = fake.calls
+
+
+@pytest.mark.parametrize("sessions", [10, 50])
+def test_concurrent_sessions_throughput(loop, fake, benchmark, monkeypatch, sessions):
+    """
+    Propustnost N souběžných konverzací při 20 ms latenci modelu.
+    """
+    monkeypatch.setattr(fake.fake, "latency", Distribution("const", 0.02))
+    batches = []
+
+    async def round_of_turns():
+        batch = len(batches)
+        batches.append(batch)
+        await asyncio.gather(*(
+            post_chat(f"Kde David pracoval v roce {2000 + i % 20}? ({batch}/{i})", f"throughput-{sessions}-{i}")
+            for i in range(sessions)
+        ))
+
+    benchmark.pedantic(lambda: loop.run_until_complete(round_of_turns()), rounds=3, iterations=1)
+    benchmark.extra_info["sessions"] = sessions
+    if benchmark.stats:
+        benchmark.extra_info["turns_per_second"] = round(sessions / benchmark.stats.stats.mean, 1)
+    # Každý tah: router, extrakce otázek a odpověď (dotazy se neopakují)
+    assert fake.calls == 3 * sessions * len(batches)
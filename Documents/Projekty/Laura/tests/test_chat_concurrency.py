@@ -0,0 +1,81 @@
+"""
+Testy asynchronního běhu grafu: souběžné konverzace, strop souběžných volání LLM a cesta přes cache.
+"""
+
+import asyncio
+import time
+import uuid
+
+import httpx
+import pytest
+
+import api
+from limiter import LLMScheduler
+from llm_backends import Distribution, llm_transport
+
+LATENCY = 0.05
+SESSIONS = 12
+MAX_CONCURRENCY = 4
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    """Falešný model s pevnou latencí, plánovač s malým stropem a počítadlo souběžných volání."""
+    transport = llm_transport()
+    if transport is None or not hasattr(transport, "calls_by_kind"):
+        pytest.skip("Testy vyžadují LAURA_LLM_MODE=fake")
+    monkeypatch.setattr(api, "memo_cache", None)
+    monkeypatch.setattr(api, "llm_scheduler", LLMScheduler(max_concurrency=MAX_CONCURRENCY))
+    monkeypatch.setattr(transport.fake, "latency", Distribution("const", LATENCY))
+    monkeypatch.setattr(transport.fake, "tokens_per_second", Distribution("const", 0.0))
+    api.answer_cache.clear()
+    transport.reset()
+
+    transport.active = transport.peak = 0
+    handle = transport.handle_async_request
+
+    async def counting_handle(request):
+        transport.active += 1
+        transport.peak = max(transport.peak, transport.active)
+        try:
+            return await handle(request)
+        finally:
+            transport.active -= 1
+
+    monkeypatch.setattr(transport, "handle_async_request", counting_handle)
+    return transport
+
+
+async def post_chat(client: httpx.AsyncClient, message: str) -> dict:
+    response = await client.post("/chat", json={"message": message, "session_id": uuid.uuid4().hex, "date_now": "2026-10-18"})
+    response.raise_for_status()
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_turns_overlap_within_cap_and_repeat_from_cache(fake):
+    """
+    Test, že souběžné konverzace na sebe nečekají, drží strop souběžných volání LLM
+    a opakované dotazy se zodpoví z cache bez volání modelu.
+    """
+    questions = [f"Kde David pracoval v roce {2010 + i}?" for i in range(SESSIONS)]
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://laura") as client:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(post_chat(client, question) for question in questions))
+        elapsed = time.perf_counter() - started
+
+        # Router, extrakce otázek a odpověď pro každý tah
+        assert fake.calls == 3 * SESSIONS
+        assert all(result["topic"] == "info" and result["cached"] is False for result in results)
+        assert 1 < fake.peak <= MAX_CONCURRENCY
+        # Postupně by to trvalo 3 * SESSIONS * LATENCY (1,8 s), se stropem 4 zhruba čtvrtinu
+        assert elapsed < 3 * SESSIONS * LATENCY / 2
+        assert api.llm_scheduler.in_flight == 0
+
+        fake.reset()
+        cached = await asyncio.gather(*(post_chat(client, question) for question in questions))
+
+    assert fake.calls == 0
+    assert all(result["cached"] is True for result in cached)
+    assert [result["response"] for result in cached] == [result["response"] for result in results]
@@ -0,0 +1,78 @@
+"""
+Testy proudového endpointu /chat/stream proti falešnému modelu (bez sítě).
+"""
+
+import json
+import uuid
+
+import httpx
+import pytest
+
+import api
+from llm_backends import Distribution, llm_transport
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    """Falešný model bez latence, bez memo cache a s prázdnou cache odpovědí."""
+    transport = llm_transport()
+    if transport is None or not hasattr(transport, "calls_by_kind"):
+        pytest.skip("Testy streamu vyžadují LAURA_LLM_MODE=fake")
+    monkeypatch.setattr(api, "memo_cache", None)
+    monkeypatch.setattr(transport.fake, "latency", Distribution("const", 0.0))
+    monkeypatch.setattr(transport.fake, "tokens_per_second", Distribution("const", 0.0))
+    api.answer_cache.clear()
+    transport.reset()
+    return transport
+
+
+async def stream_chat(message: str, session_id: str) -> list:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://laura") as client:
+        async with client.stream(
+            "POST", "/chat/stream", json={"message": message, "session_id": session_id, "date_now": "2026-10-18"}
+        ) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            return [json.loads(line) async for line in response.aiter_lines() if line.strip()]
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_tokens_and_state_trailer(fake):
+    """
+    Test, že stream pošle tokeny odpovědi a na konci událost state s relací a tématem.
+    """
+    session_id = uuid.uuid4().hex
+    events = await stream_chat("Jaké má David zkušenosti s vedením týmu?", session_id)
+
+    tokens = [event for event in events if event["event"] == "token"]
+    assert tokens
+    assert all(event["content"] for event in tokens)
+    state = events[-1]
+    assert state["event"] == "state"
+    assert state["session_id"] == session_id
+    assert state["topic"] == "info"
+    assert state["cached"] is False
+    assert "".join(event["content"] for event in tokens) == state["response"]
+    assert sum(event["event"] == "state" for event in events) == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_answer_still_ends_with_state_trailer(fake):
+    """
+    Test, že odpověď z cache (bez volání modelu) stream také ukončí událostí state.
+    """
+    message = "Jaké jazyky David ovládá?"
+    first = await stream_chat(message, uuid.uuid4().hex)
+    fake.reset()
+
+    session_id = uuid.uuid4().hex
+    events = await stream_chat(message, session_id)
+
+    assert fake.calls == 0
+    assert not any(event["event"] == "error" for event in events)
+    state = events[-1]
+    assert state["event"] == "state"
+    assert state["session_id"] == session_id
+    assert state["topic"] == "info"
+    assert state["cached"] is True
+    assert state["response"] == first[-1]["response"]
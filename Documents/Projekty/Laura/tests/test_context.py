@@ -0,0 +1,87 @@
+"""
+Unit testy pro správu kontextového okna.
+"""
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from context import build_prompt, count_message_tokens, messages_to_fold
+
+
+def _conversation(turns: int) -> list:
+    messages = []
+    for i in range(turns):
+        messages.append(HumanMessage(content=f"Otázka číslo {i} " + "slovo " * 50))
+        messages.append(AIMessage(content=f"Odpověď číslo {i} " + "slovo " * 50))
+    return messages
+
+
+def test_messages_are_folded_in_batches():
+    """
+    Test, že shrnutí se spouští až po přetečení okna o celou dávku a ponechá posledních N výměn.
+    """
+    assert messages_to_fold(_conversation(5), keep_turns=4, batch_turns=2) == []
+    assert messages_to_fold(_conversation(6) + [HumanMessage(content="nová otázka")], keep_turns=4, batch_turns=2) == []
+
+    messages = _conversation(7) + [HumanMessage(content="nová otázka")]
+    folded = messages_to_fold(messages, keep_turns=4, batch_turns=2)
+    assert folded == messages[:6]
+
+
+def test_fold_keeps_whole_turns():
+    """
+    Test, že ponechané okno začíná otázkou uživatele - odpověď se nikdy neodtrhne od své otázky.
+    """
+    messages = _conversation(7) + [HumanMessage(content="nová otázka")]
+    kept = messages[len(messages_to_fold(messages, keep_turns=4, batch_turns=2)):]
+    assert isinstance(kept[0], HumanMessage)
+    assert len(kept) == 4 * 2 + 1
+
+    # Dvě zprávy Laury za sebou posunou řez na začátek výměny, ne doprostřed
+    messages = _conversation(7) + [AIMessage(content="doplnění"), HumanMessage(content="nová otázka")]
+    folded = messages_to_fold(messages, keep_turns=4, batch_turns=2)
+    assert folded == messages[:6]
+    assert isinstance(messages[len(folded)], HumanMessage)
+
+
+def test_build_prompt_respects_token_budget():
+    """
+    Test, že prompt nepřekročí rozpočet a poslední zpráva uživatele v něm zůstane.
+    """
+    system_msg = SystemMessage(content="Systém")
+    messages = _conversation(10) + [HumanMessage(content="Poslední otázka")]
+
+    prompt, tokens = build_prompt(system_msg, messages, summary="Shrnutí", budget=300)
+
+    assert tokens <= 300
+    assert tokens == count_message_tokens(prompt)
+    assert prompt[0] is system_msg
+    assert "Shrnutí" in prompt[1].content
+    assert prompt[-1].content == "Poslední otázka"
+    assert len(prompt) < len(messages) + 2
+
+
+def test_trimmed_history_never_starts_with_ai_message():
+    """
+    Test, že ořez podle rozpočtu vynechává celé výměny - historie v promptu nikdy nezačíná odpovědí Laury.
+    """
+    system_msg = SystemMessage(content="Systém")
+    messages = _conversation(6)
+    messages[5:5] = [AIMessage(content="doplnění " + "slovo " * 20)]
+    messages.append(HumanMessage(content="Poslední otázka"))
+    full = count_message_tokens([system_msg] + messages)
+
+    for budget in range(0, full + 20, 5):
+        prompt, tokens = build_prompt(system_msg, messages, budget=budget)
+        history = prompt[1:-1]
+        assert not history or isinstance(history[0], HumanMessage)
+        assert tokens <= budget or not history
+        assert tokens == count_message_tokens(prompt)
+
+
+def test_build_prompt_keeps_everything_within_budget():
+    """
+    Test, že krátká konverzace projde beze změny.
+    """
+    messages = _conversation(2)
+    prompt, _ = build_prompt(SystemMessage(content="Systém"), messages, budget=10_000)
+    assert prompt[1:] == messages
@@ -0,0 +1,109 @@
+import json
+import os
+import time
+
+import pytest
+
+from extractors import FAST_PATH_CONFIDENCE, extract_all, extract_date, extract_duration, extract_time, fast_extract, normalize, _parse_today
+
+DATE_NOW = "2026-10-18"  # neděle
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "extraction_corpus.json")
+# Odhad latence jednoho extrakčního volání LLM pro výpočet ušetřeného času
+LLM_CALL_MS = float(os.getenv("LAURA_LLM_CALL_MS", "800"))
+
+
+def load_corpus():
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("phrase, expected", [
+    ("zítra", "2026-10-19"),
+    ("pozítří", "2026-10-20"),
+    ("v pondělí", "2026-10-19"),
+    ("v neděli", "2026-10-25"),
+    ("za týden", "2026-10-25"),
+    ("za 3 dny", "2026-10-21"),
+    ("20. října", "2026-10-20"),
+    ("3. ledna", "2027-01-03"),
+    ("5.11.", "2026-11-05"),
+])
+def test_czech_relative_dates(phrase, expected):
+    """Relativní a česky psaná data se počítají od date_now."""
+    assert extract_date(normalize(phrase), _parse_today(DATE_NOW)).value == expected
+
+
+@pytest.mark.parametrize("phrase, expected", [
+    ("ve 14:00", "14:00"),
+    ("kolem 9.30", "09:30"),
+    ("v 10 hodin", "10:00"),
+    ("v poledne", "12:00"),
+])
+def test_times(phrase, expected):
+    """Čas se převádí na HH:MM."""
+    assert extract_time(normalize(phrase)).value == expected
+
+
+def test_clock_time_is_not_duration():
+    """'ve 14 hodin' je čas schůzky, ne její délka."""
+    assert extract_duration(normalize("ve 14 hodin na 2 hodiny")).value == 120
+
+
+@pytest.mark.parametrize("phrase, expected", [
+    ("dvacet pět minut", 25),
+    ("dvacet a pět minut", 25),
+    ("patnáct minut", 15),
+    ("čtyřicet minut", 40),
+    ("na hodinu", 60),
+    ("za hodinu", None),
+    ("za 20 minut", None),
+    ("za dvě hodiny", None),
+])
+def test_durations(phrase, expected):
+    """Složené číslovky se sečtou celé a 'za hodinu' je okamžik, ne délka schůzky."""
+    found = extract_duration(normalize(phrase))
+    assert (found.value if found else None) == expected
+
+
+def test_ambiguous_values_stay_below_threshold():
+    """Nejednoznačné údaje ('ve 2') nepřekročí práh a zůstanou na LLM."""
+    found, needs_llm = fast_extract("za týden ve 2", DATE_NOW)
+
+    assert extract_all("za týden ve 2", DATE_NOW)["meeting_time"].confidence < FAST_PATH_CONFIDENCE
+    assert "meeting_time" not in found
+    assert needs_llm is True
+
+
+def test_plain_request_does_not_need_llm():
+    """Zpráva bez jakýchkoliv údajů nevyžaduje extrakční volání LLM."""
+    assert fast_extract("Chci si domluvit schůzku", DATE_NOW) == ({}, False)
+
+
+def test_corpus_hit_rate_and_latency():
+    """Na korpusu zpráv měří úspěšnost lokální extrakce a ušetřená volání LLM."""
+    corpus = load_corpus()
+    expected_fields = hits = wrong = llm_calls_avoided = 0
+
+    start = time.perf_counter()
+    for case in corpus:
+        found, needs_llm = fast_extract(case["message"], DATE_NOW)
+        for key, value in found.items():
+            if case["expected"].get(key) != value:
+                wrong += 1
+        for key, value in case["expected"].items():
+            expected_fields += 1
+            hits += found.get(key) == value
+        if not needs_llm:
+            llm_calls_avoided += 1
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    hit_rate = hits / expected_fields
+    print(
+        f"\nFast-path: úspěšnost {hit_rate:.0%} ({hits}/{expected_fields}), chybné hodnoty {wrong}, "
+        f"bez LLM {llm_calls_avoided}/{len(corpus)} zpráv, lokálně {elapsed_ms / len(corpus):.3f} ms/zprávu, "
+        f"ušetřeno ~{llm_calls_avoided * LLM_CALL_MS:.0f} ms"
+    )
+    assert wrong == 0
+    assert hit_rate >= 0.9
+    assert llm_calls_avoided >= len(corpus) // 2
+    assert elapsed_ms / len(corpus) < 5
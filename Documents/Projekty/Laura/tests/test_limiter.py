@@ -0,0 +1,220 @@
+"""
+Unit testy pro plánovač volání LLM (priority, token bucket, 429, shazování zátěže).
+"""
+
+import asyncio
+import random
+import time
+
+import httpx
+import openai
+import pytest
+from langchain_core.messages import HumanMessage
+from langchain_openai import ChatOpenAI
+
+import api
+from limiter import PRIORITY_ANSWER, PRIORITY_BACKGROUND, LLMOverloadedError, LLMScheduler, TokenBucket
+from llm_backends import OFFLINE_BASE_URL, Distribution, FakeOpenAI, FakeOpenAITransport, llm_transport
+
+
+class RateLimited(Exception):
+    status_code = 429
+    response = None
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_refill_and_debt():
+    """
+    Test, že kbelík se plynule doplňuje a skutečná spotřeba nad odhad vytvoří dluh.
+    """
+    clock = FakeClock()
+    bucket = TokenBucket(600, clock)
+    bucket.take(600)
+    assert bucket.wait_time(10) == pytest.approx(1.0)
+    clock.now = 1.0
+    assert bucket.wait_time(10) == 0.0
+    bucket.adjust(110)
+    assert bucket.wait_time(10) == pytest.approx(11.0)
+
+
+@pytest.mark.asyncio
+async def test_answers_go_before_background_calls():
+    """
+    Test, že odpověď uživateli předběhne dříve zařazené interní klasifikace.
+    """
+    scheduler = LLMScheduler(max_concurrency=1)
+    order = []
+    release = asyncio.Event()
+
+    async def blocker():
+        await release.wait()
+
+    def call(name):
+        async def run():
+            order.append(name)
+        return run
+
+    first = asyncio.create_task(scheduler.run(blocker))
+    await asyncio.sleep(0)
+    waiting = [
+        asyncio.create_task(scheduler.run(call("background-1"), PRIORITY_BACKGROUND)),
+        asyncio.create_task(scheduler.run(call("background-2"), PRIORITY_BACKGROUND)),
+        asyncio.create_task(scheduler.run(call("answer"), PRIORITY_ANSWER)),
+    ]
+    await asyncio.sleep(0.01)
+    assert scheduler.stats()["queued"] == 3
+
+    release.set()
+    await asyncio.gather(first, *waiting)
+    assert order == ["answer", "background-1", "background-2"]
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_tokens_per_minute_limit_delays_calls():
+    """
+    Test, že vyčerpaný limit tokenů za minutu pozdrží další volání, dokud se kbelík nedoplní.
+    """
+    scheduler = LLMScheduler(tokens_per_minute=600)
+
+    async def call():
+        return "ok"
+
+    await scheduler.run(call, estimated_tokens=600)
+    started = time.monotonic()
+    await scheduler.run(call, estimated_tokens=3)
+    # 10 tokenů za sekundu -> 3 tokeny zhruba za 0,3 s
+    assert 0.2 <= time.monotonic() - started < 1.0
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_is_retried_with_backoff():
+    """
+    Test, že 429 se zopakuje s jitterem a po vyčerpání pokusů propadne jako přetížení.
+    """
+    scheduler = LLMScheduler(max_retries=2, backoff_base=0.01, rng=random.Random(1))
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimited()
+        return "ok"
+
+    assert await scheduler.run(flaky) == "ok"
+    assert scheduler.stats()["retries"] == 2
+
+    async def always_limited():
+        raise RateLimited()
+
+    with pytest.raises(LLMOverloadedError) as error:
+        await scheduler.run(always_limited)
+    assert isinstance(error.value.__cause__, RateLimited)
+    assert error.value.retry_after == 5.0
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried_without_pausing_others():
+    """
+    Test, že timeout, výpadek spojení a 5xx se zopakují, jiné chyby ne, a ostatní volání se kvůli nim nepozastaví.
+    """
+    scheduler = LLMScheduler(max_retries=3, backoff_base=0.01, rng=random.Random(1))
+    request = httpx.Request("POST", OFFLINE_BASE_URL)
+    errors = [
+        openai.APITimeoutError(request=request),
+        openai.InternalServerError("Chyba serveru", response=httpx.Response(503, request=request), body=None),
+        httpx.ConnectError("Spojení odmítnuto")
+    ]
+
+    async def flaky():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    assert await scheduler.run(flaky) == "ok"
+    assert scheduler.stats()["transient_errors"] == 3
+    assert scheduler.stats()["rate_limited"] == 0
+    assert scheduler._paused_until == 0.0
+
+    attempts = []
+
+    async def bad_request():
+        attempts.append(1)
+        raise openai.BadRequestError("Špatný požadavek", response=httpx.Response(400, request=request), body=None)
+
+    with pytest.raises(openai.BadRequestError):
+        await scheduler.run(bad_request)
+    assert len(attempts) == 1
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_from_openai_client_is_retried():
+    """
+    Test, že 429 vrácené OpenAI klientem (falešný model) plánovač pozná a zopakuje.
+    """
+    transport = FakeOpenAITransport(FakeOpenAI(seed=3, rate_limit_rate=0.5))
+    model = ChatOpenAI(model="gpt-4o", api_key="test", base_url=OFFLINE_BASE_URL, max_retries=0, http_async_client=httpx.AsyncClient(transport=transport))
+    scheduler = LLMScheduler(max_retries=10, backoff_base=0.001)
+
+    for _ in range(5):
+        response = await scheduler.run(lambda: model.ainvoke([HumanMessage(content="Ahoj")]))
+        assert response.content.startswith("Falešná odpověď")
+    assert transport.rate_limited > 0
+    assert scheduler.stats()["rate_limited"] == transport.rate_limited
+
+
+@pytest.mark.asyncio
+async def test_queue_deadline_sheds_load():
+    """
+    Test, že kdo čeká ve frontě déle než deadline, dostane LLMOverloadedError se srozumitelnou zprávou.
+    """
+    scheduler = LLMScheduler(max_concurrency=1, queue_deadline=0.05)
+    release = asyncio.Event()
+
+    async def blocker():
+        await release.wait()
+
+    first = asyncio.create_task(scheduler.run(blocker))
+    await asyncio.sleep(0)
+    with pytest.raises(LLMOverloadedError) as error:
+        await scheduler.run(blocker)
+    assert "zkuste to" in str(error.value).lower()
+    assert scheduler.stats()["shed"] == 1
+
+    release.set()
+    await first
+    assert scheduler.stats()["in_flight"] == 0
+    assert scheduler.stats()["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_exhausted_rate_limit_returns_503_with_retry_after(monkeypatch):
+    """
+    Test, že 429 i po všech pokusech vrátí z /chat 503 s Retry-After a srozumitelnou zprávou, ne 500 s textem poskytovatele.
+    """
+    transport = llm_transport()
+    if transport is None or not hasattr(transport, "calls_by_kind"):
+        pytest.skip("Test vyžaduje LAURA_LLM_MODE=fake")
+    monkeypatch.setattr(api, "memo_cache", None)
+    monkeypatch.setattr(api, "llm_scheduler", LLMScheduler(max_retries=2, backoff_base=0.001))
+    monkeypatch.setattr(transport.fake, "latency", Distribution("const", 0.0))
+    monkeypatch.setattr(transport.fake, "rate_limit_rate", 1.0)
+    api.answer_cache.clear()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://laura") as client:
+        response = await client.post("/chat", json={"message": "Kde David pracoval?", "session_id": "rate-limited", "date_now": "2026-10-18"})
+
+    assert response.status_code == 503
+    assert int(response.headers["retry-after"]) >= 1
+    assert "zkuste to" in response.json()["detail"].lower()
+    assert "rate limit" not in response.json()["detail"].lower()
+    assert api.llm_scheduler.stats()["rate_limited"] == 2
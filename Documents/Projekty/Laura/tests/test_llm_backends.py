@@ -0,0 +1,104 @@
+"""
+Unit testy pro falešný model a nahrávání/přehrávání volání LLM.
+"""
+
+import random
+
+import httpx
+import openai
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_openai import ChatOpenAI
+from pydantic import BaseModel
+
+from llm_backends import OFFLINE_BASE_URL, Distribution, FakeOpenAI, FakeOpenAITransport, RecordingTransport, ReplayTransport
+from prompts import PROMPT_TOPIC_TYPE
+
+
+class Fields(BaseModel):
+    meeting_time: str | None = None
+
+
+def make_model(transport: httpx.AsyncBaseTransport) -> ChatOpenAI:
+    return ChatOpenAI(
+        model="gpt-4o",
+        temperature=0,
+        stream_usage=True,
+        api_key="test",
+        base_url=OFFLINE_BASE_URL,
+        http_async_client=httpx.AsyncClient(transport=transport)
+    )
+
+
+def test_distributions():
+    """
+    Test parsování rozdělení a deterministického vzorkování se seedem.
+    """
+    assert Distribution.parse("0.2").sample(random.Random(1)) == 0.2
+    uniform = Distribution.parse("uniform:0.1:0.3")
+    samples = [uniform.sample(random.Random(7)) for _ in range(3)]
+    assert samples[0] == samples[1] == samples[2]
+    assert 0.1 <= samples[0] <= 0.3
+    assert Distribution.parse("normal:0:1").sample(random.Random(3)) >= 0.0
+    with pytest.raises(ValueError):
+        Distribution.parse("gamma:1:2")
+
+
+@pytest.mark.asyncio
+async def test_fake_model_answers_like_openai():
+    """
+    Test, že falešný model odpoví routeru, vrátí usage, strukturovaný výstup i stream.
+    """
+    transport = FakeOpenAITransport(FakeOpenAI(answer_tokens=5))
+    model = make_model(transport)
+
+    routed = await model.ainvoke([SystemMessage(content=PROMPT_TOPIC_TYPE), HumanMessage(content="Chci domluvit schůzku")])
+    assert routed.content == "date"
+    assert routed.usage_metadata["input_tokens"] > 0
+
+    structured = await model.with_structured_output(Fields, include_raw=True).ainvoke([HumanMessage(content="ve 14:00")])
+    assert structured["parsed"] == Fields()
+
+    chunks = [chunk async for chunk in model.astream([HumanMessage(content="Ahoj")])]
+    assert "".join(chunk.content for chunk in chunks) == "Falešná odpověď asistentky. slovo slovo"
+    assert transport.calls == 3
+    assert transport.calls_by_kind == {"router": 1, "extract": 1, "answer": 1}
+
+
+@pytest.mark.asyncio
+async def test_record_and_replay(tmp_path):
+    """
+    Test, že nahraná konverzace se přehraje bez původního backendu a neznámý požadavek selže.
+    """
+    cassette = str(tmp_path / "cassette.jsonl")
+    messages = [SystemMessage(content=PROMPT_TOPIC_TYPE), HumanMessage(content="Kde David pracoval?")]
+
+    recorded = await make_model(RecordingTransport(FakeOpenAITransport(FakeOpenAI()), cassette)).ainvoke(messages)
+    replay = ReplayTransport(cassette)
+    replayed = await make_model(replay).ainvoke(messages)
+    assert replayed.content == recorded.content == "info"
+
+    with pytest.raises(openai.NotFoundError):
+        await make_model(replay).ainvoke([HumanMessage(content="Tohle nikdo nenahrál")])
+    assert replay.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_recording_passes_stream_through_while_recording(tmp_path):
+    """
+    Test, že při nahrávání přichází stream tokenů průběžně a záznam se zapíše až po jeho dočtení.
+    """
+    cassette = tmp_path / "cassette.jsonl"
+    fake = FakeOpenAI(answer_tokens=5, latency=Distribution("const", 0.0), tokens_per_second=Distribution("const", 50.0))
+    model = make_model(RecordingTransport(FakeOpenAITransport(fake), str(cassette)))
+
+    chunks = []
+    async for chunk in model.astream([HumanMessage(content="Ahoj")]):
+        if chunk.content and not chunks:
+            # První token dorazil, ale odpověď ještě není celá, takže ani nahraná
+            assert not cassette.exists()
+        chunks.append(chunk)
+
+    assert len([chunk for chunk in chunks if chunk.content]) > 1
+    replayed = [chunk async for chunk in make_model(ReplayTransport(str(cassette))).astream([HumanMessage(content="Ahoj")])]
+    assert "".join(chunk.content for chunk in replayed) == "".join(chunk.content for chunk in chunks)
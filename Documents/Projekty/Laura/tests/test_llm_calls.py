@@ -0,0 +1,75 @@
+"""
+Počet volání LLM na tah proti falešnému modelu (bez sítě). Regrese typu
+"extrakce navíc" nebo odpověď z cizí konverzace tak spadne v CI i bez pytest-benchmark.
+"""
+
+import uuid
+
+import httpx
+import pytest
+
+import api
+from llm_backends import Distribution, llm_transport
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    """Falešný model bez latence, bez memo cache a s prázdnou cache odpovědí."""
+    transport = llm_transport()
+    if transport is None or not hasattr(transport, "calls_by_kind"):
+        pytest.skip("Testy vyžadují LAURA_LLM_MODE=fake")
+    monkeypatch.setattr(api, "memo_cache", None)
+    monkeypatch.setattr(transport.fake, "latency", Distribution("const", 0.0))
+    monkeypatch.setattr(transport.fake, "tokens_per_second", Distribution("const", 0.0))
+    api.answer_cache.clear()
+    transport.reset()
+    return transport
+
+
+async def post_chat(message: str, session_id: str) -> dict:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://laura") as client:
+        response = await client.post("/chat", json={"message": message, "session_id": session_id, "date_now": "2026-10-18"})
+        response.raise_for_status()
+        return response.json()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("message, expected_calls", [
+    # Router, extrakce otázek, odpověď
+    ("Jaké má David zkušenosti s vedením týmu?", {"router": 1, "questions": 1, "answer": 1}),
+    # Všechny údaje najdou lokální extraktory - router a odpověď, žádná LLM extrakce
+    ("Chci schůzku 20. 10. ve 14:00, e-mail jan@firma.cz, telefon 777 123 456, technická konzultace", {"router": 1, "answer": 1}),
+])
+async def test_llm_calls_per_turn(fake, message, expected_calls):
+    """
+    Test, že jeden tah volá LLM přesně tolikrát, kolikrát má.
+    """
+    # Nová relace - bez historie, kterou by uzel kontextu balil do shrnutí
+    await post_chat(message, uuid.uuid4().hex)
+    assert dict(fake.calls_by_kind) == expected_calls
+
+
+@pytest.mark.asyncio
+async def test_repeated_question_skips_llm(fake):
+    """
+    Test, že doslova zopakovaný dotaz se zodpoví bez jediného volání LLM.
+    """
+    await post_chat("Jaké jazyky David ovládá?", "repeat-a")
+    fake.reset()
+    result = await post_chat("Jaké jazyky David ovládá?", "repeat-b")
+    assert result["cached"] is True
+    assert fake.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_follow_up_does_not_reuse_other_conversation_answer(fake):
+    """
+    Test, že stejná doplňující otázka v jiné konverzaci se nezodpoví z cache.
+    """
+    await post_chat("Kde David pracoval?", "follow-up-a")
+    await post_chat("A jaké technologie tam používal?", "follow-up-a")
+    await post_chat("Jaké jazyky David ovládá?", "follow-up-b")
+    fake.reset()
+    result = await post_chat("A jaké technologie tam používal?", "follow-up-b")
+    assert result["cached"] is False
+    assert fake.calls_by_kind["answer"] == 1
@@ -0,0 +1,106 @@
+"""
+Testy extrakce údajů o schůzce: lokální extraktory doplněné jedním voláním se strukturovaným výstupem.
+"""
+
+import uuid
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage
+
+import api
+from api import MeetingFields
+
+DATE_NOW = "2026-10-18"
+MESSAGE = "Chtěl bych schůzku 20. 10. 2026 v 10:00, kvůli projektu"
+
+
+class StubExtractor:
+    """Místo modelu vrací pevně daná pole a počítá volání."""
+
+    def __init__(self, **fields):
+        self.fields = MeetingFields(**fields)
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return {"parsed": self.fields, "raw": AIMessage(content=self.fields.model_dump_json())}
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Extraktor s nenulovými poli - jiné datum a čas než ve zprávě, navíc typ a e-mail."""
+    extractor = StubExtractor(
+        meeting_type="technical_consultation",
+        meeting_date="2026-11-02",
+        meeting_time="15:30",
+        meeting_email="jana@example.com",
+    )
+    monkeypatch.setattr(api, "meeting_extractor", extractor)
+    monkeypatch.setattr(api, "memo_cache", None)
+    api.answer_cache.clear()
+    return extractor
+
+
+def empty_fields() -> dict:
+    return {key: None for key in api.MEETING_FIELDS} | {"meeting_duration": 60}
+
+
+@pytest.mark.asyncio
+async def test_llm_fills_only_fields_missing_after_regex(stub):
+    """
+    Test, že LLM doplní jen pole, která lokální extraktory nenašly - datum a čas
+    ze zprávy zůstanou, typ a e-mail přijdou ze strukturovaného výstupu.
+    """
+    res = await api.extract_meeting_fields(MESSAGE, DATE_NOW, empty_fields())
+
+    assert stub.calls == 1
+    assert res["meeting_date"] == "2026-10-20"
+    assert res["meeting_time"] == "10:00"
+    assert res["meeting_type"] == "technical_consultation"
+    assert res["meeting_email"] == "jana@example.com"
+    assert res["meeting_phone"] is None
+    assert res["meeting_duration"] == 60
+
+
+@pytest.mark.asyncio
+async def test_llm_does_not_overwrite_stored_fields(stub):
+    """
+    Test, že hodnoty z předchozích tahů LLM nepřepíše a bez chybějících polí se model nevolá.
+    """
+    stored = empty_fields() | {
+        "meeting_type": "initial",
+        "meeting_email": "petr@example.com",
+        "meeting_phone": "+420777123456",
+    }
+    res = await api.extract_meeting_fields(MESSAGE, DATE_NOW, dict(stored))
+
+    assert stub.calls == 0
+    assert res["meeting_type"] == "initial"
+    assert res["meeting_email"] == "petr@example.com"
+    assert res["meeting_date"] == "2026-10-20"
+
+    partial = stored | {"meeting_email": None}
+    res = await api.extract_meeting_fields(MESSAGE, DATE_NOW, partial)
+
+    assert stub.calls == 1
+    assert res["meeting_type"] == "initial"
+    assert res["meeting_email"] == "jana@example.com"
+
+
+@pytest.mark.asyncio
+async def test_chat_turn_extracts_meeting_fields_once(stub):
+    """
+    Test, že tah o schůzce zavolá extraktor jen jednou v routeru a uzel
+    scheduling už údaje znovu nevytahuje.
+    """
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://laura") as client:
+        response = await client.post("/chat", json={"message": MESSAGE, "session_id": uuid.uuid4().hex, "date_now": DATE_NOW})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["topic"] == "date"
+    assert stub.calls == 1
+    assert body["meeting_type"] == "technical_consultation"
+    assert body["meeting_email"] == "jana@example.com"
+    assert body["meeting_date"] == "2026-10-20"
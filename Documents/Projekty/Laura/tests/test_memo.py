@@ -0,0 +1,86 @@
+"""
+Unit testy pro memo cache klasifikačních volání.
+"""
+
+import os
+
+import pytest
+
+import paths
+from memo import MemoCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        self.now += 1
+        return self.now
+
+
+def test_key_depends_on_prompt_and_normalized_message():
+    """
+    Test, že klíč ignoruje velikost písmen a mezery, ale ne prompt.
+    """
+    assert MemoCache.make_key("prompt", "  V pondělí ") == MemoCache.make_key("prompt", "v  pondělí")
+    assert MemoCache.make_key("prompt A", "ano") != MemoCache.make_key("prompt B", "ano")
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction(tmp_path):
+    """
+    Test, že při překročení velikosti se vyhodí nejdéle nepoužitá položka.
+    """
+    cache = MemoCache(str(tmp_path / "memo.sqlite3"), max_entries=2, clock=FakeClock())
+    await cache.set("a", "A")
+    await cache.set("b", "B")
+    assert await cache.get("a") == "A"
+    await cache.set("c", "C")
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == "A"
+    assert (await cache.stats())["evictions"] == 1
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_cache_and_stats_are_shared_between_instances(tmp_path):
+    """
+    Test, že dvě instance nad stejným souborem (dva workery) sdílí data i statistiky.
+    """
+    path = str(tmp_path / "memo.sqlite3")
+    worker_a = MemoCache(path)
+    worker_b = MemoCache(path)
+
+    assert await worker_a.get("key") is None
+    await worker_a.set("key", "date")
+    assert await worker_b.get("key") == "date"
+
+    stats = await worker_a.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["llm_calls_avoided"] == 1
+    worker_a.close()
+    worker_b.close()
+
+
+@pytest.mark.asyncio
+async def test_database_opens_lazily_in_data_dir(tmp_path, monkeypatch):
+    """
+    Test, že relativní cesta nezávisí na pracovním adresáři a soubor vznikne až při prvním použití.
+    """
+    monkeypatch.chdir(tmp_path)
+    assert paths.data_path("memo.sqlite3") == os.path.join(os.path.dirname(os.path.abspath(paths.__file__)), "memo.sqlite3")
+    assert paths.data_path(str(tmp_path / "memo.sqlite3")) == str(tmp_path / "memo.sqlite3")
+
+    path = tmp_path / "data" / "memo.sqlite3"
+    path.parent.mkdir()
+    cache = MemoCache(str(path))
+    assert not path.exists()
+
+    await cache.set("a", "A")
+    assert path.exists()
+    assert await cache.get("a") == "A"
+    cache.close()
+    cache.close()
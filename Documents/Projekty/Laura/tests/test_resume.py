@@ -0,0 +1,165 @@
+"""
+Unit testy pro cache a vyhledávání v životopise.
+"""
+
+import json
+import os
+
+from resume import BM25Index, Resume, ResumeStore, tokenize
+
+RESUME = {
+    "person": {"full_name": "David Kunz", "contact": {"phone": "606 243 770", "email": "d.kunz@email.cz"}},
+    "profile_summary": {"short": "Projektové řízení a vedení týmů."},
+    "experience": [
+        {"company": "Firma A", "position": "Konzultant", "period": {"from": "2022-01", "to": "2024-06"}},
+        {"company": "Firma B", "position": "Vedoucí oddělení", "period": {"from": "2015-07", "to": "2018-06"}},
+    ],
+    "skills": {"leadership": ["vedení týmu"]},
+    "languages": [{"language": "Angličtina", "level": "Pokročilá"}],
+    "certifications": [{"name": "Scrum Master II"}],
+}
+
+
+def _write_resume(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def test_resume_is_cached_until_file_changes(tmp_path):
+    """
+    Test, že se životopis načte jednou a znovu až po změně mtime souboru.
+    """
+    path = tmp_path / "resume.json"
+    _write_resume(path, RESUME)
+    store = ResumeStore(str(path))
+
+    first = store.get()
+    assert store.get() is first
+    assert store.loads == 1
+
+    _write_resume(path, {**RESUME, "certifications": [{"name": "PMP"}]})
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert "PMP" in store.get().relevant_context(["certifikace"])
+    assert store.loads == 2
+
+
+def test_search_returns_only_relevant_sections(tmp_path):
+    """
+    Test, že do kontextu jdou jen sekce relevantní k otázkám.
+    """
+    path = tmp_path / "resume.json"
+    _write_resume(path, RESUME)
+    resume = ResumeStore(str(path)).get()
+
+    assert [s.id for s in resume.search(["Jaké má David certifikace?"])] == ["certifications"]
+    assert [s.id for s in resume.search(["Kde pracoval v roce 2016?"])] == ["experience:1"]
+    assert [s.id for s in resume.search(["Jaký má telefon?", "Jak mluví anglicky?"])] == ["contact", "languages"]
+
+
+def test_unmatched_question_falls_back_to_whole_resume(tmp_path):
+    """
+    Test, že bez shody dostane model celý životopis.
+    """
+    path = tmp_path / "resume.json"
+    _write_resume(path, RESUME)
+    resume = ResumeStore(str(path)).get()
+
+    assert resume.relevant_context(["Jaké je dnes počasí?"]) == resume.render()
+
+
+def test_missing_file_returns_none(tmp_path):
+    """
+    Test, že chybějící soubor neshodí aplikaci.
+    """
+    assert ResumeStore(str(tmp_path / "missing.json")).get() is None
+
+
+def test_bm25_ranks_by_term_frequency_rarity_and_length():
+    """
+    Test, že BM25 upřednostní vzácnější termín, častější výskyt a kratší dokument a bez shody vrátí nulu.
+    """
+    index = BM25Index([
+        ["scrum", "tym", "vedeni"],
+        ["scrum", "scrum", "tym"],
+        ["scrum", "tym", "vedeni", "rozpoc", "projek", "planov"],
+        ["jazyky", "anglic"],
+    ])
+
+    scores = index.scores(["scrum"])
+    assert scores[1] > scores[0] > scores[2] > 0
+    assert scores[3] == 0
+    # "vedeni" je vzácnější než "tym", proto váží víc
+    assert index.scores(["vedeni"])[0] > index.scores(["tym"])[0]
+    assert index.scores(["neexistuje"]) == [0.0, 0.0, 0.0, 0.0]
+
+
+def test_search_limits_sections_by_count_and_relative_score():
+    """
+    Test, že vyhledávání bere nejvýš `max_sections` sekcí a jen ty, které se blíží nejlepší shodě.
+    """
+    resume = Resume(RESUME)
+    question = ["Jaké má zkušenosti s vedením týmu a kde pracoval?"]
+
+    everything = resume.search(question, max_sections=10, min_relative_score=0.0001)
+    assert len(everything) > 2
+    assert len(resume.search(question, max_sections=1, min_relative_score=0.0001)) == 1
+    best_only = resume.search(question, max_sections=10, min_relative_score=1.0)
+    assert 1 <= len(best_only) < len(everything)
+    # Výsledek je v pořadí sekcí v životopise, ne podle skóre
+    order = [section.id for section in resume.sections]
+    assert [section.id for section in everything] == sorted((section.id for section in everything), key=order.index)
+
+
+def test_tokenize_stems_czech_word_forms():
+    """
+    Test, že různé pády téhož slova a slova bez diakritiky dají stejné tokeny a stop slova se zahodí.
+    """
+    assert tokenize("zkušenosti") == tokenize("zkušenostech") == tokenize("ZKUSENOSTI")
+    assert tokenize("Jaké má David") == []
+
+
+def test_fallback_to_whole_resume_without_usable_question():
+    """
+    Test, že bez otázek nebo jen se stop slovy dostane model celý životopis a s relevantní otázkou méně.
+    """
+    resume = Resume(RESUME)
+
+    assert resume.relevant_context([]) == resume.render()
+    assert resume.relevant_context(["Jaké má David?"]) == resume.render()
+    assert len(resume.relevant_context(["Jaké má certifikace?"])) < len(resume.render())
+
+
+def test_reload_only_on_mtime_change_and_recovery_from_bad_file(tmp_path):
+    """
+    Test, že změna obsahu bez změny mtime se nenačte, nový obsah změní hash a rozbitý nebo smazaný soubor vrátí None.
+    """
+    path = tmp_path / "resume.json"
+    _write_resume(path, RESUME)
+    store = ResumeStore(str(path))
+    first = store.get()
+    stat = os.stat(path)
+
+    # Stejné mtime - žádné zbytečné čtení souboru
+    _write_resume(path, {**RESUME, "certifications": [{"name": "PMP"}]})
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert store.get() is first
+    assert store.loads == 1
+
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    second = store.get()
+    assert second is not first
+    assert second.content_hash != first.content_hash
+    assert store.loads == 2
+
+    path.write_text("{rozbitý json", encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000))
+    assert store.get() is None
+
+    _write_resume(path, RESUME)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 3_000_000))
+    assert store.get().content_hash == first.content_hash
+
+    path.unlink()
+    assert store.get() is None
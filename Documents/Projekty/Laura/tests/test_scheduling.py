@@ -0,0 +1,190 @@
+"""
+Unit testy pro dostupnost kalendáře a rezervace schůzek.
+"""
+
+import os
+import threading
+from datetime import datetime
+
+import paths
+import scheduling
+from scheduling import AvailabilityEngine, earliest_start, parse_meeting_start, parse_minutes, pick_offered_slots
+
+MONDAY = "2026-10-19"
+SATURDAY = "2026-10-24"
+
+
+def make_engine(tmp_path, **kwargs) -> AvailabilityEngine:
+    return AvailabilityEngine(str(tmp_path / "bookings.sqlite3"), **kwargs)
+
+
+def test_empty_day_respects_working_hours_and_duration(tmp_path):
+    """
+    Test, že prázdný den nabízí začátky po 15 minutách a schůzka skončí nejpozději s koncem pracovní doby.
+    """
+    engine = make_engine(tmp_path)
+    slots = engine.free_slots(MONDAY, 90)
+    assert slots[0] == "09:00"
+    assert slots[1] == "09:15"
+    assert slots[-1] == "15:30"
+    assert engine.free_slots(SATURDAY, 60) == []
+
+
+def test_bookings_block_time_including_buffer(tmp_path):
+    """
+    Test, že rezervace zablokuje svůj čas i buffer před a za sebou.
+    """
+    engine = make_engine(tmp_path)
+    assert engine.book(MONDAY, parse_minutes("10:00"), 60) is not None
+
+    slots = engine.free_slots(MONDAY, 30)
+    # 09:30-10:00 by nedodrželo 15 minut před schůzkou, 11:00 za ní
+    assert "09:15" in slots
+    assert "09:30" not in slots
+    assert "11:00" not in slots
+    assert "11:15" in slots
+    assert not engine.is_free(MONDAY, parse_minutes("10:30"), 30)
+    assert engine.is_free(MONDAY, parse_minutes("11:15"), 30)
+
+
+def test_conflicting_booking_is_rejected(tmp_path):
+    """
+    Test, že překrývající se rezervace i rezervace mimo pracovní dobu se odmítnou.
+    """
+    engine = make_engine(tmp_path)
+    assert engine.book(MONDAY, parse_minutes("14:00"), 60) is not None
+    assert engine.book(MONDAY, parse_minutes("14:30"), 60) is None
+    assert engine.book(MONDAY, parse_minutes("16:30"), 60) is None
+    assert engine.book(SATURDAY, parse_minutes("10:00"), 60) is None
+
+
+def test_next_free_slot_skips_full_days_and_weekend(tmp_path):
+    """
+    Test, že nejbližší volný 90minutový termín přeskočí plný den i víkend.
+    """
+    engine = make_engine(tmp_path, buffer=0)
+    friday = "2026-10-23"
+    engine.book(friday, parse_minutes("09:00"), 8 * 60)
+
+    assert engine.next_free_slot(friday, 90) == ("2026-10-26", "09:00")
+    assert engine.next_free_slot(friday, 90, until_day="2026-10-25") is None
+    assert engine.next_free_slot(MONDAY, 90, after=parse_minutes("15:40")) == ("2026-10-20", "09:00")
+
+
+def test_concurrent_bookings_never_double_book(tmp_path):
+    """
+    Test, že souběžné rezervace stejného termínu ze dvou workerů uspějí jen jednou.
+    """
+    path = str(tmp_path / "bookings.sqlite3")
+    workers = [AvailabilityEngine(path) for _ in range(2)]
+    results = []
+
+    def book(engine):
+        results.append(engine.book(MONDAY, parse_minutes("10:00"), 60))
+
+    threads = [threading.Thread(target=book, args=(workers[i % 2],)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(result is not None for result in results) == 1
+    # Druhý worker vidí rezervaci prvního i ve svém indexu
+    assert not workers[0].is_free(MONDAY, parse_minutes("10:00"), 60)
+    assert not workers[1].is_free(MONDAY, parse_minutes("10:00"), 60)
+
+
+def test_cancel_frees_the_slot(tmp_path):
+    """
+    Test, že zrušená rezervace uvolní termín.
+    """
+    engine = make_engine(tmp_path)
+    booking = engine.book(MONDAY, parse_minutes("10:00"), 60)
+    assert engine.cancel(booking.id)
+    assert engine.is_free(MONDAY, parse_minutes("10:00"), 60)
+
+
+def test_database_opens_lazily_in_data_dir(tmp_path, monkeypatch):
+    """
+    Test, že relativní cesta k rezervacím se bere vůči LAURA_DATA_DIR a soubor vznikne až při prvním dotazu.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(paths, "DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(scheduling, "BOOKINGS_DB_PATH", "bookings.sqlite3")
+
+    engine = scheduling.create_availability_engine()
+    path = tmp_path / "data" / "bookings.sqlite3"
+    assert engine.path == str(path)
+    assert not path.exists()
+
+    assert engine.book(MONDAY, parse_minutes("10:00"), 60) is not None
+    assert path.exists()
+    assert not os.path.exists(tmp_path / "bookings.sqlite3")
+    engine.close()
+
+    # Po znovuotevření se index načte z databáze
+    assert not engine.is_free(MONDAY, parse_minutes("10:00"), 60)
+    engine.close()
+
+
+def test_past_slots_are_neither_offered_nor_booked(tmp_path):
+    """
+    Test, že termíny před aktuálním datem a časem se nenabízí ani nerezervují.
+    """
+    engine = make_engine(tmp_path)
+    not_before = (MONDAY, parse_minutes("13:05"))
+
+    assert engine.book("2026-10-16", parse_minutes("10:00"), 60, not_before=not_before) is None
+    assert engine.book(MONDAY, parse_minutes("11:00"), 60, not_before=not_before) is None
+    assert not engine.is_free(MONDAY, parse_minutes("11:00"), 60, not_before=not_before)
+    assert engine.free_slots("2026-10-16", 60, not_before=not_before) == []
+    assert engine.free_slots(MONDAY, 60, not_before=not_before)[0] == "13:15"
+    assert engine.next_free_slot("2026-10-16", 60, not_before=not_before) == (MONDAY, "13:15")
+    assert engine.book(MONDAY, parse_minutes("14:00"), 60, not_before=not_before) is not None
+
+
+def test_client_date_in_the_past_cannot_book_past_slot(tmp_path):
+    """
+    Test, že datum od klienta v minulosti neotevře rezervace do minulosti - rozhoduje čas serveru.
+    """
+    engine = make_engine(tmp_path)
+    now = datetime(2026, 10, 19, 13, 5)
+
+    assert earliest_start("2020-01-06", now) == (MONDAY, parse_minutes("13:05"))
+    assert earliest_start("nesmysl", now) == (MONDAY, parse_minutes("13:05"))
+    # Budoucí datum od klienta je přísnější mez a platí
+    assert earliest_start("2026-10-21", now) == ("2026-10-21", 0)
+
+    not_before = earliest_start("2020-01-06", now)
+    assert not engine.is_free("2020-01-07", parse_minutes("10:00"), 60, not_before=not_before)
+    assert engine.book("2020-01-07", parse_minutes("10:00"), 60, not_before=not_before) is None
+    assert engine.book(MONDAY, parse_minutes("10:00"), 60, not_before=not_before) is None
+    assert engine.book(MONDAY, parse_minutes("14:00"), 60, not_before=not_before) is not None
+
+
+def test_moving_own_booking_to_adjacent_slot(tmp_path):
+    """
+    Test, že přesun vlastní schůzky o kousek vedle nekoliduje s jejím bufferem a původní termín uvolní.
+    """
+    engine = make_engine(tmp_path)
+    original = engine.book(MONDAY, parse_minutes("10:00"), 60)
+
+    assert engine.is_free(MONDAY, parse_minutes("10:30"), 60, ignore_booking=original.id)
+    assert "10:30" in engine.free_slots(MONDAY, 60, ignore_booking=original.id)
+    assert engine.book(MONDAY, parse_minutes("10:30"), 60) is None
+
+    moved = engine.book(MONDAY, parse_minutes("10:30"), 60, replace_booking=original.id)
+    assert moved is not None
+    assert engine.is_free(MONDAY, parse_minutes("09:00"), 15)
+    assert not engine.is_free(MONDAY, parse_minutes("10:30"), 60)
+
+
+def test_helpers():
+    """
+    Test, že parsování termínu ze stavu a výběr nabízených termínů fungují.
+    """
+    assert parse_meeting_start("2026-10-19", "14:30") == ("2026-10-19", 870)
+    assert parse_meeting_start("none", "14:30") is None
+    assert parse_meeting_start("2026-10-19", None) is None
+    assert pick_offered_slots(["09:00", "09:15", "09:30", "09:45", "10:00"], 3) == ["09:00", "09:30", "10:00"]
+    assert pick_offered_slots(["09:00"], 4) == ["09:00"]
@@ -0,0 +1,68 @@
+"""
+Unit testy pro serverové relace (TTL nad LangGraph checkpointerem).
+"""
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+
+from sessions import SessionStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def _open_store(backend: str, tmp_path, clock: FakeClock) -> SessionStore:
+    store = SessionStore(backend, str(tmp_path / "sessions.sqlite3"), ttl=60, sweep_interval=600, clock=clock)
+    await store.open()
+    return store
+
+
+async def _save_checkpoint(store: SessionStore, session_id: str) -> None:
+    config = {"configurable": {"thread_id": session_id, "checkpoint_ns": ""}}
+    await store.checkpointer.aput(config, empty_checkpoint(), {}, {})
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+async def test_expired_sessions_are_evicted(backend, tmp_path):
+    """
+    Test, že relace neaktivní déle než TTL se při úklidu smažou i s checkpointem.
+    """
+    clock = FakeClock()
+    store = await _open_store(backend, tmp_path, clock)
+
+    await store.touch("old")
+    await _save_checkpoint(store, "old")
+    clock.now += 45
+    await store.touch("fresh")
+
+    clock.now += 30
+    assert await store.evict_expired() == 1
+    assert await store.size() == 1
+    assert await store.checkpointer.aget_tuple(store.config("old")) is None
+    await store.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+async def test_touch_resets_expired_session(backend, tmp_path):
+    """
+    Test, že návrat do prošlé relace začne s čistým stavem.
+    """
+    clock = FakeClock()
+    store = await _open_store(backend, tmp_path, clock)
+
+    await store.touch("s1")
+    await _save_checkpoint(store, "s1")
+    assert await store.checkpointer.aget_tuple(store.config("s1")) is not None
+
+    clock.now += 120
+    await store.touch("s1")
+    assert await store.checkpointer.aget_tuple(store.config("s1")) is None
+    assert await store.size() == 1
+    await store.close()
@@ -0,0 +1,126 @@
+"""
+Unit testy pro instrumentaci uzlů, volání LLM a trace log tahu.
+"""
+
+import json
+import logging
+
+import pytest
+
+import telemetry
+from telemetry import instrument_node, llm_cost, percentile, record_cache, record_llm_call, summarize_traces, trace_turn
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(record.getMessage())
+
+
+@pytest.fixture
+def trace_lines(monkeypatch):
+    """Trace log do seznamu místo souboru."""
+    logger = logging.getLogger("test.laura.trace")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = ListHandler()
+    logger.addHandler(handler)
+    monkeypatch.setattr(telemetry, "trace_logger", logger)
+    monkeypatch.setattr(telemetry, "TRACE_ENABLED", True)
+    yield handler.lines
+    logger.removeHandler(handler)
+
+
+@pytest.mark.asyncio
+async def test_turn_trace_collects_nodes_llm_calls_and_cache(trace_lines):
+    """
+    Test, že trace tahu obsahuje uzly, volání LLM s labelem uzlu, zásahy cache a cenu.
+    """
+    @instrument_node("node_give_info")
+    async def node(state):
+        record_cache("answer", False)
+        record_llm_call("gpt-4o-2024-08-06", 0.5, 1000, 100)
+        return {"ok": True}
+
+    with trace_turn("session-1") as trace:
+        assert await node({}) == {"ok": True}
+
+    logged = json.loads(trace_lines[-1])
+    assert logged["turn_id"] == trace.turn_id
+    assert logged["session_id"] == "session-1"
+    assert logged["nodes"][0]["node"] == "node_give_info"
+    assert logged["llm_calls"][0]["node"] == "node_give_info"
+    assert logged["llm_calls"][0]["prompt_tokens"] == 1000
+    assert logged["cache"] == [{"cache": "answer", "node": "node_give_info", "result": "miss"}]
+    assert logged["cost_usd"] == pytest.approx(0.0035)
+
+
+@pytest.mark.asyncio
+async def test_node_errors_are_recorded_and_reraised(trace_lines):
+    """
+    Test, že výjimka v uzlu se zapíše do trace i metriky a propadne dál.
+    """
+    @instrument_node("broken")
+    async def node(state):
+        raise ValueError("boom")
+
+    metrics = telemetry.Counter is not None
+    before = telemetry.NODE_ERRORS.labels("broken")._value.get() if metrics else 0
+    with pytest.raises(ValueError):
+        with trace_turn("session-2"):
+            await node({})
+
+    logged = json.loads(trace_lines[-1])
+    assert "boom" in logged["nodes"][0]["error"]
+    assert "boom" in logged["error"]
+    if metrics:
+        assert telemetry.NODE_ERRORS.labels("broken")._value.get() == before + 1
+
+
+def test_instrumented_node_keeps_signature():
+    """
+    Test, že obalený uzel má stejnou signaturu (LangGraph podle ní předává config).
+    """
+    import inspect
+
+    async def node(state, config):
+        return {}
+
+    assert list(inspect.signature(instrument_node("x")(node)).parameters) == ["state", "config"]
+
+
+def test_cost_and_percentiles():
+    """
+    Test výpočtu ceny podle modelu (i s verzí v názvu) a percentilů.
+    """
+    assert llm_cost("gpt-4o-mini", 1_000_000, 0) == pytest.approx(0.15)
+    assert llm_cost("gpt-4o-mini-2024-07-18", 0, 1_000_000) == pytest.approx(0.60)
+    assert llm_cost("neznamy-model", 1000, 1000) == 0.0
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile([], 95) == 0.0
+
+
+def test_summarize_traces():
+    """
+    Test agregace trace logu pro report.
+    """
+    traces = [
+        {"duration_ms": 100 * i, "cost_usd": 0.001, "error": None,
+         "nodes": [{"node": "node_topic_type", "ms": 10 * i, "error": None}, {"node": "scheduling", "ms": 80 * i, "error": None}],
+         "llm_calls": [{"node": "scheduling", "model": "gpt-4o", "ms": 70 * i, "prompt_tokens": 500, "completion_tokens": 50, "cost_usd": 0.001}],
+         "cache": [{"cache": "memo", "node": "node_topic_type", "result": "hit" if i % 2 else "miss"}]}
+        for i in range(1, 11)
+    ]
+    summary = summarize_traces(traces)
+
+    assert summary["turns"][0]["count"] == 10
+    assert summary["turns"][0]["p95_ms"] == 1000
+    assert [row["name"] for row in summary["nodes"]] == ["scheduling", "node_topic_type"]
+    assert summary["nodes"][0]["p50_ms"] == 400
+    assert summary["llm"][0]["prompt_tokens"] == 5000
+    assert summary["cache"] == [{"name": "memo", "hit": 5, "miss": 5}]
@@ -0,0 +1,67 @@
+"""
+Offline report z trace logu (LAURA_TRACE_LOG): p50/p95 latence tahů, uzlů
+grafu a volání LLM, tokeny, cena a zásahy cache.
+
+Spuštění (ze složky Laura):
+    python trace_report.py laura_traces.log
+    python trace_report.py laura_traces.log --json
+"""
+
+import argparse
+import json
+import sys
+
+from telemetry import summarize_traces
+
+
+def load_traces(path: str) -> list:
+    traces = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                traces.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Useknutý poslední řádek běžícího serveru
+                continue
+    return traces
+
+
+def print_table(title: str, rows: list, columns: list) -> None:
+    if not rows:
+        return
+    print(f"\n{title}")
+    widths = [max(len(column), *(len(str(row.get(column, ""))) for row in rows)) for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row.get(column, "")).ljust(width) for column, width in zip(columns, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", nargs="?", default="laura_traces.log")
+    parser.add_argument("--json", action="store_true", help="výstup jako JSON")
+    args = parser.parse_args()
+
+    traces = load_traces(args.path)
+    if not traces:
+        print(f"V {args.path} nejsou žádné tahy.", file=sys.stderr)
+        sys.exit(1)
+
+    summary = summarize_traces(traces)
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return
+
+    print(f"Tahů: {len(traces)}")
+    latency = ["name", "count", "p50_ms", "p95_ms", "max_ms"]
+    print_table("Celý tah", summary["turns"], latency + ["errors", "cost_usd"])
+    print_table("Uzly grafu (seřazeno podle p95)", summary["nodes"], latency + ["errors"])
+    print_table("Volání LLM (uzel / model)", summary["llm"], latency + ["prompt_tokens", "completion_tokens", "cost_usd"])
+    print_table("Cache", summary["cache"], ["name", "hit", "miss"])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,135 @@
-import pandas as pd
-from io import BytesIO
-from datetime import datetime
-from fastapi import APIRouter, Response, HTTPException
+from datetime import datetime, timezone
+from typing import Literal
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
+from app import config
+from app.models.export import ExportJobStatus
 from app.models.search import SearchResponse
+from app.services.export_jobs import ExportJob, ExportPool, ExportPoolSaturated, ExportStream
+from app.services.exporters import EXPORTERS, ExportUnavailableError, encode_chunks
 
 router = APIRouter()
+export_pool = ExportPool(
+    kind=config.EXPORT_POOL_KIND,
+    max_workers=config.EXPORT_POOL_WORKERS,
+    max_queue=config.EXPORT_POOL_MAX_QUEUE,
+    retry_after=config.EXPORT_RETRY_AFTER,
+    job_ttl=config.EXPORT_JOB_TTL,
+    job_dir=config.EXPORT_JOB_DIR
+)
+
+
+class ExportStreamingResponse(StreamingResponse):
+    """Po odeslání, odpojení klienta i chybě při odesílání vždy zavře export a uvolní jeho slot v poolu."""
+
+    body_iterator: ExportStream
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.body_iterator.aclose()
+
+
+ExportFormat = Literal["excel", "xlsx", "csv", "json", "jsonl", "parquet"]
+ContentEncoding = Literal["gzip", "zstd"]
 
 
 @router.post("/export/excel")
 async def export_to_excel(data: SearchResponse):
+    return await export_results("excel", data, encoding=None)
+
+
+@router.post("/export/jobs", response_model=ExportJobStatus, status_code=202)
+async def create_export_job(
+    data: SearchResponse,
+    format: ExportFormat = Query("excel"),
+    encoding: ContentEncoding | None = Query(None)
+):
+    _check_results(data)
     try:
-        if not data.results:
-            raise HTTPException(status_code=400, detail="Nejsou k dispozici žádné výsledky pro export.")
-
-        results_data = [result.model_dump() for result in data.results]
-        df = pd.DataFrame(results_data)
-        
-        df = df.rename(columns={
-            "position": "Pozice",
-            "title": "Titulek",
-            "url": "URL",
-            "snippet": "Popis"
-        })
-        
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Výsledky')
-            
-        output.seek(0)
-        
-        filename = f"search_results_{data.fetched_at.strftime('%Y%m%d_%H%M%S')}.xlsx"
-        
-        headers = {
-            'Content-Disposition': f'attachment; filename="{filename}"'
-        }
-        
-        return Response(
-            content=output.getvalue(),
-            media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            headers=headers
-        )
-    except HTTPException as e:
-        raise e
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Chyba při generování Excelu: {str(e)}")
+        job = export_pool.submit_job(format, encoding, data)
+    except ExportPoolSaturated as e:
+        raise _saturated(e)
+    return _job_status(job)
+
+
+@router.get("/export/jobs/{job_id}", response_model=ExportJobStatus)
+async def get_export_job(job_id: str):
+    return _job_status(_get_job(job_id))
+
+
+@router.get("/export/jobs/{job_id}/download")
+async def download_export_job(job_id: str):
+    job = _get_job(job_id)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail="Export ještě není hotový.")
+
+    headers = {'Content-Encoding': job.encoding} if job.encoding else None
+    return FileResponse(
+        job.path,
+        media_type=EXPORTERS[job.format].media_type,
+        filename=job.filename,
+        headers=headers
+    )
+
+
+@router.post("/export/{format}")
+async def export_results(
+    format: ExportFormat,
+    data: SearchResponse,
+    encoding: ContentEncoding | None = Query(None)
+):
+    _check_results(data)
+
+    exporter = EXPORTERS[format]
+    try:
+        # Soubor se generuje líně přímo z modelů a odesílá po částech, nikdy se nedrží celý v paměti
+        body = encode_chunks(exporter.iter_bytes(data), encoding)
+    except ExportUnavailableError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    filename = f"search_results_{data.fetched_at.strftime('%Y%m%d_%H%M%S')}.{exporter.extension}"
+    
+    headers = {
+        'Content-Disposition': f'attachment; filename="{filename}"'
+    }
+    if encoding is not None:
+        headers['Content-Encoding'] = encoding
+
+    # Renderování běží ve vláknech omezeného poolu, ne na event loopu
+    try:
+        stream = export_pool.open_stream(body)
+    except ExportPoolSaturated as e:
+        raise _saturated(e)
+
+    return ExportStreamingResponse(stream, media_type=exporter.media_type, headers=headers)
+
+
+def _check_results(data: SearchResponse) -> None:
+    if not data.results:
+        raise HTTPException(status_code=400, detail="Nejsou k dispozici žádné výsledky pro export.")
+
+
+def _saturated(error: ExportPoolSaturated) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": str(error.retry_after)})
+
+
+def _get_job(job_id: str) -> ExportJob:
+    job = export_pool.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Exportní úloha nebyla nalezena.")
+    return job
+
+
+def _job_status(job: ExportJob) -> ExportJobStatus:
+    return ExportJobStatus(
+        id=job.id,
+        format=job.format,
+        status=job.status,
+        created_at=datetime.fromtimestamp(job.created_at, timezone.utc),
+        finished_at=datetime.fromtimestamp(job.finished_at, timezone.utc) if job.finished_at else None,
+        size=job.size,
+        error=job.error,
+        download_url=f"/api/export/jobs/{job.id}/download" if job.status == "done" else None
+    )
@@ -1,18 +1,100 @@
 import httpx
+import math
+from collections.abc import AsyncIterator
+from typing import Literal
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app import config
+from app.services.quota import SearchRateLimitedError
 from app.services.search_service import SearchService
-from app.models.search import SearchResponse
+from app.models.search import SearchResponse, BatchSearchRequest, BatchSearchResponse, SearchStreamEvent
 
 router = APIRouter()
 search_service = SearchService()
 
 
 @router.get("/search", response_model=SearchResponse)
-async def search(user_input: str = Query(..., min_length=1)):
+async def search(
+    user_input: str = Query(..., min_length=1),
+    max_results: int = Query(10, ge=1, le=config.SEARCH_MAX_RESULTS)
+):
     if not user_input or not user_input.strip():
         raise HTTPException(status_code=400, detail="Vyhledávací dotaz nesmí být prázdný")
     
     try:
-        return search_service.search(user_input.strip())
+        return await search_service.asearch(user_input.strip(), max_results)
+    except SearchRateLimitedError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Neočekávaná chyba serveru: {str(e)}")
+
+
+@router.post("/search/batch", response_model=BatchSearchResponse)
+async def search_batch(request: BatchSearchRequest):
+    _check_batch_size(request.queries)
+
+    items = await search_service.asearch_many(
+        request.queries,
+        concurrency=request.concurrency,
+        deadline=request.deadline,
+        max_results=request.max_results
+    )
+    failed = sum(1 for item in items if item.error is not None)
+
+    return BatchSearchResponse(
+        total=len(items),
+        succeeded=len(items) - failed,
+        failed=failed,
+        items=items
+    )
+
+
+@router.get("/search/stream")
+async def search_stream(
+    user_input: list[str] = Query(..., min_length=1),
+    format: Literal["ndjson", "sse"] = Query("ndjson"),
+    concurrency: int | None = Query(None, ge=1),
+    deadline: float | None = Query(None, gt=0),
+    max_results: int = Query(10, ge=1, le=config.SEARCH_MAX_RESULTS)
+):
+    _check_batch_size(user_input)
+    events = search_service.aiter_search_events(
+        user_input,
+        concurrency=concurrency,
+        deadline=deadline,
+        max_results=max_results
+    )
+
+    if format == "sse":
+        return StreamingResponse(_encode_sse(events), media_type="text/event-stream", headers=STREAM_HEADERS)
+    return StreamingResponse(_encode_ndjson(events), media_type="application/x-ndjson", headers=STREAM_HEADERS)
+
+
+@router.get("/search/stats")
+async def search_stats():
+    return await search_service.stats()
+
+
+# Zabrání bufferování odpovědi v reverzních proxy (nginx)
+STREAM_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"
+}
+
+
+def _check_batch_size(queries: list[str]) -> None:
+    if len(queries) > config.SEARCH_BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Dávka může obsahovat nejvýše {config.SEARCH_BATCH_MAX_QUERIES} dotazů"
+        )
+
+
+async def _encode_ndjson(events: AsyncIterator[SearchStreamEvent]) -> AsyncIterator[str]:
+    async for event in events:
+        yield event.model_dump_json(exclude_none=True) + "\n"
+
+
+async def _encode_sse(events: AsyncIterator[SearchStreamEvent]) -> AsyncIterator[str]:
+    async for event in events:
+        yield f"event: {event.event}\ndata: {event.model_dump_json(exclude_none=True)}\n\n"
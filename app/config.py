@@ -0,0 +1,78 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# SerpAPI HTTP klient (sdílený přes celou aplikaci)
+SERPAPI_TIMEOUT = env_float("SERPAPI_TIMEOUT", 10.0)
+SERPAPI_MAX_CONNECTIONS = env_int("SERPAPI_MAX_CONNECTIONS", 100)
+SERPAPI_MAX_KEEPALIVE = env_int("SERPAPI_MAX_KEEPALIVE", 20)
+SERPAPI_KEEPALIVE_EXPIRY = env_float("SERPAPI_KEEPALIVE_EXPIRY", 30.0)
+SERPAPI_HTTP2 = env_bool("SERPAPI_HTTP2", True)
+
+# Circuit breaker pro SerpAPI
+SERPAPI_BREAKER_FAILURE_THRESHOLD = env_int("SERPAPI_BREAKER_FAILURE_THRESHOLD", 5)
+SERPAPI_BREAKER_COOLDOWN = env_float("SERPAPI_BREAKER_COOLDOWN", 30.0)
+
+# Klientský limit rychlosti SerpAPI (0 = vypnuto); na token se čeká nejvýše MAX_WAIT sekund,
+# pak dotaz skončí chybou "příliš mnoho vyhledávání"
+SERPAPI_RATE_PER_MINUTE = env_float("SERPAPI_RATE_PER_MINUTE", 0.0)
+SERPAPI_RATE_BURST = env_int("SERPAPI_RATE_BURST", 20)
+SERPAPI_RATE_MAX_WAIT = env_float("SERPAPI_RATE_MAX_WAIT", 30.0)
+
+# Měsíční kvóta SerpAPI (0 = nesledovat) uložená v SQLite
+SERPAPI_MONTHLY_QUOTA = env_int("SERPAPI_MONTHLY_QUOTA", 0)
+SERPAPI_QUOTA_PATH = os.getenv("SERPAPI_QUOTA_PATH", "serpapi_quota.sqlite3")
+# Pod tímto podílem zbývající kvóty se odpovídá jen z cache, pod rezervou (nebo po 402) je kvóta vyčerpaná
+SERPAPI_QUOTA_CACHE_ONLY_BELOW = env_float("SERPAPI_QUOTA_CACHE_ONLY_BELOW", 0.2)
+SERPAPI_QUOTA_RESERVE = env_int("SERPAPI_QUOTA_RESERVE", 0)
+
+# Cache výsledků vyhledávání (memory | sqlite | redis | none)
+SEARCH_CACHE_BACKEND = os.getenv("SEARCH_CACHE_BACKEND", "memory").strip().lower()
+SEARCH_CACHE_TTL = env_float("SEARCH_CACHE_TTL", 300.0)
+SEARCH_CACHE_MAX_ENTRIES = env_int("SEARCH_CACHE_MAX_ENTRIES", 1000)
+SEARCH_CACHE_SQLITE_PATH = os.getenv("SEARCH_CACHE_SQLITE_PATH", "search_cache.sqlite3")
+SEARCH_CACHE_REDIS_URL = os.getenv("SEARCH_CACHE_REDIS_URL", "redis://localhost:6379/0")
+# Po vypršení TTL se položka ještě SEARCH_CACHE_STALE_TTL sekund vrací jako zastaralá
+# a mezitím se na pozadí obnoví (stale-while-revalidate)
+SEARCH_CACHE_STALE_TTL = env_float("SEARCH_CACHE_STALE_TTL", 600.0)
+# Oblíbené dotazy (aspoň N hitů od uložení) se obnoví předem, když uplyne daný podíl TTL
+SEARCH_REFRESH_AHEAD_MIN_HITS = env_int("SEARCH_REFRESH_AHEAD_MIN_HITS", 5)
+SEARCH_REFRESH_AHEAD_FRACTION = env_float("SEARCH_REFRESH_AHEAD_FRACTION", 0.8)
+# Soubor s populárními dotazy (jeden na řádek), kterými se cache zahřeje při startu
+SEARCH_WARMUP_FILE = os.getenv("SEARCH_WARMUP_FILE") or None
+
+# Dávkové vyhledávání
+SEARCH_BATCH_MAX_QUERIES = env_int("SEARCH_BATCH_MAX_QUERIES", 1000)
+SEARCH_BATCH_CONCURRENCY = env_int("SEARCH_BATCH_CONCURRENCY", 10)
+SEARCH_BATCH_MAX_CONCURRENCY = env_int("SEARCH_BATCH_MAX_CONCURRENCY", 50)
+SEARCH_BATCH_DEADLINE = env_float("SEARCH_BATCH_DEADLINE", 60.0)
+
+# Maximální počet organických výsledků na dotaz (stránkování po 10)
+SEARCH_MAX_RESULTS = env_int("SEARCH_MAX_RESULTS", 100)
+
+# Renderování exportů mimo event loop
+EXPORT_POOL_KIND = os.getenv("EXPORT_POOL_KIND", "thread").strip().lower()
+EXPORT_POOL_WORKERS = env_int("EXPORT_POOL_WORKERS", 4)
+EXPORT_POOL_MAX_QUEUE = env_int("EXPORT_POOL_MAX_QUEUE", 16)
+EXPORT_RETRY_AFTER = env_int("EXPORT_RETRY_AFTER", 5)
+EXPORT_JOB_TTL = env_float("EXPORT_JOB_TTL", 3600.0)
+EXPORT_JOB_DIR = os.getenv("EXPORT_JOB_DIR") or None
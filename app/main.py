@@ -1,16 +1,38 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pathlib import Path
 import subprocess
 
-from app.api.search import router as search_router
-from app.api.export import router as export_router
+from app.api.search import router as search_router, search_service
+from app.api.export import router as export_router, export_pool
+from app import config
+from app.services.search_service import create_http_client, load_warmup_queries
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pool exportů je na úrovni modulu - po předchozím shutdown() se musí znovu spustit
+    export_pool.start()
+    # Jeden dlouhožijící klient s poolem spojení pro všechny dotazy na SerpAPI
+    async with create_http_client() as http_client:
+        search_service.http_client = http_client
+        if config.SEARCH_WARMUP_FILE:
+            search_service.start_warm_up(load_warmup_queries(config.SEARCH_WARMUP_FILE))
+        yield
+        # Obnovy a zahřátí na pozadí musí skončit dřív, než se zavře klient
+        await search_service.cancel_background_tasks()
+        search_service.http_client = None
+    await search_service.aclose()
+    export_pool.shutdown()
+
 
 app = FastAPI(
     title="Google Search API",
     description="FastAPI aplikace pro vyhledávání na Google pomocí SerpAPI",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 app.include_router(search_router, prefix="/api", tags=["search"])
@@ -55,4 +77,4 @@ async def test_report():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "ok"}
+    return {"status": "ok", "serpapi_budget": await search_service.budget_status()}
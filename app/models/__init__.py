@@ -2,6 +2,22 @@
 Models package.
 """
 
-from app.models.search import SearchResult, SearchResponse
+from app.models.search import (
+    SearchResult,
+    SearchResponse,
+    BatchSearchRequest,
+    BatchSearchItem,
+    BatchSearchResponse,
+    SearchStreamEvent,
+)
+from app.models.export import ExportJobStatus
 
-__all__ = ["SearchResult", "SearchResponse"]
+__all__ = [
+    "SearchResult",
+    "SearchResponse",
+    "BatchSearchRequest",
+    "BatchSearchItem",
+    "BatchSearchResponse",
+    "SearchStreamEvent",
+    "ExportJobStatus",
+]
@@ -0,0 +1,14 @@
+from datetime import datetime
+from typing import Literal
+from pydantic import BaseModel, Field
+
+
+class ExportJobStatus(BaseModel):
+    id: str = Field(...)
+    format: str = Field(...)
+    status: Literal["queued", "running", "done", "failed"] = Field(...)
+    created_at: datetime = Field(...)
+    finished_at: datetime | None = Field(None)
+    size: int | None = Field(None)
+    error: str | None = Field(None)
+    download_url: str | None = Field(None)
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Literal
 from pydantic import BaseModel, Field
 
 
@@ -16,3 +17,40 @@ class SearchResponse(BaseModel):
     total_returned: int = Field(...)
     results: list[SearchResult] = Field(default_factory=list)
     warning: str | None = Field(None)
+    cached: bool = Field(default=False)
+    age_seconds: float | None = Field(None)
+    stale: bool = Field(default=False)
+
+
+class BatchSearchRequest(BaseModel):
+    queries: list[str] = Field(..., min_length=1)
+    concurrency: int | None = Field(None, ge=1)
+    deadline: float | None = Field(None, gt=0)
+    max_results: int | None = Field(None, ge=1)
+
+
+class BatchSearchItem(BaseModel):
+    query: str = Field(...)
+    response: SearchResponse | None = Field(None)
+    error: str | None = Field(None)
+
+
+class BatchSearchResponse(BaseModel):
+    total: int = Field(...)
+    succeeded: int = Field(...)
+    failed: int = Field(...)
+    items: list[BatchSearchItem] = Field(default_factory=list)
+
+
+class SearchStreamEvent(BaseModel):
+    """
+    Jedna událost streamovaného vyhledávání. `result` nese jednotlivý výsledek,
+    `response` metadata dokončeného dotazu (bez výsledků, ty už byly odeslány),
+    `error` chybu dotazu a `done` ukončuje stream.
+    """
+    event: Literal["result", "response", "error", "done"] = Field(...)
+    query: str | None = Field(None)
+    result: SearchResult | None = Field(None)
+    response: SearchResponse | None = Field(None)
+    error: str | None = Field(None)
+    total: int | None = Field(None)
@@ -0,0 +1,296 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app import config
+from app.models.search import SearchResponse
+
+
+@dataclass
+class CacheEntry:
+    value: str
+    stored_at: float
+
+
+class CacheBackend(ABC):
+    """Úložiště pro QueryCache. Hodnoty jsou serializované řetězce s TTL v sekundách."""
+
+    evictions: int = 0
+
+    @abstractmethod
+    async def get(self, key: str) -> CacheEntry | None:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+    async def size(self) -> int | None:
+        return None
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache s TTL. Vhodná pro jeden worker."""
+
+    def __init__(self, max_entries: int = 1000, clock=time.time):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[CacheEntry, float]] = OrderedDict()
+
+    async def get(self, key: str) -> CacheEntry | None:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        entry, expires_at = item
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        now = self._clock()
+        self._entries[key] = (CacheEntry(value, now), now + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+    async def size(self) -> int | None:
+        return len(self._entries)
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Perzistentní cache na disku. Přežije restart a lze ji sdílet mezi workery
+    na jednom stroji. Operace běží ve vlákně, aby neblokovaly event loop.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, clock=time.time):
+        self.path = path
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_search_cache_lru ON search_cache (last_access)")
+
+    async def get(self, key: str) -> CacheEntry | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+    async def clear(self) -> None:
+        await asyncio.to_thread(self._execute, "DELETE FROM search_cache")
+
+    async def size(self) -> int | None:
+        return await asyncio.to_thread(self._count)
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _get(self, key: str) -> CacheEntry | None:
+        now = self._clock()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at, expires_at FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[2] <= now:
+                self._conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE search_cache SET last_access = ? WHERE key = ?", (now, key))
+            return CacheEntry(row[0], row[1])
+
+    def _set(self, key: str, value: str, ttl: float) -> None:
+        now = self._clock()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, value, stored_at, expires_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, value, now, now + ttl, now)
+            )
+            overflow = self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM search_cache WHERE key IN"
+                    " (SELECT key FROM search_cache ORDER BY last_access LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+
+    def _count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+
+    def _execute(self, sql: str) -> None:
+        with self._lock:
+            self._conn.execute(sql)
+
+
+class RedisCache(CacheBackend):
+    """
+    Sdílená cache v Redisu pro více workerů/instancí. Velikost omezuje samotný
+    Redis (maxmemory + maxmemory-policy allkeys-lru), TTL nastavujeme u klíče.
+    """
+
+    KEY_PREFIX = "search_cache:"
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError("Pro Redis cache je potřeba nainstalovat balíček 'redis'.") from e
+        self._redis = redis_asyncio.from_url(url)
+
+    async def get(self, key: str) -> CacheEntry | None:
+        raw = await self._redis.get(self.KEY_PREFIX + key)
+        if raw is None:
+            return None
+        payload = json.loads(raw)
+        return CacheEntry(payload["value"], payload["stored_at"])
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        payload = json.dumps({"value": value, "stored_at": time.time()})
+        await self._redis.set(self.KEY_PREFIX + key, payload, px=int(ttl * 1000))
+
+    async def clear(self) -> None:
+        async for key in self._redis.scan_iter(match=self.KEY_PREFIX + "*"):
+            await self._redis.delete(key)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+class QueryCache:
+    """
+    Cache odpovědí SerpAPI klíčovaná normalizovaným dotazem a parametry hl/gl/num.
+
+    Položka je čerstvá `ttl` sekund, dalších `stale_ttl` sekund se vrací jako
+    zastaralá (`stale`) a volající ji má obnovit na pozadí. Oblíbené položky
+    (aspoň `refresh_min_hits` hitů od uložení) se obnovují předem, jakmile
+    uplyne `refresh_ahead` z TTL.
+    """
+
+    MAX_TRACKED_KEYS = 10000
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttl: float = 300.0,
+        stale_ttl: float = 0.0,
+        refresh_ahead: float = 1.0,
+        refresh_min_hits: int = 1,
+        clock=time.time
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.refresh_ahead = refresh_ahead
+        self.refresh_min_hits = refresh_min_hits
+        self._clock = clock
+        self._key_hits: OrderedDict[str, int] = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(search_query: str, hl: str, gl: str, num: int) -> str:
+        normalized_query = " ".join(search_query.lower().split())
+        return f"{hl}|{gl}|{num}|{normalized_query}"
+
+    async def get(self, key: str) -> SearchResponse | None:
+        entry = await self.backend.get(key)
+        age = self._clock() - entry.stored_at if entry is not None else 0.0
+        if entry is None or age >= self.ttl + self.stale_ttl:
+            self.misses += 1
+            return None
+        cached_response = SearchResponse.model_validate_json(entry.value)
+        cached_response.cached = True
+        cached_response.age_seconds = round(max(age, 0.0), 1)
+        cached_response.stale = age >= self.ttl
+        if cached_response.stale:
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        self._key_hits[key] = self._key_hits.pop(key, 0) + 1
+        while len(self._key_hits) > self.MAX_TRACKED_KEYS:
+            self._key_hits.popitem(last=False)
+        return cached_response
+
+    def needs_refresh(self, key: str, cached_response: SearchResponse) -> bool:
+        """Zastaralou odpověď obnovujeme vždy, čerstvou jen u oblíbeného dotazu těsně před vypršením."""
+        if cached_response.stale:
+            return True
+        return (
+            self._key_hits.get(key, 0) >= self.refresh_min_hits
+            and (cached_response.age_seconds or 0.0) >= self.ttl * self.refresh_ahead
+        )
+
+    async def set(self, key: str, search_response: SearchResponse) -> None:
+        # Backend drží položku i po dobu zastarání, čerstvost určuje až get()
+        await self.backend.set(key, search_response.model_dump_json(), self.ttl + self.stale_ttl)
+        self._key_hits.pop(key, None)
+
+    async def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.backend.evictions,
+            "size": await self.backend.size()
+        }
+
+
+def create_query_cache() -> QueryCache | None:
+    backend_name = config.SEARCH_CACHE_BACKEND
+    if backend_name == "none":
+        return None
+    if backend_name == "memory":
+        backend = MemoryCache(max_entries=config.SEARCH_CACHE_MAX_ENTRIES)
+    elif backend_name == "sqlite":
+        backend = SQLiteCache(config.SEARCH_CACHE_SQLITE_PATH, max_entries=config.SEARCH_CACHE_MAX_ENTRIES)
+    elif backend_name == "redis":
+        backend = RedisCache(config.SEARCH_CACHE_REDIS_URL)
+    else:
+        raise ValueError(f"Neznámý backend cache: {backend_name}")
+    return QueryCache(
+        backend,
+        ttl=config.SEARCH_CACHE_TTL,
+        stale_ttl=config.SEARCH_CACHE_STALE_TTL,
+        refresh_ahead=config.SEARCH_REFRESH_AHEAD_FRACTION,
+        refresh_min_hits=config.SEARCH_REFRESH_AHEAD_MIN_HITS
+    )
@@ -0,0 +1,83 @@
+import threading
+import time
+from typing import Callable
+
+
+class CircuitBreaker:
+    """
+    Jednoduchý circuit breaker (closed -> open -> half-open -> closed).
+
+    Po `failure_threshold` po sobě jdoucích selháních se okruh otevře a po dobu
+    `cooldown` sekund nepustí žádný požadavek dál. Po vypršení cooldownu propustí
+    jediný zkušební požadavek (half-open); jeho úspěch okruh zavře, neúspěch ho
+    znovu otevře na další cooldown.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._cooldown_elapsed():
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if not self._cooldown_elapsed():
+                    return False
+                self._state = self.HALF_OPEN
+            # Half-open: pustíme jen jeden zkušební požadavek najednou
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN:
+                self._open()
+                return
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._open()
+
+    def release(self) -> None:
+        """Uvolní zkušební slot, pokud požadavek skončil bez výsledku (např. zrušením)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _open(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = self._clock()
+        self._failures = 0
+
+    def _cooldown_elapsed(self) -> bool:
+        return self._clock() - self._opened_at >= self.cooldown
@@ -0,0 +1,232 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from app.models.search import SearchResponse
+from app.services.exporters import EXPORTERS, encode_chunks
+
+
+class ExportPoolSaturated(Exception):
+    """Všechny pracovní sloty i fronta exportů jsou plné - klient to má zkusit později."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Export je momentálně přetížený, zkuste to prosím za chvíli.")
+        self.retry_after = retry_after
+
+
+def render_export_to_file(format: str, encoding: str | None, data_json: str, path: str) -> int:
+    """
+    Vyrenderuje export do souboru. Funkce je na úrovni modulu a bere jen
+    serializovatelné argumenty, aby šla spustit i v ProcessPoolExecutoru.
+    """
+    data = SearchResponse.model_validate_json(data_json)
+    size = 0
+    with open(path, "wb") as output:
+        for chunk in encode_chunks(EXPORTERS[format].iter_bytes(data), encoding):
+            output.write(chunk)
+            size += len(chunk)
+    return size
+
+
+class ExportStream:
+    """
+    Streamovaný export držící jeden slot poolu. Každý krok synchronního
+    generátoru běží ve vlákně poolu. Slot se uvolní právě jednou a až ve chvíli,
+    kdy generátor žádné vlákno neposouvá - po doběhnutí streamu, po chybě,
+    po odpojení klienta i když se tělo odpovědi vůbec nezačne posílat (aclose()).
+    """
+
+    _END = object()
+
+    def __init__(self, pool: "ExportPool", chunks: Iterator[bytes]):
+        self._pool = pool
+        self._chunks = chunks
+        self._running: Future | None = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __aiter__(self) -> "ExportStream":
+        return self
+
+    async def __anext__(self) -> bytes:
+        if self._closed:
+            raise StopAsyncIteration
+        try:
+            self._running = self._pool._stream_executor.submit(next, self._chunks, self._END)
+            chunk = await asyncio.wrap_future(self._running)
+        except BaseException:
+            await self.aclose()
+            raise
+        if chunk is self._END:
+            await self.aclose()
+            raise StopAsyncIteration
+        return chunk
+
+    async def aclose(self) -> None:
+        """Ukončí export; pokud krok generátoru ještě běží ve vlákně, uvolní slot až po jeho doběhnutí."""
+        running = self._running
+        if running is not None and not running.done():
+            running.add_done_callback(lambda _: self._finish())
+        else:
+            self._finish()
+
+    def _finish(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._chunks.close()
+        self._pool.release()
+
+
+@dataclass
+class ExportJob:
+    id: str
+    format: str
+    encoding: str | None
+    filename: str
+    path: str
+    status: str = "queued"
+    error: str | None = None
+    size: int | None = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    future: Future | None = field(default=None, repr=False)
+
+
+class ExportPool:
+    """
+    Omezený pool pro renderování exportů mimo event loop.
+
+    Streamované exporty posílají každý krok generátoru do vláken, asynchronní
+    úlohy (jobs) běží v poolu zvoleného typu (thread/process). Počet rozpracovaných
+    exportů je omezen na `max_workers + max_queue`; další požadavek dostane
+    ExportPoolSaturated (503 s Retry-After) místo čekání ve frontě.
+    """
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: int = 4,
+        max_queue: int = 16,
+        retry_after: int = 5,
+        job_ttl: float = 3600.0,
+        job_dir: str | None = None
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Neznámý typ poolu pro export: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queue
+        self.retry_after = retry_after
+        self.job_ttl = job_ttl
+        self._owns_job_dir = job_dir is None
+        self.job_dir = job_dir
+
+        self._lock = threading.Lock()
+        self._active = 0
+        self._jobs: dict[str, ExportJob] = {}
+        self._job_tasks: set[asyncio.Task] = set()
+        self._stream_executor: ThreadPoolExecutor | None = None
+        self._job_executor: Executor | None = None
+        self.start()
+
+    def start(self) -> None:
+        """Vytvoří pracovní pooly; po shutdown() tak jde stejný pool znovu spustit (další start aplikace)."""
+        if self._stream_executor is not None:
+            return
+        if self._owns_job_dir:
+            self.job_dir = tempfile.mkdtemp(prefix="search_exports_")
+        os.makedirs(self.job_dir, exist_ok=True)
+
+        self._stream_executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="export")
+        if self.kind == "process":
+            self._job_executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        else:
+            self._job_executor = self._stream_executor
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self._active >= self.capacity:
+                raise ExportPoolSaturated(self.retry_after)
+            self._active += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._active = max(0, self._active - 1)
+
+    def open_stream(self, chunks: Iterator[bytes]) -> ExportStream:
+        """Zabere slot (nebo vyhodí ExportPoolSaturated) a vrátí stream, který ho po skončení uvolní."""
+        self.acquire()
+        return ExportStream(self, chunks)
+
+    def submit_job(self, format: str, encoding: str | None, data: SearchResponse) -> ExportJob:
+        self._evict_expired_jobs()
+        self.acquire()
+
+        exporter = EXPORTERS[format]
+        job_id = uuid.uuid4().hex
+        job = ExportJob(
+            id=job_id,
+            format=format,
+            encoding=encoding,
+            filename=f"search_results_{data.fetched_at.strftime('%Y%m%d_%H%M%S')}.{exporter.extension}",
+            path=os.path.join(self.job_dir, job_id)
+        )
+        self._jobs[job_id] = job
+
+        task = asyncio.create_task(self._run_job(job, data.model_dump_json()))
+        self._job_tasks.add(task)
+        task.add_done_callback(self._job_tasks.discard)
+        return job
+
+    def get_job(self, job_id: str) -> ExportJob | None:
+        self._evict_expired_jobs()
+        job = self._jobs.get(job_id)
+        # "running" až ve chvíli, kdy úlohu převezme worker; do té doby čeká ve frontě
+        if job is not None and job.status == "queued" and job.future is not None and job.future.running():
+            job.status = "running"
+        return job
+
+    async def _run_job(self, job: ExportJob, data_json: str) -> None:
+        try:
+            job.future = self._job_executor.submit(render_export_to_file, job.format, job.encoding, data_json, job.path)
+            job.size = await asyncio.wrap_future(job.future)
+            job.status = "done"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            self.release()
+
+    def _evict_expired_jobs(self) -> None:
+        expired_before = time.time() - self.job_ttl
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and job.finished_at < expired_before:
+                del self._jobs[job_id]
+                if os.path.exists(job.path):
+                    os.remove(job.path)
+
+    def shutdown(self) -> None:
+        if self._stream_executor is None:
+            return
+        self._stream_executor.shutdown(wait=False, cancel_futures=True)
+        if self._job_executor is not self._stream_executor:
+            self._job_executor.shutdown(wait=False, cancel_futures=True)
+        self._stream_executor = self._job_executor = None
+        if self._owns_job_dir:
+            shutil.rmtree(self.job_dir, ignore_errors=True)
+            # Soubory úloh zmizely se složkou
+            self._jobs.clear()
@@ -0,0 +1,181 @@
+import csv
+import io
+import json
+import zlib
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+
+from app.models.search import SearchResponse
+from app.services.xlsx_writer import ChunkSink, iter_xlsx
+
+
+class ExportUnavailableError(RuntimeError):
+    """Formát nebo kódování vyžaduje volitelnou závislost, která není nainstalovaná."""
+
+
+class Exporter(ABC):
+    """Streamovaný zápis SearchResponse do jednoho formátu po částech bajtů."""
+
+    media_type: str
+    extension: str
+    rows_per_chunk = 1000
+
+    @abstractmethod
+    def iter_bytes(self, data: SearchResponse) -> Iterator[bytes]:
+        ...
+
+
+class ExcelExporter(Exporter):
+    media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    extension = "xlsx"
+
+    COLUMNS = {
+        "position": "Pozice",
+        "title": "Titulek",
+        "url": "URL",
+        "snippet": "Popis"
+    }
+
+    def iter_bytes(self, data: SearchResponse) -> Iterator[bytes]:
+        rows = ((result.position, result.title, result.url, result.snippet) for result in data.results)
+        return iter_xlsx(list(self.COLUMNS.values()), rows, sheet_name="Výsledky", rows_per_chunk=self.rows_per_chunk)
+
+
+class CsvExporter(Exporter):
+    media_type = "text/csv"
+    extension = "csv"
+
+    COLUMNS = ("query", "fetched_at", "position", "title", "url", "snippet")
+
+    def iter_bytes(self, data: SearchResponse) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.COLUMNS)
+        fetched_at = data.fetched_at.isoformat()
+
+        for index, result in enumerate(data.results, start=1):
+            writer.writerow((data.query, fetched_at, result.position, result.title, result.url, result.snippet or ""))
+            if index % self.rows_per_chunk == 0:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+
+        yield buffer.getvalue().encode("utf-8")
+
+
+class JsonExporter(Exporter):
+    """Celá SearchResponse včetně metadat (dotaz, počet, poskytovatel, varování) jako jeden JSON dokument."""
+
+    media_type = "application/json"
+    extension = "json"
+
+    def iter_bytes(self, data: SearchResponse) -> Iterator[bytes]:
+        # Metadata se zapíšou hned, pole výsledků se pak streamuje po dávkách
+        metadata = json.dumps(data.model_dump(mode="json", exclude={"results"}), ensure_ascii=False)
+        yield (metadata[:-1] + ', "results": [').encode("utf-8")
+
+        batch = []
+        for index, result in enumerate(data.results):
+            batch.append(("" if index == 0 else ", ") + json.dumps(result.model_dump(), ensure_ascii=False))
+            if len(batch) >= self.rows_per_chunk:
+                yield "".join(batch).encode("utf-8")
+                batch.clear()
+        yield ("".join(batch) + "]}").encode("utf-8")
+
+
+class JsonLinesExporter(Exporter):
+    media_type = "application/x-ndjson"
+    extension = "jsonl"
+
+    def iter_bytes(self, data: SearchResponse) -> Iterator[bytes]:
+        fetched_at = data.fetched_at.isoformat()
+        batch = []
+        for result in data.results:
+            row = {"query": data.query, "fetched_at": fetched_at, **result.model_dump()}
+            batch.append(json.dumps(row, ensure_ascii=False))
+            if len(batch) >= self.rows_per_chunk:
+                yield ("\n".join(batch) + "\n").encode("utf-8")
+                batch.clear()
+        if batch:
+            yield ("\n".join(batch) + "\n").encode("utf-8")
+
+
+class ParquetExporter(Exporter):
+    """Sloupcový Parquet (zstd) zapisovaný po row groups, vyžaduje balíček pyarrow."""
+
+    media_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+    rows_per_chunk = 50_000
+
+    def iter_bytes(self, data: SearchResponse) -> Iterator[bytes]:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ExportUnavailableError("Export do Parquetu vyžaduje balíček 'pyarrow'.") from e
+
+        schema = pa.schema([
+            ("query", pa.string()),
+            ("fetched_at", pa.timestamp("us", tz="UTC")),
+            ("position", pa.int32()),
+            ("title", pa.string()),
+            ("url", pa.string()),
+            ("snippet", pa.string())
+        ])
+        return self._iter_row_groups(data, pa, pq, schema)
+
+    def _iter_row_groups(self, data: SearchResponse, pa, pq, schema) -> Iterator[bytes]:
+        sink = ChunkSink()
+        with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd") as writer:
+            for start in range(0, len(data.results), self.rows_per_chunk):
+                chunk = data.results[start:start + self.rows_per_chunk]
+                writer.write_table(pa.table({
+                    "query": [data.query] * len(chunk),
+                    "fetched_at": [data.fetched_at] * len(chunk),
+                    "position": [result.position for result in chunk],
+                    "title": [result.title for result in chunk],
+                    "url": [result.url for result in chunk],
+                    "snippet": [result.snippet for result in chunk]
+                }, schema=schema))
+                yield sink.drain()
+        yield sink.drain()
+
+
+EXPORTERS: dict[str, Exporter] = {
+    "excel": ExcelExporter(),
+    "xlsx": ExcelExporter(),
+    "csv": CsvExporter(),
+    "json": JsonExporter(),
+    "jsonl": JsonLinesExporter(),
+    "parquet": ParquetExporter()
+}
+
+CONTENT_ENCODINGS = ("gzip", "zstd")
+
+
+def encode_chunks(chunks: Iterator[bytes], encoding: str | None) -> Iterator[bytes]:
+    """Volitelně zkomprimuje proud bajtů pro hlavičku Content-Encoding (gzip nebo zstd)."""
+    if encoding is None:
+        return chunks
+
+    # Kompresor vytváříme hned, aby chybějící závislost selhala dřív, než se začne odesílat odpověď
+    if encoding == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    elif encoding == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ExportUnavailableError("Kódování zstd vyžaduje balíček 'zstandard'.") from e
+        compressor = zstandard.ZstdCompressor().compressobj()
+    else:
+        raise ValueError(f"Nepodporované kódování: {encoding}")
+
+    return _iter_compressed(chunks, compressor)
+
+
+def _iter_compressed(chunks: Iterator[bytes], compressor) -> Iterator[bytes]:
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
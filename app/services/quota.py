@@ -0,0 +1,206 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+from app import config
+
+
+class SearchRateLimitedError(Exception):
+    """Na volný slot v limitu rychlosti by se čekalo déle, než dovoluje `max_wait`."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Příliš mnoho vyhledávání najednou. Zkuste to znovu za {retry_after:.0f} s.")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Klientský limit rychlosti volání SerpAPI: `rate_per_minute` požadavků
+    za minutu s nárazem nejvýše `burst`. Volající na token počká; pokud by
+    čekal déle než `max_wait` sekund, dostane hned SearchRateLimitedError.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        burst: int = 10,
+        max_wait: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.max_wait = max_wait
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = clock()
+
+    def reserve(self) -> float:
+        """Zarezervuje token a vrátí, kolik sekund má volající počkat (0 = hned)."""
+        with self._lock:
+            self._refill()
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if wait > self.max_wait:
+                raise SearchRateLimitedError(wait)
+            # Token si zarezervujeme hned, stav může jít do mínusu
+            self._tokens -= 1
+            return wait
+
+    def refund(self) -> None:
+        """Vrátí token z reserve(), když se volání nakonec neuskuteční."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.burst, self._tokens + 1)
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class MonthlyQuota:
+    """
+    Měsíční kvóta vyhledávání SerpAPI uložená v SQLite, takže přežije restart
+    a sdílí ji všechny workery na stroji. Podle zbývajícího rozpočtu služba
+    postupně omezuje provoz:
+
+    - normal: běžný provoz
+    - cache_only: zbývá nejvýše `cache_only_below` kvóty - odpovídá se jen
+      z cache (i zastaralé), nic se neobnovuje ani nezahřívá a dotazy mimo
+      cache dostanou ukázková data, aniž by se kvóta dál čerpala
+    - fallback: zbývá nejvýše `reserve` vyhledávání, nebo SerpAPI vrátilo 402
+      (kvóta je vyčerpaná i na jeho straně) - SerpAPI se až do konce měsíce
+      nevolá a dotazy mimo cache dostanou ukázková data
+
+    Stav se vždy čte z databáze, aby ho viděly i ostatní workery sdílející soubor.
+    """
+
+    NORMAL = "normal"
+    CACHE_ONLY = "cache_only"
+    FALLBACK = "fallback"
+
+    def __init__(
+        self,
+        path: str,
+        limit: int,
+        cache_only_below: float = 0.2,
+        reserve: int = 0,
+        clock: Callable[[], float] = time.time
+    ):
+        self.path = path
+        self.limit = limit
+        self.cache_only_below = cache_only_below
+        self.reserve = reserve
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS serpapi_quota ("
+            " month TEXT PRIMARY KEY,"
+            " used INTEGER NOT NULL,"
+            " exhausted INTEGER NOT NULL DEFAULT 0)"
+        )
+
+    def try_consume(self) -> str:
+        """
+        Atomicky (i mezi procesy) započte jedno vyhledávání, pokud je rozpočet
+        v režimu normal. Vrací režim před započtením - jiný než normal znamená,
+        že se SerpAPI volat nemá.
+        """
+        month = self._month()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                used, exhausted = self._read(month)
+                stage = self._stage(used, exhausted)
+                if stage == self.NORMAL:
+                    self._conn.execute(
+                        "INSERT INTO serpapi_quota (month, used) VALUES (?, 1)"
+                        " ON CONFLICT(month) DO UPDATE SET used = used + 1",
+                        (month,)
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return stage
+
+    def mark_exhausted(self) -> None:
+        """SerpAPI vrátilo 402 - do konce měsíce už na něj nemá smysl chodit."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO serpapi_quota (month, used, exhausted) VALUES (?, 0, 1)"
+                " ON CONFLICT(month) DO UPDATE SET exhausted = 1",
+                (self._month(),)
+            )
+
+    @property
+    def stage(self) -> str:
+        with self._lock:
+            return self._stage(*self._read(self._month()))
+
+    def status(self) -> dict:
+        month = self._month()
+        with self._lock:
+            used, exhausted = self._read(month)
+        return {
+            "month": month,
+            "limit": self.limit,
+            "used": used,
+            "remaining": self._remaining(used, exhausted),
+            "stage": self._stage(used, exhausted)
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _read(self, month: str) -> tuple[int, bool]:
+        row = self._conn.execute(
+            "SELECT used, exhausted FROM serpapi_quota WHERE month = ?", (month,)
+        ).fetchone()
+        return (row[0], bool(row[1])) if row is not None else (0, False)
+
+    def _stage(self, used: int, exhausted: bool) -> str:
+        remaining = self._remaining(used, exhausted)
+        if remaining <= self.reserve:
+            return self.FALLBACK
+        if remaining <= self.limit * self.cache_only_below:
+            return self.CACHE_ONLY
+        return self.NORMAL
+
+    def _remaining(self, used: int, exhausted: bool) -> int:
+        return 0 if exhausted else max(0, self.limit - used)
+
+    def _month(self) -> str:
+        return datetime.fromtimestamp(self._clock(), timezone.utc).strftime("%Y-%m")
+
+
+def create_rate_limiter() -> TokenBucket | None:
+    if config.SERPAPI_RATE_PER_MINUTE <= 0:
+        return None
+    return TokenBucket(
+        config.SERPAPI_RATE_PER_MINUTE,
+        burst=config.SERPAPI_RATE_BURST,
+        max_wait=config.SERPAPI_RATE_MAX_WAIT
+    )
+
+
+def create_monthly_quota() -> MonthlyQuota | None:
+    if config.SERPAPI_MONTHLY_QUOTA <= 0:
+        return None
+    return MonthlyQuota(
+        config.SERPAPI_QUOTA_PATH,
+        config.SERPAPI_MONTHLY_QUOTA,
+        cache_only_below=config.SERPAPI_QUOTA_CACHE_ONLY_BELOW,
+        reserve=config.SERPAPI_QUOTA_RESERVE
+    )
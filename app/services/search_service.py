@@ -1,19 +1,110 @@
+import asyncio
+import math
 import os
+import time
 import httpx
+from collections.abc import AsyncIterator, Awaitable
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from itertools import chain
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from dotenv import load_dotenv
-from app.models.search import SearchResult, SearchResponse
+from app import config
+from app.models.search import SearchResult, SearchResponse, BatchSearchItem, SearchStreamEvent
+from app.services.cache import QueryCache, create_query_cache
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.quota import MonthlyQuota, SearchRateLimitedError, TokenBucket, create_monthly_quota, create_rate_limiter
+from app.services.single_flight import SingleFlight
 
 load_dotenv()
 
 
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Vytvoří sdílený AsyncClient s poolem spojení pro SerpAPI.
+    Životní cyklus klienta řídí lifespan FastAPI aplikace (viz app.main).
+    """
+    limits = httpx.Limits(
+        max_connections=config.SERPAPI_MAX_CONNECTIONS,
+        max_keepalive_connections=config.SERPAPI_MAX_KEEPALIVE,
+        keepalive_expiry=config.SERPAPI_KEEPALIVE_EXPIRY
+    )
+    return httpx.AsyncClient(
+        timeout=config.SERPAPI_TIMEOUT,
+        limits=limits,
+        http2=config.SERPAPI_HTTP2
+    )
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalizovaná podoba URL pro deduplikaci výsledků napříč stránkami:
+    malá písmena ve schématu a hostu, bez fragmentu, výchozího portu,
+    koncového lomítka a sledovacích parametrů (utm_*).
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme, parts.port) in (("http", 80), ("https", 443)):
+        netloc = netloc.rsplit(":", 1)[0]
+    query = urlencode([
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_")
+    ])
+    return urlunsplit((scheme, netloc, parts.path.rstrip("/"), query, ""))
+
+
+def load_warmup_queries(path: str) -> list[str]:
+    """Načte dotazy pro zahřátí cache: jeden na řádek, prázdné řádky a komentáře (#) se přeskočí."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = [line.strip() for line in f]
+    except OSError as e:
+        print(f"DEBUG: Soubor s dotazy pro zahřátí cache nelze načíst: {e}")
+        return []
+    return list(dict.fromkeys(line for line in lines if line and not line.startswith("#")))
+
+
+@dataclass
+class FetchResult:
+    """Výsledek jednoho volání upstreamu - stav patří požadavku, ne sdílené službě."""
+    raw_json: dict
+    provider: str = "serpapi"
+    warning: str | None = None
+
+
 class SearchService:
     SERPAPI_URL = "https://serpapi.com/search"
+    HL = "cs"
+    GL = "cz"
+    NUM = 10
+
+    BREAKER_OPEN_WARNING = "Vyhledávací služba je dočasně nedostupná. Zobrazuji ukázková data."
+    QUOTA_LOW_WARNING = "Měsíční rozpočet vyhledávání dochází, nové dotazy se nevyhledávají. Zobrazuji ukázková data."
+    QUOTA_EXHAUSTED_WARNING = "Měsíční limit vyhledávání je vyčerpán. Zobrazuji ukázková data."
 
-    def __init__(self):
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        cache: QueryCache | None = None,
+        rate_limiter: TokenBucket | None = None,
+        quota: MonthlyQuota | None = None
+    ):
         self.api_key = os.getenv("SERPAPI_API_KEY")
-        self.fallback_mode = False
-        self.last_error = None
+        self.http_client = http_client
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(
+            failure_threshold=config.SERPAPI_BREAKER_FAILURE_THRESHOLD,
+            cooldown=config.SERPAPI_BREAKER_COOLDOWN
+        )
+        self.cache = cache if cache is not None else create_query_cache()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else create_rate_limiter()
+        self.quota = quota if quota is not None else create_monthly_quota()
+        self.single_flight = SingleFlight()
+        # Obnovy cache a zahřátí běžící na pozadí; reference drží úlohy naživu
+        self._background_tasks: set[asyncio.Task] = set()
+        self.background_refreshes = 0
+        self.demo_warning = None
         
         self.use_real_api = bool(
             self.api_key and 
@@ -21,71 +112,395 @@ class SearchService:
         )
         
         if not self.use_real_api:
-            self.last_error = "API klíč (SERPAPI_API_KEY) nebyl nalezen v konfiguraci. Aplikace běží v demo režimu s lokálními daty."
-            print(f"DEBUG: {self.last_error}")
+            self.demo_warning = "API klíč (SERPAPI_API_KEY) nebyl nalezen v konfiguraci. Aplikace běží v demo režimu s lokálními daty."
+            print(f"DEBUG: {self.demo_warning}")
 
     def search(self, search_query: str) -> SearchResponse:
-        raw_json = self._fetch_from_serpapi(search_query)
-        search_results = self._parse_organic_results(raw_json)
+        fetch_result = self._fetch_from_serpapi(search_query)
+        search_results = self._parse_organic_results(fetch_result.raw_json)
+        return self._build_response(search_query, search_results, fetch_result)
 
-        provider_name = "serpapi"
-        if not self.use_real_api:
-            provider_name = "mock"
-        elif self.fallback_mode:
-            provider_name = "serpapi-fallback"
+    async def asearch(self, search_query: str, max_results: int | None = None) -> SearchResponse:
+        max_results = min(max_results or self.NUM, config.SEARCH_MAX_RESULTS)
+        cache_key = QueryCache.make_key(search_query, self.HL, self.GL, max_results)
+        if self.cache is not None:
+            cached_response = await self.cache.get(cache_key)
+            if cached_response is not None:
+                # Zastaralou (nebo brzy vypršující oblíbenou) odpověď vrátíme hned a obnovíme ji na pozadí
+                if self.cache.needs_refresh(cache_key, cached_response):
+                    self._refresh_in_background(search_query, cache_key, max_results)
+                return cached_response
+
+        # Souběžné stejné dotazy čekají na jediné volání SerpAPI
+        return await self.single_flight.do(
+            cache_key,
+            lambda: self._asearch_uncached(search_query, cache_key, max_results)
+        )
+
+    def _refresh_in_background(self, search_query: str, cache_key: str, max_results: int) -> None:
+        # Při docházející kvótě obnovu odmítne už rezervace volání (v cache zůstane stará odpověď)
+        if self.single_flight.is_in_flight(cache_key):
+            return
+        self.background_refreshes += 1
+        self._spawn(self.single_flight.do(
+            cache_key,
+            lambda: self._asearch_uncached(search_query, cache_key, max_results)
+        ))
+
+    def _spawn(self, coro: Awaitable) -> asyncio.Task:
+        task = asyncio.ensure_future(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._forget_background_task)
+        return task
+
+    def _forget_background_task(self, task: asyncio.Task) -> None:
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # Neúspěšná obnova nevadí - v cache zůstává zastaralá odpověď
+            print(f"DEBUG: Obnova cache na pozadí selhala: {task.exception()}")
+
+    def start_warm_up(self, queries: list[str]) -> asyncio.Task:
+        """Zahřeje cache populárními dotazy na pozadí, start aplikace nečeká."""
+        return self._spawn(self.asearch_many(queries))
+
+    async def budget_status(self) -> dict:
+        quota = await asyncio.to_thread(self.quota.status) if self.quota is not None else None
+        return {
+            "stage": quota["stage"] if quota is not None else MonthlyQuota.NORMAL,
+            "quota": quota,
+            "rate_limit": {
+                "per_minute": self.rate_limiter.rate * 60,
+                "tokens_available": round(self.rate_limiter.tokens, 1)
+            } if self.rate_limiter is not None else None
+        }
+
+    async def cancel_background_tasks(self) -> None:
+        tasks = list(self._background_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _asearch_uncached(self, search_query: str, cache_key: str, max_results: int) -> SearchResponse:
+        # Všechny stránky (start=0, 10, 20, ...) stahujeme souběžně
+        starts = range(0, math.ceil(max_results / self.NUM) * self.NUM, self.NUM)
+        fetch_results = await asyncio.gather(
+            *(self._afetch_from_serpapi(search_query, start) for start in starts),
+            return_exceptions=True
+        )
+        # Limit rychlosti u první stránky shodí celý dotaz, u dalších stránek je výsledek jen neúplný
+        for page in fetch_results:
+            if isinstance(page, BaseException) and not isinstance(page, SearchRateLimitedError):
+                raise page
+        if isinstance(fetch_results[0], SearchRateLimitedError):
+            raise fetch_results[0]
+        fetch_results = [
+            page if isinstance(page, FetchResult) else FetchResult({}, provider="rate-limited")
+            for page in fetch_results
+        ]
+
+        fetch_result = fetch_results[0]
+        if fetch_result.provider != "serpapi":
+            # Bez první stránky nemá smysl skládat zbytek - vracíme fallback / demo data
+            raw_pages = [fetch_result.raw_json]
+        else:
+            raw_pages = [page.raw_json for page in fetch_results if page.provider == "serpapi"]
+            if len(raw_pages) < len(fetch_results):
+                fetch_result = FetchResult(
+                    fetch_result.raw_json,
+                    warning="Některé stránky výsledků se nepodařilo načíst, výsledky jsou neúplné."
+                )
+
+        search_results = self._parse_organic_results(*raw_pages)[:max_results]
+        search_response = self._build_response(search_query, search_results, fetch_result)
+
+        # Ukládáme jen kompletní odpovědi SerpAPI, ne fallback, demo data ani neúplné stránky
+        if self.cache is not None and fetch_result.provider == "serpapi" and fetch_result.warning is None:
+            await self.cache.set(cache_key, search_response)
+        return search_response
+
+    async def asearch_many(
+        self,
+        queries: list[str],
+        concurrency: int | None = None,
+        deadline: float | None = None,
+        max_results: int | None = None
+    ) -> list[BatchSearchItem]:
+        items: list[BatchSearchItem | None] = [None] * len(queries)
+        async for index, item in self.aiter_search_many(queries, concurrency, deadline, max_results):
+            items[index] = item
+        return items
+
+    async def aiter_search_many(
+        self,
+        queries: list[str],
+        concurrency: int | None = None,
+        deadline: float | None = None,
+        max_results: int | None = None
+    ) -> AsyncIterator[tuple[int, BatchSearchItem]]:
+        """
+        Spustí dotazy souběžně (nejvýše `concurrency` najednou) a vrací dvojice
+        (index, výsledek) v pořadí dokončení. Dotazy nestihnuté do `deadline`
+        sekund skončí chybou místo čekání na nejpomalejší z nich.
+        """
+        if not queries:
+            return
+
+        concurrency = min(
+            concurrency or config.SEARCH_BATCH_CONCURRENCY,
+            config.SEARCH_BATCH_MAX_CONCURRENCY,
+            len(queries)
+        )
+        deadline = deadline or config.SEARCH_BATCH_DEADLINE
+
+        pending = iter(enumerate(queries))
+        # Omezená fronta = backpressure: pomalý konzument zastaví i workery
+        completed: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+
+        async def worker():
+            for index, search_query in pending:
+                await completed.put((index, await self._asearch_item(search_query, max_results)))
 
-        search_response = SearchResponse(
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + deadline
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        unfinished = set(range(len(queries)))
+        try:
+            while unfinished:
+                try:
+                    index, item = await asyncio.wait_for(completed.get(), expires_at - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                unfinished.discard(index)
+                yield index, item
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        for index in sorted(unfinished):
+            yield index, BatchSearchItem(
+                query=queries[index],
+                error="Vypršel časový limit dávky, dotaz nebyl dokončen."
+            )
+
+    async def aiter_search_events(
+        self,
+        queries: list[str],
+        concurrency: int | None = None,
+        deadline: float | None = None,
+        max_results: int | None = None
+    ) -> AsyncIterator[SearchStreamEvent]:
+        """
+        Streamuje výsledky dotazů hned, jak jsou k dispozici. Pro každý dokončený
+        dotaz pošle jeho výsledky jednotlivě a poté metadata odpovědi; v paměti
+        tak nikdy nedrží celou dávku.
+        """
+        async for _, item in self.aiter_search_many(queries, concurrency, deadline, max_results):
+            if item.error is not None:
+                yield SearchStreamEvent(event="error", query=item.query, error=item.error)
+                continue
+            for search_result in item.response.results:
+                yield SearchStreamEvent(event="result", query=item.query, result=search_result)
+            yield SearchStreamEvent(
+                event="response",
+                query=item.query,
+                response=item.response.model_copy(update={"results": []})
+            )
+        yield SearchStreamEvent(event="done", total=len(queries))
+
+    async def _asearch_item(self, search_query: str, max_results: int | None = None) -> BatchSearchItem:
+        search_query = search_query.strip()
+        if not search_query:
+            return BatchSearchItem(query=search_query, error="Vyhledávací dotaz nesmí být prázdný")
+        try:
+            return BatchSearchItem(query=search_query, response=await self.asearch(search_query, max_results))
+        except SearchRateLimitedError as e:
+            return BatchSearchItem(query=search_query, error=str(e))
+        except Exception as e:
+            return BatchSearchItem(query=search_query, error=f"Neočekávaná chyba serveru: {str(e)}")
+
+    async def stats(self) -> dict:
+        return {
+            "cache": await self.cache.stats() if self.cache is not None else None,
+            "circuit_breaker": self.circuit_breaker.state,
+            "single_flight": self.single_flight.stats(),
+            "background_refreshes": self.background_refreshes,
+            "budget": await self.budget_status()
+        }
+
+    async def aclose(self) -> None:
+        await self.cancel_background_tasks()
+        if self.cache is not None:
+            await self.cache.backend.close()
+        if self.quota is not None:
+            self.quota.close()
+
+    def _build_response(
+        self,
+        search_query: str,
+        search_results: list[SearchResult],
+        fetch_result: FetchResult
+    ) -> SearchResponse:
+        return SearchResponse(
             query=search_query,
             fetched_at=datetime.now(timezone.utc),
-            provider=provider_name,
+            provider=fetch_result.provider,
             total_returned=len(search_results),
             results=search_results,
-            warning=self.last_error
+            warning=fetch_result.warning
         )
 
-        return search_response
+    def _fetch_from_serpapi(self, search_query: str) -> FetchResult:
+        wait, fallback = self._admit_upstream_call()
+        if fallback is not None:
+            return fallback
+
+        try:
+            # Synchronní API blokuje volajícího už z podstaty, na token proto čeká ve vlákně
+            if wait:
+                time.sleep(wait)
+            raw_json = self._call_serpapi(search_query)
+        except httpx.HTTPError as e:
+            return self._upstream_failed(e)
+        except BaseException:
+            self.circuit_breaker.release()
+            raise
+
+        self.circuit_breaker.record_success()
+        return FetchResult(raw_json)
 
-    def _fetch_from_serpapi(self, search_query: str) -> dict:
-        if self.use_real_api:
-            try:
-                return self._call_serpapi(search_query)
-            except httpx.HTTPStatusError as e:
-                self.fallback_mode = True
-                if e.response.status_code == 401:
-                    self.last_error = "Neplatný API klíč. Zkontrolujte prosím nastavení."
-                elif e.response.status_code == 402:
-                    self.last_error = "Limit vyhledávání pro tento měsíc byl vyčerpán."
-                elif e.response.status_code == 429:
-                    self.last_error = "Příliš mnoho požadavků. Zkuste to prosím za chvíli."
-                else:
-                    self.last_error = f"Externí API vrátilo chybu {e.response.status_code}. Zobrazuji ukázková data."
-                return self._get_mock_data()
-            except httpx.TimeoutException:
-                self.fallback_mode = True
-                self.last_error = "Vyhledávací služba neodpověděla včas (Timeout). Zobrazuji ukázková data."
-                return self._get_mock_data()
-            except httpx.RequestError:
-                self.fallback_mode = True
-                self.last_error = "Problém s připojením k síti. Zobrazuji ukázková data."
-                return self._get_mock_data()
+    async def _afetch_from_serpapi(self, search_query: str, start: int = 0) -> FetchResult:
+        if self.quota is not None:
+            # Kvóta je v SQLite, zápis neblokuje event loop
+            wait, fallback = await asyncio.to_thread(self._admit_upstream_call)
         else:
-            return self._get_mock_data()
+            wait, fallback = self._admit_upstream_call()
+        if fallback is not None:
+            return fallback
 
-    def _call_serpapi(self, search_query: str) -> dict:
+        try:
+            if wait:
+                await asyncio.sleep(wait)
+            raw_json = await self._acall_serpapi(search_query, start)
+        except httpx.HTTPError as e:
+            return self._upstream_failed(e)
+        except BaseException:
+            self.circuit_breaker.release()
+            raise
+
+        self.circuit_breaker.record_success()
+        return FetchResult(raw_json)
+
+    def _admit_upstream_call(self) -> tuple[float, FetchResult | None]:
+        """
+        Společná vstupní kontrola synchronní i asynchronní cesty: demo režim,
+        circuit breaker a rezervace rozpočtu. Vrací (kolik sekund počkat na token,
+        náhradní výsledek) - s náhradním výsledkem se SerpAPI nevolá.
+        """
+        if not self.use_real_api:
+            return 0.0, FetchResult(self._get_mock_data(), provider="mock", warning=self.demo_warning)
+        if not self.circuit_breaker.allow_request():
+            return 0.0, self._fallback(self.BREAKER_OPEN_WARNING)
+        try:
+            wait, budget_warning = self._reserve_upstream_call()
+        except BaseException:
+            self.circuit_breaker.release()
+            raise
+        if budget_warning is not None:
+            self.circuit_breaker.release()
+            return 0.0, self._fallback(budget_warning)
+        return wait, None
+
+    def _reserve_upstream_call(self) -> tuple[float, str | None]:
+        """
+        Rozhodne o volání SerpAPI ještě před ním, aby se nečekalo na jisté odmítnutí.
+        Vrací (kolik sekund počkat na token, varování) - varování znamená, že se
+        kvóta šetří a místo volání se vrátí ukázková data. Nejdřív se kontroluje
+        režim kvóty, až potom se bere token, aby ukázková data nespotřebovala
+        limit rychlosti. Přeplněný limit rychlosti vyhodí SearchRateLimitedError;
+        skutečný dotaz nikdy nedostane ukázková data jen proto, že by musel chvíli počkat.
+        """
+        if self.quota is not None:
+            warning = self._quota_warning(self.quota.stage)
+            if warning is not None:
+                return 0.0, warning
+        wait = self.rate_limiter.reserve() if self.rate_limiter is not None else 0.0
+        if self.quota is not None:
+            warning = self._quota_warning(self.quota.try_consume())
+            if warning is not None:
+                # Poslední rozpočet mezitím vyčerpal jiný worker - token vrátíme
+                if self.rate_limiter is not None:
+                    self.rate_limiter.refund()
+                return 0.0, warning
+        return wait, None
+
+    def _quota_warning(self, stage: str) -> str | None:
+        if stage == MonthlyQuota.CACHE_ONLY:
+            return self.QUOTA_LOW_WARNING
+        if stage == MonthlyQuota.FALLBACK:
+            return self.QUOTA_EXHAUSTED_WARNING
+        return None
+
+    def _upstream_failed(self, error: httpx.HTTPError) -> FetchResult:
+        self._record_upstream_error(error)
+        return self._fallback(self._describe_upstream_error(error))
+
+    def _record_upstream_error(self, error: httpx.HTTPError) -> None:
+        self.circuit_breaker.record_failure()
+        # Série 429 řeší circuit breaker, 402 znamená vyčerpanou kvótu až do konce měsíce
+        if isinstance(error, httpx.HTTPStatusError) and error.response.status_code == 402 and self.quota is not None:
+            self.quota.mark_exhausted()
+
+    def _fallback(self, warning: str) -> FetchResult:
+        return FetchResult(self._get_mock_data(), provider="serpapi-fallback", warning=warning)
+
+    def _describe_upstream_error(self, error: httpx.HTTPError) -> str:
+        if isinstance(error, httpx.HTTPStatusError):
+            if error.response.status_code == 401:
+                return "Neplatný API klíč. Zkontrolujte prosím nastavení."
+            if error.response.status_code == 402:
+                return "Limit vyhledávání pro tento měsíc byl vyčerpán."
+            if error.response.status_code == 429:
+                return "Příliš mnoho požadavků. Zkuste to prosím za chvíli."
+            return f"Externí API vrátilo chybu {error.response.status_code}. Zobrazuji ukázková data."
+        if isinstance(error, httpx.TimeoutException):
+            return "Vyhledávací služba neodpověděla včas (Timeout). Zobrazuji ukázková data."
+        return "Problém s připojením k síti. Zobrazuji ukázková data."
+
+    def _build_params(self, search_query: str, start: int = 0) -> dict:
         params = {
             "api_key": self.api_key,
             "engine": "google",
             "q": search_query,
-            "num": 10,
-            "hl": "cs",
-            "gl": "cz"
+            "num": self.NUM,
+            "hl": self.HL,
+            "gl": self.GL
         }
-        
-        with httpx.Client(timeout=10.0) as client:
+        if start:
+            params["start"] = start
+        return params
+
+    def _call_serpapi(self, search_query: str) -> dict:
+        params = self._build_params(search_query)
+
+        with httpx.Client(timeout=config.SERPAPI_TIMEOUT) as client:
             response = client.get(self.SERPAPI_URL, params=params)
             response.raise_for_status()
             return response.json()
 
+    async def _acall_serpapi(self, search_query: str, start: int = 0) -> dict:
+        params = self._build_params(search_query, start)
+
+        if self.http_client is None:
+            # Mimo lifespan aplikace (např. skripty, testy) si vytvoříme dočasného klienta
+            async with httpx.AsyncClient(timeout=config.SERPAPI_TIMEOUT) as client:
+                response = await client.get(self.SERPAPI_URL, params=params)
+        else:
+            response = await self.http_client.get(self.SERPAPI_URL, params=params)
+
+        response.raise_for_status()
+        return response.json()
+
     def _get_mock_data(self) -> dict:
         raw_json = {
             "organic_results": [
@@ -123,15 +538,28 @@ class SearchService:
         }
         return raw_json
 
-    def _parse_organic_results(self, raw_json: dict) -> list[SearchResult]:
+    def _parse_organic_results(self, *raw_pages: dict) -> list[SearchResult]:
+        """
+        Převede organické výsledky z jedné či více stránek SerpAPI na SearchResult.
+        Stránky se procházejí postupně bez slučování do jednoho seznamu, duplicitní
+        URL (po normalizaci) se vynechají a pozice se číslují souvisle od 1.
+        """
         search_results = []
-        items = raw_json.get("organic_results", [])
+        seen_urls = set()
+        items = chain.from_iterable(raw_json.get("organic_results", []) for raw_json in raw_pages)
         
-        for position, item in enumerate(items, start=1):
+        for item in items:
+            url = item.get("link", "")
+            if url:
+                key = canonical_url(url)
+                if key in seen_urls:
+                    continue
+                seen_urls.add(key)
+
             search_result = SearchResult(
-                position=position,
+                position=len(search_results) + 1,
                 title=item.get("title", ""),
-                url=item.get("link", ""),
+                url=url,
                 snippet=item.get("snippet")
             )
             search_results.append(search_result)
@@ -0,0 +1,45 @@
+import asyncio
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Slučuje souběžná volání se stejným klíčem: první volající spustí práci,
+    ostatní čekají na stejný výsledek (nebo výjimku), dokud neskončí.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.deduplicated = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.deduplicated += 1
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        # Zrušení jednoho volajícího nesmí zrušit sdílenou práci ostatním
+        return await asyncio.shield(task)
+
+    def is_in_flight(self, key: str) -> bool:
+        return key in self._in_flight
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Výjimku si vyzvedneme, i když už na ni nikdo nečeká
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "upstream_calls": self.calls,
+            "deduplicated": self.deduplicated,
+            "in_flight": len(self._in_flight)
+        }
@@ -1,11 +1,15 @@
 const userInputElement = document.getElementById('user_input');
 const searchButton = document.getElementById('search_button');
+const maxResultsElement = document.getElementById('max_results');
 const resultsElement = document.getElementById('results');
 const loadingElement = document.getElementById('loading');
 const errorElement = document.getElementById('error');
 const actionsElement = document.getElementById('actions');
 const btnDownloadJson = document.getElementById('btn_download_json');
+const btnDownloadJsonl = document.getElementById('btn_download_jsonl');
+const btnDownloadCsv = document.getElementById('btn_download_csv');
 const btnDownloadExcel = document.getElementById('btn_download_excel');
+const btnDownloadParquet = document.getElementById('btn_download_parquet');
 
 let currentSearchData = null;
 
@@ -26,28 +30,44 @@ async function performSearch() {
     searchButton.disabled = true;
 
     try {
-        const response = await fetch(`/api/search?user_input=${encodeURIComponent(user_input)}`);
+        const params = new URLSearchParams({ user_input, max_results: maxResultsElement.value });
+        const response = await fetch(`/api/search/stream?${params}`);
 
         if (!response.ok) {
             const errorData = await response.json();
             throw new Error(errorData.detail || 'Chyba při vyhledávání');
         }
 
-        const search_response = await response.json();
-
-        currentSearchData = search_response;
-
-        // Pokud máme varování (fallback), zobrazíme ho, ale nesmažeme výsledky
-        if (search_response.warning) {
-            errorElement.innerHTML = `<i class="fas fa-exclamation-triangle"></i> ${search_response.warning}`;
-            errorElement.classList.add('active');
-        } else {
-            hideError();
+        // Výsledky vykreslujeme průběžně, jak přicházejí jednotlivé řádky NDJSON
+        const collectedResults = [];
+        let resultsShown = false;
+
+        for await (const event of readNdjson(response)) {
+            if (event.event === 'result') {
+                if (!resultsShown) {
+                    hideLoading();
+                    resultsShown = true;
+                }
+                collectedResults.push(event.result);
+                appendResult(event.result);
+            } else if (event.event === 'response') {
+                currentSearchData = { ...event.response, results: collectedResults };
+
+                // Pokud máme varování (fallback), zobrazíme ho, ale nesmažeme výsledky
+                if (event.response.warning) {
+                    errorElement.innerHTML = `<i class="fas fa-exclamation-triangle"></i> ${event.response.warning}`;
+                    errorElement.classList.add('active');
+                } else {
+                    hideError();
+                }
+            } else if (event.event === 'error') {
+                throw new Error(event.error);
+            }
         }
 
-        displayResults(search_response);
-
-        if (search_response.results.length > 0) {
+        if (collectedResults.length === 0) {
+            resultsElement.innerHTML = '<p style="text-align: center; color: #666;">Žádné výsledky nenalezeny</p>';
+        } else if (currentSearchData) {
             actionsElement.style.display = 'flex';
         }
 
@@ -59,35 +79,41 @@ async function performSearch() {
     }
 }
 
-function downloadJson() {
-    if (!currentSearchData) return;
-
-    const jsonString = JSON.stringify(currentSearchData, null, 2);
-    const blob = new Blob([jsonString], { type: 'application/json' });
-    const url = URL.createObjectURL(blob);
+async function* readNdjson(response) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
 
-    const a = document.createElement('a');
-    a.href = url;
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
 
-    const timestamp = new Date().toISOString().replace(/[:.]/g, '-').slice(0, 19);
-    a.download = `search_results_${timestamp}.json`;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
 
-    document.body.appendChild(a);
-    a.click();
+        for (const line of lines) {
+            if (line.trim()) {
+                yield JSON.parse(line);
+            }
+        }
+    }
 
-    document.body.removeChild(a);
-    URL.revokeObjectURL(url);
+    if (buffer.trim()) {
+        yield JSON.parse(buffer);
+    }
 }
 
-async function downloadExcel() {
+// Všechny formáty generuje server jako stream (JSON s metadaty dotazu, JSONL jen výsledky po řádcích)
+async function downloadExport(format, button) {
     if (!currentSearchData) return;
 
-    const originalText = btnDownloadExcel.textContent;
-    btnDownloadExcel.textContent = 'Stahuji...';
-    btnDownloadExcel.disabled = true;
+    const originalText = button.textContent;
+    button.textContent = 'Stahuji...';
+    button.disabled = true;
 
     try {
-        const response = await fetch('/api/export/excel', {
+        const response = await fetch(`/api/export/${format}`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -96,7 +122,8 @@ async function downloadExcel() {
         });
 
         if (!response.ok) {
-            throw new Error('Chyba při generování Excel souboru');
+            const errorData = await response.json().catch(() => ({}));
+            throw new Error(errorData.detail || 'Chyba při generování souboru');
         }
 
         const blob = await response.blob();
@@ -106,7 +133,7 @@ async function downloadExcel() {
         a.href = url;
 
         const contentDisposition = response.headers.get('Content-Disposition');
-        let filename = 'search_results.xlsx';
+        let filename = `search_results.${format}`;
         if (contentDisposition && contentDisposition.indexOf('attachment') !== -1) {
             const filenameRegex = /filename[^;=\n]*=((['"]).*?\2|[^;\n]*)/;
             const matches = filenameRegex.exec(contentDisposition);
@@ -124,34 +151,27 @@ async function downloadExcel() {
 
     } catch (error) {
         console.error('Download failed:', error);
-        alert('Nepodařilo se stáhnout Excel soubor: ' + error.message);
+        alert('Nepodařilo se stáhnout soubor: ' + error.message);
     } finally {
-        btnDownloadExcel.textContent = originalText;
-        btnDownloadExcel.disabled = false;
+        button.textContent = originalText;
+        button.disabled = false;
     }
 }
 
-function displayResults(search_response) {
-    if (search_response.results.length === 0) {
-        resultsElement.innerHTML = '<p style="text-align: center; color: #666;">Žádné výsledky nenalezeny</p>';
-        return;
-    }
+function appendResult(result) {
+    const resultItem = document.createElement('div');
+    resultItem.className = 'result-item';
+
+    resultItem.innerHTML = `
+        <div class="result-header">
+            <span class="result-position">${result.position}</span>
+            <a href="${escapeHtml(result.url)}" target="_blank" class="result-title">${escapeHtml(result.title)}</a>
+        </div>
+        <div class="result-url">${escapeHtml(result.url)}</div>
+        ${result.snippet ? `<div class="result-snippet">${escapeHtml(result.snippet)}</div>` : ''}
+    `;
 
-    search_response.results.forEach(result => {
-        const resultItem = document.createElement('div');
-        resultItem.className = 'result-item';
-
-        resultItem.innerHTML = `
-            <div class="result-header">
-                <span class="result-position">${result.position}</span>
-                <a href="${escapeHtml(result.url)}" target="_blank" class="result-title">${escapeHtml(result.title)}</a>
-            </div>
-            <div class="result-url">${escapeHtml(result.url)}</div>
-            ${result.snippet ? `<div class="result-snippet">${escapeHtml(result.snippet)}</div>` : ''}
-        `;
-
-        resultsElement.appendChild(resultItem);
-    });
+    resultsElement.appendChild(resultItem);
 }
 
 function showLoading() {
@@ -179,8 +199,11 @@ function escapeHtml(text) {
 }
 
 searchButton.addEventListener('click', performSearch);
-btnDownloadJson.addEventListener('click', downloadJson);
-btnDownloadExcel.addEventListener('click', downloadExcel);
+btnDownloadJson.addEventListener('click', () => downloadExport('json', btnDownloadJson));
+btnDownloadJsonl.addEventListener('click', () => downloadExport('jsonl', btnDownloadJsonl));
+btnDownloadCsv.addEventListener('click', () => downloadExport('csv', btnDownloadCsv));
+btnDownloadExcel.addEventListener('click', () => downloadExport('excel', btnDownloadExcel));
+btnDownloadParquet.addEventListener('click', () => downloadExport('parquet', btnDownloadParquet));
 
 userInputElement.addEventListener('keypress', (e) => {
     if (e.key === 'Enter') {
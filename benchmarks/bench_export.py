@@ -0,0 +1,104 @@
+"""
+Benchmark: export do Excelu přes pandas (původní řešení) vs. streamovaný XLSX writer.
+
+Každé měření běží v samostatném procesu, aby špičková paměť (peak RSS) jednoho
+běhu neovlivnila další. Původní cesta vyžaduje nainstalovaný pandas.
+
+Spuštění:
+    python -m benchmarks.bench_export --rows 10000 100000 1000000
+"""
+
+import argparse
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from app.models.search import SearchResponse, SearchResult
+
+
+def build_response(rows: int) -> SearchResponse:
+    results = [
+        SearchResult.model_construct(
+            position=i,
+            title=f"Výsledek číslo {i} - ukázkový titulek stránky",
+            url=f"https://example.com/clanek/{i}?ref=search",
+            snippet="Ukázkový popisek výsledku vyhledávání, který má realistickou délku několika desítek znaků."
+        )
+        for i in range(1, rows + 1)
+    ]
+    return SearchResponse.model_construct(
+        query="benchmark",
+        fetched_at=datetime.now(timezone.utc),
+        provider="serpapi",
+        total_returned=rows,
+        results=results,
+        warning=None,
+        cached=False
+    )
+
+
+def export_pandas(data: SearchResponse) -> int:
+    # Věrná kopie původní implementace app/api/export.py
+    from io import BytesIO
+    import pandas as pd
+
+    df = pd.DataFrame([result.model_dump() for result in data.results])
+    df = df.rename(columns={"position": "Pozice", "title": "Titulek", "url": "URL", "snippet": "Popis"})
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine="openpyxl") as writer:
+        df.to_excel(writer, index=False, sheet_name="Výsledky")
+    output.seek(0)
+    return len(output.getvalue())
+
+
+def export_stream(data: SearchResponse) -> int:
+    from app.services.exporters import ExcelExporter
+
+    return sum(len(chunk) for chunk in ExcelExporter().iter_bytes(data))
+
+
+def run_child(mode: str, rows: int) -> None:
+    data = build_response(rows)
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    size = export_pandas(data) if mode == "pandas" else export_stream(data)
+    elapsed = time.perf_counter() - start
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{elapsed:.3f} {peak_kb} {peak_kb - baseline_kb} {size}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--modes", nargs="+", default=["pandas", "stream"], choices=["pandas", "stream"])
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], int(args.child[1]))
+        return
+
+    print(f"{'řádků':>10} {'engine':>8} {'čas [s]':>9} {'peak RSS [MB]':>14} {'nad vstupem [MB]':>17} {'soubor [MB]':>12}")
+    for rows in args.rows:
+        for mode in args.modes:
+            completed = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_export", "--child", mode, str(rows)],
+                capture_output=True,
+                text=True
+            )
+            if completed.returncode != 0:
+                print(f"{rows:>10} {mode:>8}  selhalo: {completed.stderr.strip().splitlines()[-1]}")
+                continue
+            elapsed, peak_kb, delta_kb, size = completed.stdout.split()[-4:]
+            print(
+                f"{rows:>10} {mode:>8} {float(elapsed):>9.2f} {int(peak_kb) / 1024:>14.1f}"
+                f" {int(delta_kb) / 1024:>17.1f} {int(size) / 1024 / 1024:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: blokující vs. asynchronní vyhledávání proti lokálnímu stub SerpAPI serveru.
+
+Spuštění:
+    python -m benchmarks.bench_search_async --requests 200 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import socket
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI
+
+from app.services.search_service import SearchService, create_http_client
+
+
+def build_stub_app(latency: float) -> FastAPI:
+    stub = FastAPI()
+
+    @stub.get("/search")
+    async def stub_search(q: str):
+        await asyncio.sleep(latency)
+        return {
+            "organic_results": [
+                {"title": f"{q} {i}", "link": f"https://example.com/{i}", "snippet": "stub"}
+                for i in range(10)
+            ]
+        }
+
+    return stub
+
+
+def start_stub_server(latency: float) -> tuple[uvicorn.Server, str]:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(build_stub_app(latency), port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}/search"
+
+
+def make_service(url: str) -> SearchService:
+    service = SearchService()
+    service.SERPAPI_URL = url
+    service.api_key = "bench"
+    service.use_real_api = True
+    return service
+
+
+async def run_blocking(service: SearchService, total: int) -> float:
+    # Původní chování routy: sync search() volaný přímo z event loopu
+    async def one(i: int):
+        service.search(f"query {i}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return time.perf_counter() - start
+
+
+async def run_async(service: SearchService, total: int) -> float:
+    async with create_http_client() as client:
+        service.http_client = client
+        start = time.perf_counter()
+        await asyncio.gather(*(service.asearch(f"query {i}") for i in range(total)))
+        elapsed = time.perf_counter() - start
+    service.http_client = None
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulovaná latence SerpAPI v sekundách")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.latency)
+    try:
+        blocking = asyncio.run(run_blocking(make_service(url), args.requests))
+        pooled = asyncio.run(run_async(make_service(url), args.requests))
+    finally:
+        server.should_exit = True
+
+    print(f"Požadavků: {args.requests}, latence upstreamu: {args.latency * 1000:.0f} ms")
+    print(f"blokující httpx.Client : {blocking:7.2f} s  ({args.requests / blocking:8.1f} req/s)")
+    print(f"sdílený AsyncClient    : {pooled:7.2f} s  ({args.requests / pooled:8.1f} req/s)")
+    print(f"zrychlení              : {blocking / pooled:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
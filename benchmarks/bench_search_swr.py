@@ -0,0 +1,83 @@
+"""
+Benchmark: latence populárních dotazů s obyčejnou TTL cache vs. stale-while-revalidate
+a obnovou předem, proti lokálnímu stub SerpAPI serveru.
+
+Spuštění:
+    python -m benchmarks.bench_search_swr --duration 5 --ttl 0.5 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.services.cache import MemoryCache, QueryCache
+from app.services.search_service import create_http_client
+from benchmarks.bench_search_async import make_service, start_stub_server
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_load(url: str, query_cache: QueryCache, queries: list[str], duration: float, interval: float) -> list[float]:
+    service = make_service(url)
+    service.cache = query_cache
+    latencies = []
+
+    async def client(search_query: str):
+        loop = asyncio.get_running_loop()
+        end = loop.time() + duration
+        while loop.time() < end:
+            start = time.perf_counter()
+            await service.asearch(search_query)
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(interval)
+
+    async with create_http_client() as http_client:
+        service.http_client = http_client
+        # Zahřátí, aby se měřilo chování po vypršení TTL, ne studený start
+        await service.asearch_many(queries)
+        await asyncio.gather(*(client(search_query) for search_query in queries for _ in range(5)))
+        await service.cancel_background_tasks()
+    return latencies
+
+
+def report(name: str, latencies: list[float]) -> None:
+    print(
+        f"{name:<24} n={len(latencies):5d}  p50 {statistics.median(latencies) * 1000:7.1f} ms"
+        f"  p99 {percentile(latencies, 0.99) * 1000:7.1f} ms  max {max(latencies) * 1000:7.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=5.0, help="Délka zátěže v sekundách")
+    parser.add_argument("--ttl", type=float, default=0.5, help="TTL cache v sekundách")
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulovaná latence SerpAPI v sekundách")
+    parser.add_argument("--queries", type=int, default=10, help="Počet populárních dotazů")
+    parser.add_argument("--interval", type=float, default=0.01, help="Pauza mezi požadavky jednoho klienta")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.latency)
+    queries = [f"populární dotaz {i}" for i in range(args.queries)]
+    try:
+        plain = asyncio.run(run_load(url, QueryCache(MemoryCache(), ttl=args.ttl), queries, args.duration, args.interval))
+        swr = asyncio.run(run_load(
+            url,
+            QueryCache(MemoryCache(), ttl=args.ttl, stale_ttl=60, refresh_ahead=0.8, refresh_min_hits=5),
+            queries,
+            args.duration,
+            args.interval
+        ))
+    finally:
+        server.should_exit = True
+
+    print(f"Dotazů: {args.queries}, TTL: {args.ttl} s, latence upstreamu: {args.latency * 1000:.0f} ms")
+    report("TTL cache", plain)
+    report("stale-while-revalidate", swr)
+
+
+if __name__ == "__main__":
+    main()
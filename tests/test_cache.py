@@ -0,0 +1,158 @@
+"""
+Unit testy pro cache výsledků vyhledávání.
+"""
+
+import pytest
+from datetime import datetime, timezone
+from app.models.search import SearchResponse, SearchResult
+from app.services.cache import MemoryCache, QueryCache, SQLiteCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _make_response(query: str) -> SearchResponse:
+    return SearchResponse(
+        query=query,
+        fetched_at=datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc),
+        total_returned=1,
+        results=[SearchResult(position=1, title="Test", url="https://example.com")]
+    )
+
+
+def test_make_key_normalizes_query():
+    """
+    Test, že klíč nezávisí na velikosti písmen a nadbytečných mezerách.
+    """
+    assert QueryCache.make_key("  Python   Tutorial ", "cs", "cz", 10) == QueryCache.make_key("python tutorial", "cs", "cz", 10)
+    assert QueryCache.make_key("python", "cs", "cz", 10) != QueryCache.make_key("python", "en", "cz", 10)
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_expires_entries_after_ttl():
+    """
+    Test, že položka po vypršení TTL z cache zmizí.
+    """
+    clock = FakeClock()
+    backend = MemoryCache(max_entries=10, clock=clock)
+
+    await backend.set("key", "value", ttl=60)
+    assert (await backend.get("key")).value == "value"
+
+    clock.now += 61
+    assert await backend.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_evicts_least_recently_used():
+    """
+    Test, že při překročení velikosti se vyhodí nejdéle nepoužitá položka.
+    """
+    backend = MemoryCache(max_entries=2)
+
+    await backend.set("a", "1", ttl=60)
+    await backend.set("b", "2", ttl=60)
+    await backend.get("a")
+    await backend.set("c", "3", ttl=60)
+
+    assert await backend.get("b") is None
+    assert await backend.get("a") is not None
+    assert backend.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_sqlite_cache_persists_and_evicts(tmp_path):
+    """
+    Test, že SQLite cache přežije znovuotevření a dodržuje limit velikosti.
+    """
+    path = str(tmp_path / "cache.sqlite3")
+    clock = FakeClock()
+    backend = SQLiteCache(path, max_entries=2, clock=clock)
+
+    await backend.set("a", "1", ttl=60)
+    clock.now += 1
+    await backend.set("b", "2", ttl=60)
+    clock.now += 1
+    await backend.set("c", "3", ttl=60)
+    await backend.close()
+
+    reopened = SQLiteCache(path, max_entries=2, clock=clock)
+    assert await reopened.get("a") is None
+    assert (await reopened.get("c")).value == "3"
+    assert await reopened.size() == 2
+    await reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_query_cache_keeps_fetched_at_and_counts_hits():
+    """
+    Test, že odpověď z cache má původní fetched_at, příznak cached a počítají se hity/missy.
+    """
+    query_cache = QueryCache(MemoryCache(), ttl=60)
+    original = _make_response("python")
+
+    assert await query_cache.get("python") is None
+    await query_cache.set("python", original)
+    cached = await query_cache.get("python")
+
+    assert cached.cached is True
+    assert cached.fetched_at == original.fetched_at
+    stats = await query_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_query_cache_serves_stale_entries_with_age():
+    """
+    Test, že po vypršení TTL se odpověď ještě vrací jako zastaralá s věkem a po okně zastarání zmizí.
+    """
+    clock = FakeClock()
+    query_cache = QueryCache(MemoryCache(clock=clock), ttl=60, stale_ttl=120, clock=clock)
+    await query_cache.set("python", _make_response("python"))
+
+    clock.now += 30
+    fresh = await query_cache.get("python")
+    assert fresh.stale is False
+    assert fresh.age_seconds == 30.0
+    assert query_cache.needs_refresh("python", fresh) is False
+
+    clock.now += 60
+    stale = await query_cache.get("python")
+    assert stale.stale is True
+    assert stale.age_seconds == 90.0
+    assert query_cache.needs_refresh("python", stale) is True
+
+    clock.now += 100
+    assert await query_cache.get("python") is None
+    stats = await query_cache.stats()
+    assert (stats["hits"], stats["stale_hits"], stats["misses"]) == (1, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_query_cache_refreshes_only_hot_keys_ahead():
+    """
+    Test, že předčasnou obnovu před vypršením TTL dostanou jen dotazy s dostatkem hitů.
+    """
+    clock = FakeClock()
+    query_cache = QueryCache(MemoryCache(clock=clock), ttl=100, refresh_ahead=0.8, refresh_min_hits=3, clock=clock)
+    await query_cache.set("hot", _make_response("hot"))
+    await query_cache.set("cold", _make_response("cold"))
+
+    for _ in range(3):
+        await query_cache.get("hot")
+    clock.now += 85
+    hot = await query_cache.get("hot")
+    cold = await query_cache.get("cold")
+
+    assert query_cache.needs_refresh("hot", hot) is True
+    assert query_cache.needs_refresh("cold", cold) is False
+
+    # Nové uložení vynuluje počítadlo hitů
+    await query_cache.set("hot", _make_response("hot"))
+    assert query_cache.needs_refresh("hot", await query_cache.get("hot")) is False
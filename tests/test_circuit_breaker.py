@@ -0,0 +1,72 @@
+"""
+Unit testy pro CircuitBreaker.
+"""
+
+from app.services.circuit_breaker import CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_breaker_stays_closed_below_threshold():
+    """
+    Test, že breaker zůstane zavřený, dokud počet selhání nedosáhne prahu.
+    """
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=10)
+
+    breaker.record_failure()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request() is True
+
+
+def test_success_resets_failure_count():
+    """
+    Test, že úspěšné volání vynuluje počítadlo po sobě jdoucích selhání.
+    """
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=10)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_allows_single_probe():
+    """
+    Test, že po cooldownu projde jen jeden zkušební požadavek.
+    """
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=10, clock=clock)
+    breaker.record_failure()
+
+    assert breaker.allow_request() is False
+
+    clock.now = 10.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request() is True
+    assert breaker.allow_request() is False
+
+
+def test_failed_probe_reopens_breaker():
+    """
+    Test, že neúspěšný zkušební požadavek znovu otevře breaker na celý cooldown.
+    """
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=10, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 10.0
+    assert breaker.allow_request() is True
+    breaker.record_failure()
+
+    clock.now = 15.0
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow_request() is False
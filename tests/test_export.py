@@ -1,11 +1,18 @@
+import csv
+import gzip
+import json
 import pytest
-import pandas as pd
-from io import BytesIO
+from io import BytesIO, StringIO
 from datetime import datetime, timezone
-from app.api.export import export_to_excel
+from openpyxl import load_workbook
+from app.api.export import export_results, export_to_excel
 from app.models.search import SearchResponse, SearchResult
 
 
+async def _read_body(response) -> bytes:
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
 @pytest.mark.asyncio
 async def test_export_to_excel_creates_valid_file():
     """
@@ -34,11 +41,119 @@ async def test_export_to_excel_creates_valid_file():
     assert response.headers['content-type'] == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     assert 'attachment; filename="search_results_' in response.headers['content-disposition']
     
-    # Ověření, že obsah je validní Excel (zkusíme ho načíst zpět pomocí pandas)
-    excel_content = BytesIO(response.body)
-    df = pd.read_excel(excel_content)
+    # Ověření, že obsah je validní Excel (zkusíme ho načíst zpět pomocí openpyxl)
+    workbook = load_workbook(BytesIO(await _read_body(response)))
+    rows = list(workbook.active.iter_rows(values_only=True))
     
     # Kontrola obsahu Excelu
-    assert len(df) == 1
-    assert df.iloc[0]['Titulek'] == "Test Title"
-    assert df.iloc[0]['URL'] == "https://example.com"
+    assert rows[0] == ("Pozice", "Titulek", "URL", "Popis")
+    assert len(rows) == 2
+    assert rows[1][1] == "Test Title"
+    assert rows[1][2] == "https://example.com"
+
+
+@pytest.mark.asyncio
+async def test_export_to_excel_streams_large_result_set_in_chunks():
+    """
+    Test, že velký export se posílá po částech a obsahuje všechny řádky.
+    """
+    mock_data = SearchResponse(
+        query="test query",
+        fetched_at=datetime.now(timezone.utc),
+        total_returned=5000,
+        results=[
+            SearchResult(position=i, title=f"Title {i} <&>", url=f"https://example.com/{i}")
+            for i in range(1, 5001)
+        ]
+    )
+
+    response = await export_to_excel(mock_data)
+    chunks = [chunk async for chunk in response.body_iterator]
+
+    assert len(chunks) > 2
+    sheet = load_workbook(BytesIO(b"".join(chunks)), read_only=True).active
+    rows = list(sheet.iter_rows(values_only=True))
+    assert len(rows) == 5001
+    assert rows[-1][:3] == (5000, "Title 5000 <&>", "https://example.com/5000")
+
+
+def _make_data(rows: int) -> SearchResponse:
+    return SearchResponse(
+        query="test query",
+        fetched_at=datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc),
+        total_returned=rows,
+        results=[
+            SearchResult(position=i, title=f"Titulek {i}, \"s uvozovkami\"", url=f"https://example.com/{i}", snippet=None if i % 2 else "Popis")
+            for i in range(1, rows + 1)
+        ]
+    )
+
+
+@pytest.mark.asyncio
+async def test_export_csv_contains_header_and_all_rows():
+    """
+    Test, že CSV export obsahuje hlavičku a všechny řádky včetně správně escapovaných hodnot.
+    """
+    response = await export_results("csv", _make_data(2500), encoding=None)
+
+    assert response.headers['content-type'] == 'text/csv; charset=utf-8'
+    assert response.headers['content-disposition'].endswith('.csv"')
+    rows = list(csv.reader(StringIO((await _read_body(response)).decode("utf-8"))))
+    assert rows[0] == ["query", "fetched_at", "position", "title", "url", "snippet"]
+    assert len(rows) == 2501
+    assert rows[1][3] == 'Titulek 1, "s uvozovkami"'
+
+
+@pytest.mark.asyncio
+async def test_export_json_keeps_search_metadata():
+    """
+    Test, že JSON export je celá odpověď vyhledávání včetně metadat a všech výsledků.
+    """
+    data = _make_data(2500).model_copy(update={"provider": "mock", "warning": "Ukázková data"})
+    response = await export_results("json", data, encoding=None)
+
+    assert response.headers['content-disposition'].endswith('.json"')
+    exported = SearchResponse.model_validate_json(await _read_body(response))
+    assert exported == data
+
+
+@pytest.mark.asyncio
+async def test_export_jsonl_writes_one_object_per_line():
+    """
+    Test, že JSON Lines export obsahuje na každém řádku jeden výsledek s kontextem dotazu.
+    """
+    response = await export_results("jsonl", _make_data(3), encoding=None)
+
+    lines = (await _read_body(response)).decode("utf-8").splitlines()
+    assert len(lines) == 3
+    first = json.loads(lines[0])
+    assert first["query"] == "test query"
+    assert first["position"] == 1
+    assert first["snippet"] is None
+
+
+@pytest.mark.asyncio
+async def test_export_parquet_is_readable():
+    """
+    Test, že Parquet export lze načíst zpět a má očekávané sloupce.
+    """
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    response = await export_results("parquet", _make_data(10), encoding=None)
+
+    table = pq.read_table(BytesIO(await _read_body(response)))
+    assert table.num_rows == 10
+    assert table.column_names == ["query", "fetched_at", "position", "title", "url", "snippet"]
+    assert table.column("position").to_pylist() == list(range(1, 11))
+
+
+@pytest.mark.asyncio
+async def test_export_with_gzip_content_encoding():
+    """
+    Test, že s encoding=gzip je tělo zkomprimované a hlavička Content-Encoding nastavená.
+    """
+    response = await export_results("csv", _make_data(100), encoding="gzip")
+
+    assert response.headers['content-encoding'] == "gzip"
+    text = gzip.decompress(await _read_body(response)).decode("utf-8")
+    assert len(text.splitlines()) == 101
@@ -0,0 +1,209 @@
+"""
+Testy pro renderování exportů v poolu a asynchronní exportní úlohy.
+"""
+
+import asyncio
+import os
+import threading
+import pytest
+from datetime import datetime, timezone
+from fastapi import HTTPException
+from app.api import export as export_api
+from app.models.search import SearchResponse, SearchResult
+from app.services.export_jobs import ExportPool
+
+
+def _make_data(rows: int = 3) -> SearchResponse:
+    return SearchResponse(
+        query="test query",
+        fetched_at=datetime.now(timezone.utc),
+        total_returned=rows,
+        results=[SearchResult(position=i, title=f"Title {i}", url=f"https://example.com/{i}") for i in range(1, rows + 1)]
+    )
+
+
+@pytest.fixture
+def export_pool(monkeypatch, tmp_path):
+    pool = ExportPool(kind="thread", max_workers=1, max_queue=1, retry_after=7, job_dir=str(tmp_path))
+    monkeypatch.setattr(export_api, "export_pool", pool)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_stream_renders_chunks_outside_event_loop_thread(export_pool):
+    """
+    Test, že generátor exportu běží ve vláknech poolu, ne ve vlákně event loopu.
+    """
+    threads = []
+
+    def chunks():
+        for i in range(3):
+            threads.append(threading.current_thread())
+            yield str(i).encode()
+
+    body = b"".join([chunk async for chunk in export_pool.open_stream(chunks())])
+
+    assert body == b"012"
+    assert threading.main_thread() not in threads
+    assert export_pool.active == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_releases_slot_only_after_worker_thread_finishes(export_pool):
+    """
+    Test, že po odpojení klienta uprostřed kroku generátoru se slot uvolní až po doběhnutí vlákna.
+    """
+    step_started = threading.Event()
+    resume_step = threading.Event()
+    closed = []
+
+    def chunks():
+        try:
+            yield b"a"
+            step_started.set()
+            resume_step.wait(5)
+            yield b"b"
+        finally:
+            closed.append(True)
+
+    stream = export_pool.open_stream(chunks())
+    assert await stream.__anext__() == b"a"
+
+    pending = asyncio.create_task(stream.__anext__())
+    await asyncio.to_thread(step_started.wait, 5)
+    pending.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await pending
+    await stream.aclose()
+    assert export_pool.active == 1
+
+    resume_step.set()
+    for _ in range(100):
+        if export_pool.active == 0:
+            break
+        await asyncio.sleep(0.01)
+    assert export_pool.active == 0
+    assert closed == [True]
+
+
+@pytest.mark.asyncio
+async def test_export_response_releases_slot_when_client_disconnects_before_body(export_pool):
+    """
+    Test, že slot se uvolní, i když se klient odpojí dřív, než se začne posílat tělo odpovědi.
+    """
+    response = await export_api.export_results("csv", _make_data(), encoding=None)
+    assert export_pool.active == 1
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        raise OSError("Klient se odpojil")
+
+    # anyio chybu zabalí do ExceptionGroup
+    with pytest.raises(Exception):
+        await response({"type": "http"}, receive, send)
+    assert export_pool.active == 0
+
+
+@pytest.mark.asyncio
+async def test_export_returns_503_with_retry_after_when_saturated(export_pool):
+    """
+    Test, že při plném poolu i frontě vrátí export 503 s hlavičkou Retry-After.
+    """
+    export_pool.acquire()
+    export_pool.acquire()
+
+    with pytest.raises(HTTPException) as exc_info:
+        await export_api.export_results("csv", _make_data(), encoding=None)
+
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers["Retry-After"] == "7"
+
+
+@pytest.mark.asyncio
+async def test_export_job_completes_and_can_be_downloaded(export_pool):
+    """
+    Test, že asynchronní exportní úloha doběhne a výsledný soubor lze stáhnout.
+    """
+    created = await export_api.create_export_job(_make_data(), format="csv", encoding=None)
+    assert created.status in ("queued", "running")
+
+    for _ in range(100):
+        status = await export_api.get_export_job(created.id)
+        if status.status == "done":
+            break
+        await asyncio.sleep(0.01)
+
+    assert status.status == "done"
+    assert status.download_url == f"/api/export/jobs/{created.id}/download"
+
+    response = await export_api.download_export_job(created.id)
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    with open(response.path, encoding="utf-8") as f:
+        assert len(f.read().splitlines()) == 4
+    assert export_pool.active == 0
+
+
+@pytest.mark.asyncio
+async def test_export_job_stays_queued_until_a_worker_picks_it_up(export_pool):
+    """
+    Test, že úloha je ve stavu queued, dokud jediný worker renderuje jiný export, a pak doběhne.
+    """
+    step_started = threading.Event()
+    resume_step = threading.Event()
+
+    def chunks():
+        step_started.set()
+        resume_step.wait(5)
+        yield b"a"
+
+    stream = export_pool.open_stream(chunks())
+    pending = asyncio.create_task(stream.__anext__())
+    await asyncio.to_thread(step_started.wait, 5)
+
+    created = await export_api.create_export_job(_make_data(), format="csv", encoding=None)
+    await asyncio.sleep(0.05)
+    assert created.status == "queued"
+    assert (await export_api.get_export_job(created.id)).status == "queued"
+
+    resume_step.set()
+    assert await pending == b"a"
+    await stream.aclose()
+    for _ in range(100):
+        status = await export_api.get_export_job(created.id)
+        if status.status == "done":
+            break
+        await asyncio.sleep(0.01)
+    assert status.status == "done"
+
+
+@pytest.mark.asyncio
+async def test_pool_can_start_again_after_shutdown():
+    """
+    Test, že pool po shutdown() (konec lifespanu) jde znovu spustit s novou složkou úloh.
+    """
+    pool = ExportPool(kind="thread", max_workers=1, max_queue=1)
+    first_dir = pool.job_dir
+    pool.shutdown()
+    assert not os.path.exists(first_dir)
+
+    pool.start()
+    try:
+        assert os.path.isdir(pool.job_dir)
+        chunks = (chunk for chunk in (b"a", b"b"))
+        assert b"".join([chunk async for chunk in pool.open_stream(chunks)]) == b"ab"
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_unknown_export_job_returns_404(export_pool):
+    """
+    Test, že neexistující úloha vrátí 404.
+    """
+    with pytest.raises(HTTPException) as exc_info:
+        await export_api.get_export_job("missing")
+
+    assert exc_info.value.status_code == 404
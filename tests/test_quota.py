@@ -0,0 +1,78 @@
+"""
+Unit testy pro klientský limit rychlosti a měsíční kvótu SerpAPI.
+"""
+
+import pytest
+
+from app.services.quota import MonthlyQuota, SearchRateLimitedError, TokenBucket
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_allows_burst_then_short_waits_then_rejects():
+    """
+    Test, že kbelík propustí náraz, krátké čekání rezervuje a na dlouhé čekání rovnou odmítne.
+    """
+    clock = FakeClock()
+    bucket = TokenBucket(60, burst=2, max_wait=1.5, clock=clock)
+
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 1.0
+    with pytest.raises(SearchRateLimitedError) as error:
+        bucket.reserve()
+    assert error.value.retry_after == 2.0
+
+    clock.now += 2
+    assert bucket.reserve() == 0.0
+    bucket.refund()
+    assert bucket.reserve() == 0.0
+
+
+def test_monthly_quota_persists_and_degrades_in_stages(tmp_path):
+    """
+    Test, že kvóta přežije znovuotevření a podle zbývajícího rozpočtu přejde do cache_only a fallback.
+    """
+    path = str(tmp_path / "quota.sqlite3")
+    clock = FakeClock(1_760_000_000)  # říjen 2025
+    quota = MonthlyQuota(path, limit=10, cache_only_below=0.3, reserve=1, clock=clock)
+
+    for _ in range(7):
+        assert quota.try_consume() == MonthlyQuota.NORMAL
+    assert quota.stage == MonthlyQuota.CACHE_ONLY
+    # V režimu cache_only se kvóta dál nečerpá
+    assert quota.try_consume() == MonthlyQuota.CACHE_ONLY
+    quota.close()
+
+    reopened = MonthlyQuota(path, limit=10, cache_only_below=0.3, reserve=1, clock=clock)
+    assert reopened.status() == {"month": "2025-10", "limit": 10, "used": 7, "remaining": 3, "stage": MonthlyQuota.CACHE_ONLY}
+
+    # Nový měsíc začíná s plným rozpočtem
+    clock.now += 31 * 24 * 3600
+    assert reopened.try_consume() == MonthlyQuota.NORMAL
+    assert reopened.stage == MonthlyQuota.NORMAL
+    reopened.close()
+
+
+def test_monthly_quota_exhausted_after_402(tmp_path):
+    """
+    Test, že po 402 od SerpAPI je kvóta do konce měsíce vyčerpaná i po restartu.
+    """
+    path = str(tmp_path / "quota.sqlite3")
+    quota = MonthlyQuota(path, limit=100)
+    quota.try_consume()
+    quota.mark_exhausted()
+    assert quota.stage == MonthlyQuota.FALLBACK
+    quota.close()
+
+    reopened = MonthlyQuota(path, limit=100)
+    assert reopened.stage == MonthlyQuota.FALLBACK
+    assert reopened.try_consume() == MonthlyQuota.FALLBACK
+    assert reopened.status()["remaining"] == 0
+    reopened.close()
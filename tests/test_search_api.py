@@ -0,0 +1,71 @@
+"""
+Testy pro API endpointy vyhledávání.
+"""
+
+import json
+import pytest
+from fastapi import HTTPException
+from app.api import search as search_api
+
+
+async def _read_body(response) -> str:
+    chunks = [chunk async for chunk in response.body_iterator]
+    return "".join(chunk if isinstance(chunk, str) else chunk.decode() for chunk in chunks)
+
+
+@pytest.mark.asyncio
+async def test_search_stream_returns_ndjson_lines():
+    """
+    Test, že streamovací endpoint vrací NDJSON, kde každý řádek je samostatný JSON.
+    """
+    response = await search_api.search_stream(user_input=["python", "fastapi"], format="ndjson", concurrency=None, deadline=None, max_results=10)
+
+    assert response.media_type == "application/x-ndjson"
+    events = [json.loads(line) for line in (await _read_body(response)).splitlines()]
+    assert {event["query"] for event in events if event["event"] == "response"} == {"python", "fastapi"}
+    assert events[-1] == {"event": "done", "total": 2}
+
+
+@pytest.mark.asyncio
+async def test_search_stream_supports_server_sent_events():
+    """
+    Test, že ve formátu SSE má každá událost řádky 'event:' a 'data:'.
+    """
+    response = await search_api.search_stream(user_input=["python"], format="sse", concurrency=None, deadline=None, max_results=10)
+
+    assert response.media_type == "text/event-stream"
+    blocks = [block for block in (await _read_body(response)).split("\n\n") if block]
+    assert all(block.startswith("event: ") and "\ndata: {" in block for block in blocks)
+    assert blocks[-1].startswith("event: done")
+
+
+@pytest.mark.asyncio
+async def test_search_stream_rejects_too_many_queries(monkeypatch):
+    """
+    Test, že příliš velká dávka je odmítnuta s chybou 400.
+    """
+    monkeypatch.setattr(search_api.config, "SEARCH_BATCH_MAX_QUERIES", 2)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await search_api.search_stream(user_input=["a", "b", "c"], format="ndjson", concurrency=None, deadline=None, max_results=10)
+
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_search_returns_429_when_rate_limited(monkeypatch):
+    """
+    Test, že přeplněný limit rychlosti vrátí 429 s hlavičkou Retry-After místo ukázkových dat.
+    """
+    from app.services.quota import SearchRateLimitedError
+
+    async def rate_limited(*args, **kwargs):
+        raise SearchRateLimitedError(4.2)
+
+    monkeypatch.setattr(search_api.search_service, "asearch", rate_limited)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await search_api.search(user_input="python", max_results=10)
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.headers["Retry-After"] == "5"
@@ -2,9 +2,12 @@
 Unit testy pro SearchService.
 """
 
+import asyncio
 import pytest
 from datetime import datetime, timezone
-from app.services.search_service import SearchService
+from app.services.search_service import SearchService, canonical_url
+from app.services.cache import MemoryCache, QueryCache
+from app.services.circuit_breaker import CircuitBreaker
 from app.models.search import SearchResponse, SearchResult
 
 
@@ -191,4 +194,484 @@ def test_search_fallback_on_api_error(search_service):
         assert result.provider == "serpapi-fallback"
         assert len(result.results) > 0
         assert "Vyhledávací služba neodpověděla včas" in result.warning
-        assert search_service.fallback_mode is True
+
+
+def test_fallback_state_does_not_leak_into_next_request(search_service):
+    """
+    Test, že po jednom selhání API další úspěšný dotaz nehlásí fallback ani staré varování.
+    """
+    search_service.use_real_api = True
+
+    with patch.object(search_service, '_call_serpapi', side_effect=httpx.TimeoutException("Timeout!")):
+        failed = search_service.search("test query")
+
+    with patch.object(search_service, '_call_serpapi', return_value={"organic_results": []}):
+        recovered = search_service.search("test query")
+
+    assert failed.provider == "serpapi-fallback"
+    assert recovered.provider == "serpapi"
+    assert recovered.warning is None
+
+
+@pytest.mark.asyncio
+async def test_asearch_returns_mock_data_without_api_key(search_service):
+    """
+    Test, že asynchronní varianta search() vrací stejnou strukturu jako synchronní.
+    """
+    result = await search_service.asearch("python tutorial")
+
+    assert isinstance(result, SearchResponse)
+    assert result.provider == "mock"
+    assert result.total_returned == len(result.results)
+
+
+@pytest.mark.asyncio
+async def test_asearch_uses_shared_http_client(search_service):
+    """
+    Test, že asynchronní vyhledávání používá sdíleného klienta (pool spojení).
+    """
+    requests_seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests_seen.append(request)
+        return httpx.Response(200, json={
+            "organic_results": [{"title": "Stub", "link": "https://example.com", "snippet": "stub"}]
+        })
+
+    search_service.use_real_api = True
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        search_service.http_client = client
+        result = await search_service.asearch("stub query")
+
+    assert len(requests_seen) == 1
+    assert requests_seen[0].url.params["q"] == "stub query"
+    assert result.provider == "serpapi"
+    assert result.results[0].title == "Stub"
+
+
+def _status_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", SearchService.SERPAPI_URL)
+    response = httpx.Response(status_code, request=request)
+    return httpx.HTTPStatusError("upstream error", request=request, response=response)
+
+
+def test_circuit_breaker_opens_after_burst_of_429():
+    """
+    Test, že série chyb 429 otevře circuit breaker a další dotazy už nejdou na síť.
+    """
+    service = SearchService(circuit_breaker=CircuitBreaker(failure_threshold=3, cooldown=60))
+    service.use_real_api = True
+
+    with patch.object(service, '_call_serpapi', side_effect=_status_error(429)) as call:
+        for _ in range(10):
+            result = service.search("test query")
+
+    assert call.call_count == 3
+    assert result.provider == "serpapi-fallback"
+    assert result.warning == SearchService.BREAKER_OPEN_WARNING
+
+
+def test_circuit_breaker_recovers_after_cooldown():
+    """
+    Test, že po uplynutí cooldownu projde zkušební dotaz a služba se sama zotaví.
+    """
+    now = [0.0]
+    service = SearchService(circuit_breaker=CircuitBreaker(failure_threshold=1, cooldown=30, clock=lambda: now[0]))
+    service.use_real_api = True
+
+    with patch.object(service, '_call_serpapi', side_effect=_status_error(429)):
+        service.search("test query")
+
+    assert service.circuit_breaker.state == CircuitBreaker.OPEN
+
+    now[0] = 31.0
+    with patch.object(service, '_call_serpapi', return_value={"organic_results": []}) as call:
+        result = service.search("test query")
+
+    assert call.call_count == 1
+    assert result.provider == "serpapi"
+    assert service.circuit_breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_asearch_serves_repeated_query_from_cache():
+    """
+    Test, že opakovaný (normalizovaný) dotaz už nevolá SerpAPI a vrací se z cache.
+    """
+    service = SearchService(cache=QueryCache(MemoryCache(), ttl=60))
+    service.use_real_api = True
+
+    with patch.object(service, '_acall_serpapi', return_value={"organic_results": []}) as call:
+        first = await service.asearch("Python Tutorial")
+        second = await service.asearch("python   tutorial")
+
+    assert call.call_count == 1
+    assert first.cached is False
+    assert second.cached is True
+    assert second.fetched_at == first.fetched_at
+
+
+@pytest.mark.asyncio
+async def test_asearch_does_not_cache_fallback():
+    """
+    Test, že se do cache neukládají ukázková data z fallbacku.
+    """
+    service = SearchService(cache=QueryCache(MemoryCache(), ttl=60))
+    service.use_real_api = True
+
+    with patch.object(service, '_acall_serpapi', side_effect=httpx.TimeoutException("Timeout!")) as call:
+        await service.asearch("test query")
+        result = await service.asearch("test query")
+
+    assert call.call_count == 2
+    assert result.cached is False
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_queries_make_single_upstream_call():
+    """
+    Test, že N souběžných stejných dotazů vyvolá právě jedno volání SerpAPI.
+    """
+    upstream_calls = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal upstream_calls
+        upstream_calls += 1
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={
+            "organic_results": [{"title": "Stub", "link": "https://example.com"}]
+        })
+
+    service = SearchService(cache=QueryCache(MemoryCache(), ttl=60))
+    service.use_real_api = True
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        service.http_client = client
+        results = await asyncio.gather(*(service.asearch("Trending Query") for _ in range(25)))
+
+    assert upstream_calls == 1
+    assert all(result.results[0].title == "Stub" for result in results)
+    assert service.single_flight.calls == 1
+    assert service.single_flight.deduplicated == 24
+
+
+@pytest.mark.asyncio
+async def test_asearch_many_respects_concurrency_and_keeps_order():
+    """
+    Test, že dávka běží souběžně s omezením počtu zároveň běžících dotazů a zachová pořadí.
+    """
+    running = 0
+    max_running = 0
+
+    async def fake_call(search_query: str, start: int = 0) -> dict:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {"organic_results": [{"title": search_query, "link": f"https://example.com/{search_query}"}]}
+
+    service = SearchService(cache=QueryCache(MemoryCache(), ttl=60))
+    service.use_real_api = True
+    queries = [f"query {i}" for i in range(20)]
+
+    with patch.object(service, '_acall_serpapi', side_effect=fake_call):
+        items = await service.asearch_many(queries, concurrency=4)
+
+    assert max_running == 4
+    assert [item.query for item in items] == queries
+    assert all(item.response.results[0].title == item.query for item in items)
+
+
+@pytest.mark.asyncio
+async def test_asearch_many_reports_per_query_errors_on_deadline():
+    """
+    Test, že dotazy nestihnuté do deadlinu dávky vrátí chybu a ostatní výsledky zůstanou.
+    """
+    async def fake_call(search_query: str, start: int = 0) -> dict:
+        if search_query == "slow":
+            await asyncio.sleep(5)
+        return {"organic_results": []}
+
+    service = SearchService(cache=QueryCache(MemoryCache(), ttl=60))
+    service.use_real_api = True
+
+    with patch.object(service, '_acall_serpapi', side_effect=fake_call):
+        items = await service.asearch_many(["fast", "slow", "  "], concurrency=3, deadline=0.2)
+
+    assert items[0].response is not None and items[0].error is None
+    assert items[1].response is None and "časový limit" in items[1].error
+    assert items[2].error == "Vyhledávací dotaz nesmí být prázdný"
+
+
+@pytest.mark.asyncio
+async def test_aiter_search_events_streams_results_before_metadata(search_service):
+    """
+    Test, že stream posílá nejdřív jednotlivé výsledky, pak metadata dotazu a nakonec 'done'.
+    """
+    events = [event async for event in search_service.aiter_search_events(["python"])]
+
+    kinds = [event.event for event in events]
+    assert kinds[-2:] == ["response", "done"]
+    assert set(kinds[:-2]) == {"result"}
+    assert events[-2].response.total_returned == len(kinds) - 2
+    assert events[-2].response.results == []
+    assert events[-1].total == 1
+
+
+@pytest.mark.asyncio
+async def test_asearch_fetches_pages_concurrently_and_deduplicates():
+    """
+    Test, že hlubší vyhledávání stáhne stránky souběžně, odstraní duplicitní URL a přečísluje pozice.
+    """
+    running = 0
+    max_running = 0
+    requested_starts = []
+
+    async def fake_call(search_query: str, start: int = 0) -> dict:
+        nonlocal running, max_running
+        requested_starts.append(start)
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        links = [f"https://example.com/{start + i}" for i in range(10)]
+        if start == 10:
+            # Google občas vrátí stejný výsledek na dvou stránkách
+            links[0] = "https://EXAMPLE.com/9/#top"
+        return {"organic_results": [{"title": link, "link": link} for link in links]}
+
+    service = SearchService(cache=QueryCache(MemoryCache(), ttl=60))
+    service.use_real_api = True
+
+    with patch.object(service, '_acall_serpapi', side_effect=fake_call):
+        result = await service.asearch("rank tracking", max_results=30)
+
+    assert sorted(requested_starts) == [0, 10, 20]
+    assert max_running == 3
+    assert result.total_returned == 29
+    assert [r.position for r in result.results] == list(range(1, 30))
+    assert len({canonical_url(r.url) for r in result.results}) == 29
+
+
+@pytest.mark.asyncio
+async def test_asearch_with_failed_page_returns_partial_results_without_caching():
+    """
+    Test, že selhání jedné z dalších stránek vrátí neúplné výsledky s varováním a neuloží je do cache.
+    """
+    async def fake_call(search_query: str, start: int = 0) -> dict:
+        if start == 10:
+            raise httpx.TimeoutException("Timeout!")
+        return {"organic_results": [{"title": "A", "link": f"https://example.com/{start}"}]}
+
+    service = SearchService(cache=QueryCache(MemoryCache(), ttl=60))
+    service.use_real_api = True
+
+    with patch.object(service, '_acall_serpapi', side_effect=fake_call):
+        result = await service.asearch("test", max_results=20)
+        again = await service.asearch("test", max_results=20)
+
+    assert result.provider == "serpapi"
+    assert result.total_returned == 1
+    assert "neúplné" in result.warning
+    assert again.cached is False
+
+
+def test_canonical_url_ignores_cosmetic_differences():
+    """
+    Test, že normalizace URL ignoruje velikost písmen hostu, fragment, koncové lomítko a utm_ parametry.
+    """
+    assert canonical_url("HTTPS://Example.com:443/path/?utm_source=x&id=1#top") == "https://example.com/path?id=1"
+    assert canonical_url("https://example.com/Path") != canonical_url("https://example.com/path")
+
+
+@pytest.mark.asyncio
+async def test_asearch_serves_stale_response_and_refreshes_in_background():
+    """
+    Test, že zastaralá odpověď se vrátí hned a do cache se na pozadí uloží čerstvá.
+    """
+    now = [1000.0]
+    clock = lambda: now[0]
+    service = SearchService(cache=QueryCache(MemoryCache(clock=clock), ttl=60, stale_ttl=600, clock=clock))
+    service.use_real_api = True
+    refresh_started = asyncio.Event()
+    release = asyncio.Event()
+    calls = 0
+
+    async def fake_call(search_query: str, start: int = 0) -> dict:
+        nonlocal calls
+        calls += 1
+        if calls > 1:
+            refresh_started.set()
+            await release.wait()
+        return {"organic_results": [{"title": f"Verze {calls}", "link": "https://example.com"}]}
+
+    with patch.object(service, '_acall_serpapi', side_effect=fake_call):
+        await service.asearch("python")
+        now[0] += 120
+
+        stale = await service.asearch("python")
+        assert stale.stale is True
+        assert stale.age_seconds == 120.0
+        assert stale.results[0].title == "Verze 1"
+
+        # Další požadavky během obnovy dostanou také zastaralou odpověď a novou obnovu nespustí
+        await refresh_started.wait()
+        assert (await service.asearch("python")).stale is True
+        assert service.background_refreshes == 1
+
+        release.set()
+        await asyncio.gather(*service._background_tasks)
+        fresh = await service.asearch("python")
+
+    assert calls == 2
+    assert fresh.stale is False
+    assert fresh.results[0].title == "Verze 2"
+
+
+@pytest.mark.asyncio
+async def test_warm_up_fills_cache_from_file(tmp_path):
+    """
+    Test, že zahřátí načte dotazy ze souboru (bez komentářů a duplicit) a uloží je do cache.
+    """
+    from app.services.search_service import load_warmup_queries
+
+    warmup_file = tmp_path / "popular.txt"
+    warmup_file.write_text("# populární dotazy\npython\n\nfastapi\npython\n", encoding="utf-8")
+    queries = load_warmup_queries(str(warmup_file))
+    assert queries == ["python", "fastapi"]
+    assert load_warmup_queries(str(tmp_path / "missing.txt")) == []
+
+    service = SearchService(cache=QueryCache(MemoryCache(), ttl=60))
+    service.use_real_api = True
+
+    with patch.object(service, '_acall_serpapi', return_value={"organic_results": []}) as call:
+        await service.start_warm_up(queries)
+        assert (await service.asearch("Python")).cached is True
+
+    assert call.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_asearch_degrades_as_quota_runs_out(tmp_path):
+    """
+    Test, že při docházející kvótě se odpovídá jen z cache a SerpAPI se už nevolá ani pro nové dotazy.
+    """
+    from app.services.quota import MonthlyQuota
+
+    now = [1000.0]
+    clock = lambda: now[0]
+    path = str(tmp_path / "quota.sqlite3")
+    quota = MonthlyQuota(path, limit=4, cache_only_below=0.5)
+    service = SearchService(cache=QueryCache(MemoryCache(clock=clock), ttl=60, stale_ttl=600, clock=clock), quota=quota)
+    service.use_real_api = True
+
+    with patch.object(service, '_acall_serpapi', return_value={"organic_results": [{"title": "A", "link": "https://a.cz"}]}) as call:
+        await service.asearch("python")
+        await service.asearch("fastapi")
+        assert quota.stage == MonthlyQuota.CACHE_ONLY
+
+        # Zastaralá odpověď se vrátí a pokus o obnovu kvótu nečerpá
+        now[0] += 120
+        assert (await service.asearch("python")).stale is True
+        await asyncio.gather(*service._background_tasks)
+        assert (await service.asearch("python")).results[0].title == "A"
+
+        # Dotaz mimo cache dostane ukázková data bez volání SerpAPI
+        low = await service.asearch("django")
+
+        # Jiný worker sdílející soubor dostal 402 - stav se projeví i tady
+        other_worker = MonthlyQuota(path, limit=4, cache_only_below=0.5)
+        other_worker.mark_exhausted()
+        other_worker.close()
+        exhausted = await service.asearch("flask")
+
+    assert call.call_count == 2
+    assert low.provider == "serpapi-fallback"
+    assert low.warning == SearchService.QUOTA_LOW_WARNING
+    assert exhausted.warning == SearchService.QUOTA_EXHAUSTED_WARNING
+    status = await service.budget_status()
+    assert status["stage"] == MonthlyQuota.FALLBACK
+    assert status["quota"]["used"] == 2
+    await service.aclose()
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_waits_or_reports_error_instead_of_mock_data():
+    """
+    Test, že limit rychlosti na token počká a při dlouhém čekání vrátí chybu dotazu, nikdy ukázková data.
+    """
+    from app.services.quota import TokenBucket
+
+    service = SearchService(cache=QueryCache(MemoryCache(), ttl=60), rate_limiter=TokenBucket(600, burst=1, max_wait=0.15))
+    service.use_real_api = True
+
+    with patch.object(service, '_acall_serpapi', return_value={"organic_results": []}) as call:
+        items = await service.asearch_many(["a", "b", "c"], concurrency=3)
+
+    assert call.call_count == 2
+    assert [item.response.provider for item in items if item.error is None] == ["serpapi", "serpapi"]
+    assert ["Příliš mnoho vyhledávání" in (item.error or "") for item in items].count(True) == 1
+
+
+@pytest.mark.asyncio
+async def test_quota_stage_is_checked_before_taking_rate_limit_token(tmp_path):
+    """
+    Test, že při vyčerpané kvótě dostane dotaz ukázková data bez odebrání tokenu i bez chyby limitu rychlosti.
+    """
+    from app.services.quota import MonthlyQuota, TokenBucket
+
+    quota = MonthlyQuota(str(tmp_path / "quota.sqlite3"), limit=1000)
+    quota.mark_exhausted()
+    bucket = TokenBucket(60, burst=1, max_wait=0)
+    bucket.reserve()
+    service = SearchService(cache=QueryCache(MemoryCache(), ttl=60), rate_limiter=bucket, quota=quota)
+    service.use_real_api = True
+
+    with patch.object(service, '_acall_serpapi', return_value={"organic_results": []}) as call:
+        result = await service.asearch("python")
+    with patch.object(service, '_call_serpapi', return_value={"organic_results": []}) as sync_call:
+        sync_result = service.search("python")
+
+    assert call.call_count == 0
+    assert sync_call.call_count == 0
+    assert result.warning == sync_result.warning == SearchService.QUOTA_EXHAUSTED_WARNING
+    assert bucket.tokens < 0.1
+    await service.aclose()
+
+
+def test_sync_search_shares_rate_limit_with_async_path():
+    """
+    Test, že synchronní search() prochází stejnou rezervací jako asynchronní cesta a přeplněný limit ohlásí chybou.
+    """
+    from app.services.quota import SearchRateLimitedError, TokenBucket
+
+    service = SearchService(cache=QueryCache(MemoryCache(), ttl=60), rate_limiter=TokenBucket(60, burst=1, max_wait=0))
+    service.use_real_api = True
+
+    with patch.object(service, '_call_serpapi', return_value={"organic_results": []}) as call:
+        assert service.search("python").provider == "serpapi"
+        with pytest.raises(SearchRateLimitedError):
+            service.search("python")
+
+    assert call.call_count == 1
+
+
+def test_payment_required_marks_quota_exhausted(tmp_path):
+    """
+    Test, že 402 od SerpAPI vyčerpá kvótu a další dotazy už na síť nejdou.
+    """
+    from app.services.quota import MonthlyQuota
+
+    quota = MonthlyQuota(str(tmp_path / "quota.sqlite3"), limit=1000)
+    service = SearchService(quota=quota)
+    service.use_real_api = True
+
+    with patch.object(service, '_call_serpapi', side_effect=_status_error(402)) as call:
+        service.search("test query")
+        result = service.search("test query")
+
+    assert call.call_count == 1
+    assert quota.stage == MonthlyQuota.FALLBACK
+    assert result.warning == SearchService.QUOTA_EXHAUSTED_WARNING
+    quota.close()
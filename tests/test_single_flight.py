@@ -0,0 +1,68 @@
+"""
+Unit testy pro SingleFlight.
+"""
+
+import asyncio
+import pytest
+from app.services.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_followers_receive_leader_exception():
+    """
+    Test, že chyba sdíleného volání se propaguje všem čekajícím.
+    """
+    single_flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(
+        *(single_flight.do("key", failing) for _ in range(3)),
+        return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert single_flight.calls == 1
+    assert single_flight.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_different_keys_are_not_merged():
+    """
+    Test, že volání s různými klíči běží samostatně.
+    """
+    single_flight = SingleFlight()
+
+    async def work(value: str):
+        await asyncio.sleep(0.01)
+        return value
+
+    results = await asyncio.gather(
+        single_flight.do("a", lambda: work("a")),
+        single_flight.do("b", lambda: work("b"))
+    )
+
+    assert results == ["a", "b"]
+    assert single_flight.calls == 2
+    assert single_flight.deduplicated == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_follower_does_not_cancel_shared_call():
+    """
+    Test, že zrušení jednoho čekajícího nezruší sdílené volání ostatním.
+    """
+    single_flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    leader = asyncio.create_task(single_flight.do("key", work))
+    follower = asyncio.create_task(single_flight.do("key", work))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "done"